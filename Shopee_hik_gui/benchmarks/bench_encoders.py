@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: encoder ของภาพหลักฐาน (image_encoder) บนภาพตัวอย่างใน images/
+
+- decode ภาพตัวอย่างครั้งเดียว แล้ว encode ซ้ำด้วยทุก host encoder ที่ติดตั้งอยู่
+- รายงาน encode ms (wall), CPU ms (process_time), ขนาดไฟล์เฉลี่ย และ PSNR เทียบภาพต้นฉบับ
+- "sdk" (MV_CC_SaveImageEx2) ต้องใช้กล้องจริง: ดู encode_ms ใน log "⏱️ Capture" / evidence catalog แทน
+
+ใช้งาน:
+    python benchmarks/bench_encoders.py
+    python benchmarks/bench_encoders.py --images ../images --quality 85 --repeat 20
+    python benchmarks/bench_encoders.py --encoders opencv turbo
+"""
+
+import os
+import sys
+import glob
+import time
+import argparse
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from image_encoder import ENCODERS, IMAGE_EXTENSIONS, available_encoders, create_encoder
+
+DEFAULT_IMAGES = os.path.join(os.path.dirname(ROOT), "images")
+
+
+def load_images(folder):
+    paths = sorted(p for p in glob.glob(os.path.join(folder, "*")) if p.lower().endswith(IMAGE_EXTENSIONS))
+    images = [(os.path.basename(p), cv2.imread(p)) for p in paths]
+    return [(name, img) for name, img in images if img is not None]
+
+
+def psnr(original, data):
+    decoded = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    return cv2.PSNR(original, decoded)
+
+
+def bench(encoder, images, repeat):
+    """return (wall ms/ภาพ, cpu ms/ภาพ, bytes เฉลี่ย, PSNR เฉลี่ย)"""
+    for _, img in images:
+        encoder.encode(img)  # warm up
+    sizes, scores = [], []
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    for _ in range(repeat):
+        for _, img in images:
+            encoder.encode(img)
+    wall = (time.perf_counter() - wall0) * 1000 / (repeat * len(images))
+    cpu = (time.process_time() - cpu0) * 1000 / (repeat * len(images))
+    for _, img in images:
+        data = encoder.encode(img)
+        sizes.append(len(data))
+        scores.append(psnr(img, data))
+    return wall, cpu, sum(sizes) / len(sizes), sum(scores) / len(scores)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark evidence image encoders")
+    parser.add_argument("--images", default=DEFAULT_IMAGES, help="folder ของภาพตัวอย่าง")
+    parser.add_argument("--encoders", nargs="+", default=None, choices=sorted(ENCODERS))
+    parser.add_argument("--quality", type=int, default=90)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    images = load_images(args.images)
+    if not images:
+        raise SystemExit(f"No images in {args.images}")
+    h, w = images[0][1].shape[:2]
+    raw_bytes = sum(img.nbytes for _, img in images) / len(images)
+    print(f"{len(images)} image(s) from {args.images} ({w}x{h}), quality {args.quality}, "
+          f"{args.repeat} rounds, OpenCV {cv2.__version__}")
+
+    available = available_encoders()
+    names = args.encoders or [name for name in ENCODERS if name != "sdk"]
+    print(f"{'encoder':<10}{'wall ms':>10}{'cpu ms':>10}{'KB':>10}{'ratio':>8}{'PSNR dB':>10}")
+    for name in names:
+        if name == "sdk":
+            print(f"{name:<10}  (needs a camera - see encode_ms in the capture log)")
+            continue
+        if name not in available:
+            print(f"{name:<10}  (not installed)")
+            continue
+        wall, cpu, size, score = bench(create_encoder(name, args.quality), images, args.repeat)
+        print(f"{name:<10}{wall:>10.2f}{cpu:>10.2f}{size / 1024:>10.0f}{raw_bytes / size:>8.1f}{score:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: LineFramer vs แบบเดิม (decode + splitlines ทีละ recv)
+
+- replay byte stream ของ SCMVS (ไฟล์ที่ capture ไว้ หรือสร้างจำลอง) ตัดเป็น TCP segment ขนาดสุ่ม
+- วัด throughput (MB/s, lines/s) และนับ order ที่หาเจอ / หาย
+- replay ผ่าน socketpair จริง เทียบ recv 1024 vs RECV_SIZE
+
+ใช้งาน:
+    python benchmarks/bench_line_framer.py                    # stream จำลอง
+    python benchmarks/bench_line_framer.py --stream dump.bin  # stream ที่ capture จาก SCMVS
+"""
+
+import os
+import re
+import sys
+import time
+import socket
+import random
+import argparse
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from line_framer import LineFramer, RECV_SIZE, iter_lines
+
+ORDER_PATTERN = re.compile(r"Shopee\s*Order\s*No\.?\s*([A-Z0-9]{14})", re.I)
+
+
+def make_stream(n_lines, seed=1):
+    """stream จำลอง: order ปนกับข้อความ OCR อื่น ขึ้นบรรทัดด้วย \\r\\n"""
+    rnd = random.Random(seed)
+    chars = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+    lines = []
+    for i in range(n_lines):
+        if i % 3 == 0:
+            order = "".join(rnd.choice(chars) for _ in range(10)) + f"{i % 10000:04d}"
+            lines.append(f"Shopee Order No. {order}")
+        else:
+            lines.append("OCR;" + ";".join(str(rnd.randint(0, 99999)) for _ in range(rnd.randint(2, 12))))
+    return ("\r\n".join(lines) + "\r\n").encode()
+
+
+def segment(stream, seed=2, min_size=1, max_size=1460):
+    """ตัด stream เป็นชิ้นขนาดสุ่ม (จำลอง TCP segment / recv ที่ได้ไม่ครบ)"""
+    rnd = random.Random(seed)
+    out, i = [], 0
+    while i < len(stream):
+        n = rnd.randint(min_size, max_size)
+        out.append(stream[i:i + n])
+        i += n
+    return out
+
+
+def count_orders(lines):
+    return sum(1 for line in lines if ORDER_PATTERN.search(line))
+
+
+def run_legacy(chunks):
+    orders = 0
+    for data in chunks:
+        text = data.decode("utf-8", errors="ignore")
+        for line in text.splitlines():
+            if ORDER_PATTERN.search(line):
+                orders += 1
+    return orders
+
+
+def run_framer(chunks):
+    framer = LineFramer()
+    orders = 0
+    for data in chunks:
+        for line in framer.feed(data):
+            if ORDER_PATTERN.search(line):
+                orders += 1
+    for line in framer.flush():
+        if ORDER_PATTERN.search(line):
+            orders += 1
+    return orders
+
+
+def bench(name, fn, chunks, total_bytes, repeat):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        orders = fn(chunks)
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    print(f"  {name:<22} {total_bytes / best / 1e6:8.1f} MB/s  {best * 1000:8.1f} ms  orders={orders}")
+    return orders
+
+
+def bench_socket(stream, chunks, recv_size):
+    """ส่ง chunk ผ่าน socketpair แล้วอ่านด้วย iter_lines"""
+    a, b = socket.socketpair()
+
+    def sender():
+        for data in chunks:
+            a.sendall(data)
+        a.shutdown(socket.SHUT_WR)
+
+    t = threading.Thread(target=sender)
+    t0 = time.perf_counter()
+    t.start()
+    lines = list(iter_lines(b, recv_size=recv_size, idle_flush=None))
+    dt = time.perf_counter() - t0
+    t.join()
+    a.close()
+    b.close()
+    print(f"  socket recv={recv_size:<6}      {len(stream) / dt / 1e6:8.1f} MB/s  {dt * 1000:8.1f} ms  "
+          f"lines={len(lines)} orders={count_orders(lines)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stream", help="ไฟล์ byte stream ที่ capture จาก SCMVS")
+    parser.add_argument("--lines", type=int, default=200000, help="จำนวนบรรทัดของ stream จำลอง")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.stream:
+        with open(args.stream, "rb") as f:
+            stream = f.read()
+    else:
+        stream = make_stream(args.lines)
+
+    expected = run_framer([stream])
+    chunks = segment(stream)
+    print(f"Stream: {len(stream) / 1e6:.1f} MB, {len(chunks)} segments, {expected} orders")
+
+    print("In-memory (segments สุ่ม 1-1460 byte):")
+    legacy = bench("legacy splitlines", run_legacy, chunks, len(stream), args.repeat)
+    framed = bench("LineFramer", run_framer, chunks, len(stream), args.repeat)
+    print(f"  -> legacy lost {expected - legacy} order(s), LineFramer lost {expected - framed}")
+
+    print("Socket replay:")
+    for recv_size in (1024, RECV_SIZE):
+        bench_socket(stream, chunks, recv_size)
+
+
+if __name__ == "__main__":
+    main()
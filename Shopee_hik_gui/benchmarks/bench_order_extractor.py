@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: OrderExtractor vs ORDER_PATTERN แบบเดิม (search ทีละบรรทัด + upper + isdigit)
+
+- stream จำลองแบบเดียวกับ bench_line_framer (order ปนข้อความ OCR อื่น)
+- legacy          : ORDER_PATTERN.search ต่อบรรทัด (แบบ camera_server เดิม)
+- extractor/line  : OrderExtractor.extract_all ต่อบรรทัด (prefilter ตัดบรรทัดที่ไม่มี keyword)
+- extractor/buffer: extract_all ครั้งเดียวทั้ง buffer
+
+ใช้งาน:
+    python benchmarks/bench_order_extractor.py --lines 200000 --formats shopee spx lazada lex
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from order_extractor import OrderExtractor, FORMATS
+from bench_line_framer import make_stream
+
+ORDER_PATTERN = re.compile(r"Shopee\s*Order\s*No\.?\s*([A-Z0-9]{14})", re.I)
+
+
+def run_legacy(lines):
+    found = []
+    for line in lines:
+        match = ORDER_PATTERN.search(line)
+        if not match:
+            continue
+        order_no = match.group(1).upper()
+        if not order_no.isdigit():
+            found.append(order_no)
+    return found
+
+
+def run_per_line(extractor, lines):
+    found = []
+    for line in lines:
+        for match in extractor.extract_all(line):
+            if match.valid:
+                found.append(match.order_no)
+    return found
+
+
+def run_buffer(extractor, text):
+    return [m.order_no for m in extractor.extract_all(text) if m.valid]
+
+
+def bench(name, fn, n_lines, repeat):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        found = fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    print(f"  {name:<20} {best * 1000:8.1f} ms  {n_lines / best / 1e6:6.2f} M lines/s  orders={len(found)}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--formats", nargs="+", default=["shopee"], choices=sorted(FORMATS))
+    args = parser.parse_args()
+
+    text = make_stream(args.lines).decode()
+    lines = text.splitlines()
+    extractor = OrderExtractor(args.formats)
+    print(f"{len(lines)} lines, formats={','.join(args.formats)}")
+
+    legacy = bench("legacy per-line", lambda: run_legacy(lines), len(lines), args.repeat)
+    per_line = bench("extractor per-line", lambda: run_per_line(extractor, lines), len(lines), args.repeat)
+    buffered = bench("extractor buffer", lambda: run_buffer(extractor, text), len(lines), args.repeat)
+
+    if "shopee" in args.formats:
+        assert legacy == per_line == buffered, "results differ from legacy ORDER_PATTERN"
+        print("  results identical to legacy")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: pixel_convert (dispatch table + vectorized unpack) ต่อ PixelType
+
+- สร้าง raw frame จำลองตามขนาดเซนเซอร์ แล้ววัดเวลาแปลงเต็มขนาด / ครึ่งขนาด (preview)
+- เทียบกับแบบเดิมของ hik_camera (Bayer8: cvtColor ตรงๆ, Mono8: GRAY2RGB) เป็น baseline
+- ใช้ dst เดิมทุกรอบเหมือน live view (ไม่จองหน่วยความจำใหม่)
+
+ใช้งาน:
+    python benchmarks/bench_pixel_convert.py
+    python benchmarks/bench_pixel_convert.py --width 4096 --height 3000 --repeat 30
+"""
+
+import os
+import sys
+import time
+import argparse
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pixel_convert
+from pixel_convert import PIXEL_TYPE_NAMES, output_shape
+from PixelType_header import *
+
+FORMATS = [
+    PixelType_Gvsp_Mono8,
+    PixelType_Gvsp_Mono12,
+    PixelType_Gvsp_Mono12_Packed,
+    PixelType_Gvsp_BayerRG8,
+    PixelType_Gvsp_BayerRG10,
+    PixelType_Gvsp_BayerRG12_Packed,
+    PixelType_Gvsp_YUV422_Packed,
+    PixelType_Gvsp_RGB8_Packed,
+]
+
+
+def raw_size(pixel_type, width, height):
+    """จำนวน byte ต่อเฟรม (bit ต่อ pixel อยู่ใน byte ที่ 2 ของค่า PixelType)"""
+    bits = (pixel_type >> 16) & 0xFF
+    return width * height * bits // 8
+
+
+def timed(fn, repeat):
+    fn()  # warm up
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pixel format conversion")
+    parser.add_argument("--width", type=int, default=2448)
+    parser.add_argument("--height", type=int, default=2048)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    w, h = args.width, args.height
+
+    rng = np.random.default_rng(1)
+    full_dst = np.empty(output_shape(w, h), dtype=np.uint8)
+    half_dst = np.empty(output_shape(w, h, half=True), dtype=np.uint8)
+
+    print(f"{w}x{h}, {args.repeat} rounds, OpenCV {cv2.__version__}")
+    print(f"{'format':<22}{'full ms':>10}{'half ms':>10}{'baseline ms':>13}")
+    for pixel_type in FORMATS:
+        data = rng.integers(0, 256, raw_size(pixel_type, w, h), dtype=np.uint8)
+        full = timed(lambda: pixel_convert.convert(data, w, h, pixel_type, dst=full_dst), args.repeat)
+        half = timed(lambda: pixel_convert.convert(data, w, h, pixel_type, dst=half_dst, half=True), args.repeat)
+
+        baseline = ""
+        if pixel_type == PixelType_Gvsp_BayerRG8:
+            baseline = f"{timed(lambda: cv2.cvtColor(data.reshape(h, w), cv2.COLOR_BayerRG2RGB, dst=full_dst), args.repeat):.2f}"
+        elif pixel_type == PixelType_Gvsp_Mono8:
+            baseline = f"{timed(lambda: cv2.cvtColor(data.reshape(h, w), cv2.COLOR_GRAY2RGB, dst=full_dst), args.repeat):.2f}"
+        print(f"{PIXEL_TYPE_NAMES[pixel_type]:<22}{full:>10.2f}{half:>10.2f}{baseline:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,47 +7,107 @@ Hikrobot Multi-Camera Capture Server + GUI Integration
 - Send images to GUI for display
 """
 
-import socket
 import os
+import threading
 import sys
 import re
+import math
 import time
+import queue
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 from ctypes import *
+import numpy as np
 from PyQt5.QtCore import QThread, pyqtSignal
 from PyQt5.QtGui import QImage, QPixmap
-from config import COLORS, OUTPUT_DIR
+from evidence_writer import EvidenceWriter, when_all_saved
+from order_scheduler import OrderScheduler, ConveyorTracker, ConveyorScheduler
+from ingest_server import IngestServer
+from order_extractor import OrderExtractor
+from order_index import OrderIndex
+from evidence_catalog import EvidenceCatalog
+from evidence_layout import EvidenceLayout
+from image_encoder import create_encoder
+from preview_service import PreviewService
+import pixel_convert
+from config import (
+    COLORS, OUTPUT_DIR, HIKROBOT_USE_SIMULATION, HIKROBOT_TRIGGER_MODE,
+    ACTION_DEVICE_KEY, ACTION_GROUP_KEY, ACTION_GROUP_MASK,
+    ACTION_BROADCAST_ADDRESS, ACTION_ACK_TIMEOUT_MS,
+    BELT_SPEED_MM_S, OCR_TO_CAMERA_MM, ENCODER_MM_PER_PULSE,
+    CAPTURE_OFFSET_MS, MIN_CAPTURE_GAP_MS, ORDER_FORMATS, CATALOG_PATH, CATALOG_BACKFILL_ON_START,
+    EVIDENCE_LAYOUT, EVIDENCE_HASH_CHARS,
+    EVIDENCE_ENCODER, EVIDENCE_ENCODER_PER_CAMERA, EVIDENCE_QUALITY
+)
 
 # =============================
 # IMPORT HIKROBOT SDK
 # =============================
 sys.path.append(".")
-try:
-    from MvImport.MvCameraControl_class import *
+if HIKROBOT_USE_SIMULATION:
+    # กล้องจำลอง API เดียวกับ MvCamera (ไม่ต้องมี SDK/ฮาร์ดแวร์)
+    from fake_camera import *
     SDK_AVAILABLE = True
-except ImportError:
-    print("⚠️ Cannot import MvCameraControl_class.py - Using simulation mode")
-    SDK_AVAILABLE = False
+else:
+    try:
+        from MvImport.MvCameraControl_class import *
+        SDK_AVAILABLE = True
+    except ImportError:
+        print("⚠️ Cannot import MvCameraControl_class.py - Using simulation mode")
+        SDK_AVAILABLE = False
 
 # =============================
 # CONFIG
 # =============================
 PORT = 5020
 TRIGGER_TIMEOUT_MS = 3000
-CAPTURE_DELAY_SECONDS = 3  # ⏱️ Delay 3 วินาทีหลังเจอ Order ID
+JPEG_BUFFERS_PER_CAMERA = 2  # จำนวน output buffer ที่จองไว้ต่อกล้อง
+CAPTURE_DELAY_SECONDS = 3  # ⏱️ Delay คงที่ (ใช้เมื่อไม่ได้ตั้ง BELT_SPEED_MM_S)
+INDEX_EXPIRE_INTERVAL = 3600  # วินาที
 
-# 🔒 Shopee Order No = 14 chars ONLY
-ORDER_PATTERN = re.compile(
-    r"Shopee\s*Order\s*No\.?\s*([A-Z0-9]{14})",
-    re.I
-)
+# 🏭 ความเร็วสายพาน / encoder ที่ส่งมาทาง socket
+CONVEYOR_PATTERN = re.compile(r"^\s*(SPEED|ENCODER)\s*[=:]\s*(-?\d+(?:\.\d+)?)\s*$", re.I)
+
+# =============================
+# BUFFER POOL
+# =============================
+class JpegBufferPool:
+    """Output buffer สำหรับ JPEG ของกล้อง 1 ตัว (จองครั้งเดียวตอน init แล้ว reuse)"""
+    def __init__(self, buf_size, count=JPEG_BUFFERS_PER_CAMERA):
+        self.buf_size = buf_size
+        self.count = count
+        self._free = queue.Queue()
+        for _ in range(count):
+            self._free.put((c_ubyte * buf_size)())
+    
+    def acquire(self):
+        return self._free.get()
+    
+    def release(self, buf):
+        self._free.put(buf)
+    
+    def nbytes(self):
+        return self.buf_size * self.count
 
 # =============================
 # CAMERA MANAGER
 # =============================
 class HikCameraManager:
-    def __init__(self, log_callback=None):
+    def __init__(self, log_callback=None, trigger_mode=HIKROBOT_TRIGGER_MODE, catalog=None, layout=None, previews=None):
         self.cameras = []
+        self.workers = []  # 1 worker thread ต่อกล้อง (SDK handle ใช้ทีละ thread)
+        self.cam_locks = []  # ล็อกต่อกล้องช่วง trigger -> grab (capture_all กับ retake ไม่แย่งเฟรมกัน)
+        self.action_cams = set()  # index ของกล้องที่ตั้งค่า Action Command สำเร็จ
+        self.jpeg_pools = []  # JpegBufferPool ต่อกล้อง
+        self.frames = []  # MV_FRAME_OUT ต่อกล้อง (reuse)
+        self.save_params = []  # MV_SAVE_IMAGE_PARAM_EX ต่อกล้อง (reuse)
+        self.encoders = []  # ImageEncoder ต่อกล้อง (EVIDENCE_ENCODER / EVIDENCE_ENCODER_PER_CAMERA)
+        self.writer = EvidenceWriter(log_callback=log_callback)
+        self.catalog = catalog  # EvidenceCatalog: บันทึกภาพที่เขียนเสร็จ (ถ้ามี)
+        # order -> folder (flat / date / hash)
+        self.layout = layout or EvidenceLayout(OUTPUT_DIR, EVIDENCE_LAYOUT, EVIDENCE_HASH_CHARS, catalog=catalog)
+        self.previews = previews  # PreviewService: thumbnail จากภาพที่ encode แล้ว (GUI ไม่ต้องอ่านไฟล์ซ้ำ)
+        self.trigger_mode = trigger_mode
         self.log_callback = log_callback
     
     def log(self, msg):
@@ -94,90 +154,387 @@ class HikCameraManager:
             cam.MV_CC_SetEnumValue("TriggerSource", 7)
             cam.MV_CC_SetBoolValue("AcquisitionFrameRateEnable", False)
             
+            if self.trigger_mode == "action" and st_dev.nTLayerType == MV_GIGE_DEVICE:
+                if self._configure_action_trigger(cam):
+                    self.action_cams.add(len(self.cameras))
+                else:
+                    self.log(f"⚠️ Camera {len(self.cameras) + 1}: Action Command not supported - use Software Trigger")
+            
             cam.MV_CC_StartGrabbing()
+            self._alloc_buffers(cam)
             self.cameras.append(cam)
         
+        self.workers = [
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"cam{i + 1}")
+            for i in range(len(self.cameras))
+        ]
+        self.cam_locks = [threading.Lock() for _ in self.cameras]
+        
         self.log(f"✅ Cameras ready: {len(self.cameras)}")
+        if self.action_cams:
+            self.log(f"⚡ Action Command trigger: {len(self.action_cams)} camera(s)")
         return True
     
-    def capture_all(self, order_no):
-        """ถ่ายรูปทุกกล้อง และ return list ของ image paths"""
-        folder = os.path.join(OUTPUT_DIR, order_no)
-        os.makedirs(folder, exist_ok=True)
+    def _alloc_buffers(self, cam):
+        """เลือก encoder + จอง JPEG buffer + struct ของกล้องครั้งเดียว (ขนาดจาก Width/Height หรือ PayloadSize)"""
+        cam_no = len(self.cameras) + 1
+        name = EVIDENCE_ENCODER_PER_CAMERA.get(cam_no, EVIDENCE_ENCODER)
+        encoder = create_encoder(name, EVIDENCE_QUALITY)
+        if encoder.name != name:
+            self.log(f"⚠️ Camera {cam_no}: encoder '{name}' not available - use '{encoder.name}'")
+        self.log(f"🗜️ Camera {cam_no}: encoder {encoder.name}")
+        self.encoders.append(encoder)
         
-        image_paths = []
+        width, height, payload = MVCC_INTVALUE(), MVCC_INTVALUE(), MVCC_INTVALUE()
+        if encoder.host:
+            buf_size = 0  # encode บน host ไม่ใช้ output buffer ของ SDK
+        elif (cam.MV_CC_GetIntValue("Width", width) == 0
+                and cam.MV_CC_GetIntValue("Height", height) == 0):
+            buf_size = width.nCurValue * height.nCurValue * 4 + 2048
+        elif cam.MV_CC_GetIntValue("PayloadSize", payload) == 0:
+            buf_size = payload.nCurValue * 4 + 2048
+        else:
+            buf_size = 0  # ไม่รู้ขนาด -> จองตอนได้เฟรมแรก
+        
+        pool = JpegBufferPool(buf_size) if buf_size > 0 else None
+        
+        param = MV_SAVE_IMAGE_PARAM_EX()
+        memset(byref(param), 0, sizeof(param))
+        param.enImageType = MV_Image_Jpeg
+        param.nJpgQuality = encoder.quality
+        
+        self.jpeg_pools.append(pool)
+        self.frames.append(MV_FRAME_OUT())
+        self.save_params.append(param)
+        
+        if pool:
+            self.log(f"🧠 Camera {cam_no}: JPEG buffer {pool.nbytes() / 1e6:.1f} MB")
+    
+    def memory_report(self):
+        """หน่วยความจำที่จองไว้ต่อกล้อง: list ของ {"cam", "jpeg_bytes", "buffers"}"""
+        return [
+            {"cam": idx + 1, "jpeg_bytes": pool.nbytes() if pool else 0, "buffers": pool.count if pool else 0}
+            for idx, pool in enumerate(self.jpeg_pools)
+        ]
+    
+    def _configure_action_trigger(self, cam):
+        """ตั้งกล้อง GigE ให้รับ trigger จาก Action Command (Action1)"""
+        ret = cam.MV_CC_SetEnumValueByString("TriggerSource", "Action1")
+        if ret != 0:
+            cam.MV_CC_SetEnumValue("TriggerSource", 7)
+            return False
+        cam.MV_CC_SetIntValue("ActionDeviceKey", ACTION_DEVICE_KEY)
+        cam.MV_CC_SetIntValue("ActionGroupKey", ACTION_GROUP_KEY)
+        cam.MV_CC_SetIntValue("ActionGroupMask", ACTION_GROUP_MASK)
+        return True
+    
+    def _issue_action_command(self):
+        """ส่ง Action Command ครั้งเดียว (broadcast) ให้ทุกกล้องใน group ถ่ายพร้อมกัน"""
+        info = MV_ACTION_CMD_INFO()
+        memset(byref(info), 0, sizeof(info))
+        info.nDeviceKey = ACTION_DEVICE_KEY
+        info.nGroupKey = ACTION_GROUP_KEY
+        info.nGroupMask = ACTION_GROUP_MASK
+        info.pBroadcastAddress = ACTION_BROADCAST_ADDRESS.encode("ascii")
+        info.nTimeOut = ACTION_ACK_TIMEOUT_MS
+        
+        n = len(self.action_cams)
+        results = MV_ACTION_CMD_RESULT_LIST()
+        result_buf = (MV_ACTION_CMD_RESULT * n)()
+        results.nNumResults = n
+        results.pResults = cast(result_buf, POINTER(MV_ACTION_CMD_RESULT))
+        
+        ret = MvCamera.MV_GIGE_IssueActionCommand(info, results)
+        if ret != 0:
+            self.log(f"❌ Action Command failed: 0x{ret:08X}")
+            return False
+        
+        if ACTION_ACK_TIMEOUT_MS > 0:
+            for i in range(min(results.nNumResults, n)):
+                if result_buf[i].nStatus != 0:
+                    addr = bytes(result_buf[i].strDeviceAddress).split(b"\0")[0].decode()
+                    self.log(f"⚠️ Action ACK {addr}: status 0x{result_buf[i].nStatus & 0xFFFF:04X}")
+            if results.nNumResults < n:
+                self.log(f"⚠️ Action ACK: {results.nNumResults}/{n} camera(s)")
+        return True
+    
+    def _fire_triggers(self):
+        """Trigger ทุกกล้อง return list เวลา trigger (perf_counter) ตาม index กล้อง
+        
+        กล้องที่ตั้ง Action Command ไว้ -> ส่ง broadcast ครั้งเดียว
+        กล้องที่เหลือ (USB / ไม่รองรับ) หรือ action ล้มเหลว -> TriggerSoftware ทีละตัว
+        """
+        trigger_times = [None] * len(self.cameras)
+        
+        if self.action_cams and self._issue_action_command():
+            t = time.perf_counter()
+            for idx in self.action_cams:
+                trigger_times[idx] = t
         
         for idx, cam in enumerate(self.cameras):
-            cam.MV_CC_SetCommandValue("TriggerSoftware")
-            image_path = self._grab_and_save(cam, folder, idx + 1, order_no)
-            if image_path:
-                image_paths.append(image_path)
+            if trigger_times[idx] is not None:
+                continue
+            if idx in self.action_cams:
+                # Action ล้มเหลว -> สลับเป็น software ชั่วคราวสำหรับ order นี้
+                cam.MV_CC_SetEnumValue("TriggerSource", 7)
+                cam.MV_CC_SetCommandValue("TriggerSoftware")
+                cam.MV_CC_SetEnumValueByString("TriggerSource", "Action1")
+            else:
+                cam.MV_CC_SetCommandValue("TriggerSoftware")
+            trigger_times[idx] = time.perf_counter()
         
-        return image_paths
+        return trigger_times
+    
+    def capture_all(self, order_no, retake=False):
+        """ถ่ายรูปทุกกล้องพร้อมกัน
+        
+        Trigger ทุกกล้องติดกันก่อน แล้วค่อย grab/encode แบบขนาน (worker ละกล้อง)
+        รอจนครบทุกกล้อง (barrier) แล้วส่ง JPEG ให้ EvidenceWriter เขียนไฟล์ใน background
+        return dict:
+            {"order_no", "paths", "futures", "timings", "total_ms"}
+        paths   = path ที่กำลังจะถูกเขียน (ไฟล์อาจยังไม่เสร็จ)
+        futures = Future ต่อภาพ ได้ path เมื่อเขียนเสร็จ (None = ล้มเหลว)
+        timings = list ต่อกล้อง {"cam", "ok", "trigger_ms", "grab_ms", "encode_ms", "encoder", "total_ms"}
+        """
+        t_start = time.perf_counter()
+        captured_at = time.time()
+        folder = self.layout.folder_for(order_no, captured_at)
+        
+        # แต่ละ job ล็อกกล้องของตัวเองใน worker ของกล้องนั้น (retake ที่เข้าคิวก่อนจะเสร็จก่อน)
+        # แล้วรอที่ barrier จนทุกกล้องพร้อม -> trigger ครั้งเดียว -> grab ขนานกัน
+        # (ไม่ถือ cam_locks ระหว่างรอ worker ไม่งั้น retake ที่อยู่ในคิวจะ deadlock)
+        n = len(self.cameras)
+        armed = threading.Barrier(n + 1)
+        fired = threading.Event()
+        trigger_times = [None] * n
+        
+        # 1) Grab + Encode ขนานกัน (job รอ trigger ก่อน grab)
+        futures = [
+            self.workers[idx].submit(
+                self._capture_worker, cam, folder, idx + 1, order_no, armed, fired, trigger_times
+            )
+            for idx, cam in enumerate(self.cameras)
+        ]
+        try:
+            # 2) Trigger ทุกกล้องให้ใกล้กันที่สุด (Action Command หรือ Software)
+            armed.wait()
+            trigger_times[:] = self._fire_triggers()
+        except threading.BrokenBarrierError:
+            self.log(f"❌ Capture {order_no}: cameras not ready")
+        finally:
+            fired.set()
+        wait(futures)
+        
+        image_paths = []
+        write_futures = []
+        timings = []
+        for idx, fut in enumerate(futures):
+            try:
+                write_future, timing = fut.result()
+            except Exception as e:
+                self.log(f"❌ Camera {idx + 1} capture error: {e}")
+                write_future, timing = None, {"cam": idx + 1, "ok": False}
+            if trigger_times[idx] is not None:
+                timing["trigger_ms"] = round((trigger_times[idx] - t_start) * 1000, 1)
+            timings.append(timing)
+            if write_future:
+                image_paths.append(write_future.image_path)
+                write_futures.append(write_future)
+                self._catalog_when_saved(write_future, order_no, idx + 1, captured_at, timing, retake)
+        
+        total_ms = round((time.perf_counter() - t_start) * 1000, 1)
+        stats = self.writer.stats()
+        self.log(
+            f"⏱️ Capture {order_no}: {total_ms} ms | "
+            + " | ".join(
+                f"cam{t['cam']} {t.get('total_ms', '-')} ms ({t.get('encoder', '-')} {t.get('encode_ms', '-')} ms)"
+                for t in timings
+            )
+            + f" | writer queue {stats['depth']}/{stats['capacity']}"
+        )
+        
+        return {
+            "order_no": order_no,
+            "paths": image_paths,
+            "futures": write_futures,
+            "timings": timings,
+            "total_ms": total_ms,
+        }
+    
+    def _capture_worker(self, cam, folder, cam_idx, order_no, armed, fired, trigger_times):
+        """รันใน worker ของกล้อง: ล็อกกล้อง -> รอ trigger -> grab + encode แล้วจับเวลา (นับจากตอน trigger)"""
+        timing = {"cam": cam_idx}
+        with self.cam_locks[cam_idx - 1]:
+            try:
+                armed.wait()
+            except threading.BrokenBarrierError:
+                pass
+            fired.wait()
+            t_trigger = trigger_times[cam_idx - 1]
+            if t_trigger is None:
+                timing["ok"] = False
+                return None, timing
+            write_future = self._grab_and_save(cam, folder, cam_idx, order_no, timing)
+        timing["ok"] = write_future is not None
+        timing["total_ms"] = round((time.perf_counter() - t_trigger) * 1000, 1)
+        return write_future, timing
     
     def capture_single(self, order_no, camera_index):
-        """ถ่ายรูปกล้องเดียว (สำหรับ retake)"""
+        """ถ่ายรูปกล้องเดียว (สำหรับ retake) ใน worker ของกล้องนั้น - ไม่บล็อกผู้เรียก
+        
+        กล้องต่างตัวกัน retake พร้อมกันได้ (worker ละกล้อง)
+        return Future ที่ได้ Future ของการเขียนไฟล์ (หรือ None ถ้าถ่ายไม่สำเร็จ) / None ถ้า index ผิด
+        """
         if camera_index >= len(self.cameras):
             self.log(f"⚠️ Camera index {camera_index} out of range")
             return None
-        
-        folder = os.path.join(OUTPUT_DIR, order_no)
-        os.makedirs(folder, exist_ok=True)
+        # ใช้ worker ของกล้องนั้น เพื่อไม่ให้ชนกับ capture_all ที่อาจกำลังใช้ handle เดียวกัน
+        return self.workers[camera_index].submit(self._retake_worker, order_no, camera_index)
+    
+    def _retake_worker(self, order_no, camera_index):
+        """รันใน worker ของกล้อง: software trigger -> grab -> encode"""
+        captured_at = time.time()
+        folder = self.layout.folder_for(order_no, captured_at)
         
         cam = self.cameras[camera_index]
-        cam.MV_CC_SetCommandValue("TriggerSoftware")
-        image_path = self._grab_and_save(cam, folder, camera_index + 1, order_no)
+        timing = {}
+        with self.cam_locks[camera_index]:
+            if camera_index in self.action_cams:
+                # Retake กล้องเดียว: ไม่ broadcast action (จะโดนทุกกล้อง) ใช้ software แทน
+                cam.MV_CC_SetEnumValue("TriggerSource", 7)
+                cam.MV_CC_SetCommandValue("TriggerSoftware")
+                cam.MV_CC_SetEnumValueByString("TriggerSource", "Action1")
+            else:
+                cam.MV_CC_SetCommandValue("TriggerSoftware")
+            write_future = self._grab_and_save(cam, folder, camera_index + 1, order_no, timing)
         
-        return image_path
+        if write_future:
+            self._catalog_when_saved(write_future, order_no, camera_index + 1, captured_at, timing, retake=True)
+        return write_future
     
-    def _grab_and_save(self, cam, folder, cam_idx, order_no):
-        """Capture และ save ภาพ (รองรับ replace)"""
-        frame = MV_FRAME_OUT()
-        memset(byref(frame), 0, sizeof(frame))
+    def _catalog_when_saved(self, write_future, order_no, cam_idx, captured_at, timing, retake=False):
+        """บันทึกลง catalog หลังไฟล์เขียนเสร็จ (writer thread -> catalog queue ไม่บล็อก)"""
+        if self.catalog is None:
+            return
+        size = write_future.size
+        
+        def _done(future):
+            image_path = future.result()
+            if not image_path:
+                return
+            self.catalog.record_image(
+                order_no, cam_idx, image_path,
+                size=size,
+                captured_at=captured_at,
+                saved_at=time.time(),
+                capture_ms=timing.get("total_ms"),
+                grab_ms=timing.get("grab_ms"),
+                encode_ms=timing.get("encode_ms"),
+                retake=retake,
+            )
+        
+        write_future.add_done_callback(_done)
+    
+    def _grab_and_save(self, cam, folder, cam_idx, order_no, timing=None):
+        """Capture + encode (ตาม encoder ของกล้อง) แล้วส่งให้ writer (รองรับ replace)
+        
+        return Future ของการเขียนไฟล์ (มี attribute image_path) หรือ None ถ้าถ่ายไม่สำเร็จ
+        buffer ของ pool จะถูกคืนหลัง writer เขียนเสร็จ
+        """
+        if timing is None:
+            timing = {}
+        idx = cam_idx - 1
+        t0 = time.perf_counter()
+        frame = self.frames[idx]
         
         ret = cam.MV_CC_GetImageBuffer(frame, TRIGGER_TIMEOUT_MS)
+        timing["grab_ms"] = round((time.perf_counter() - t0) * 1000, 1)
         if ret != 0:
             return None
         
+        t0 = time.perf_counter()
+        encoder = self.encoders[idx]
+        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+        image_path = os.path.join(folder, f"cam{cam_idx}_{ts}{encoder.ext}")
+        if encoder.host:
+            write_future = self._encode_on_host(cam, frame, idx, image_path)
+        else:
+            write_future = self._encode_on_sdk(cam, frame, idx, image_path)
+        timing["encode_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        timing["encoder"] = encoder.name
+        return write_future
+    
+    def _encode_on_sdk(self, cam, frame, idx, image_path):
+        """JPEG จาก MV_CC_SaveImageEx2 ลง buffer ของ pool (ไม่ copy) แล้วส่งให้ writer"""
         buf_size = frame.stFrameInfo.nWidth * frame.stFrameInfo.nHeight * 4 + 2048
-        param = MV_SAVE_IMAGE_PARAM_EX()
-        memset(byref(param), 0, sizeof(param))
+        pool = self.jpeg_pools[idx]
+        if pool is None or buf_size > pool.buf_size:
+            # ขนาดภาพเปลี่ยน (เช่นปรับ ROI) -> จอง pool ใหม่ครั้งเดียว
+            self.log(f"🧠 Camera {idx + 1}: allocate JPEG buffer {buf_size / 1e6:.1f} MB")
+            pool = self.jpeg_pools[idx] = JpegBufferPool(buf_size)
         
-        param.enImageType = MV_Image_Jpeg
-        param.nJpgQuality = 90
-        param.nWidth = frame.stFrameInfo.nWidth
-        param.nHeight = frame.stFrameInfo.nHeight
-        param.enPixelType = frame.stFrameInfo.enPixelType
-        param.pData = frame.pBufAddr
-        param.nDataLen = frame.stFrameInfo.nFrameLen
-        param.nBufferSize = buf_size
-        param.pImageBuffer = (c_ubyte * buf_size)()
-        
-        image_path = None
-        
-        if cam.MV_CC_SaveImageEx2(param) == 0:
-            # ลบไฟล์เก่าของกล้องนี้ก่อน (ถ้ามี)
-            for old_file in os.listdir(folder):
-                if old_file.startswith(f"cam{cam_idx}_") and old_file.endswith(".jpg"):
-                    old_path = os.path.join(folder, old_file)
-                    try:
-                        os.remove(old_path)
-                        self.log(f"🗑️ Removed old: {old_file}")
-                    except:
-                        pass
+        buf = pool.acquire()
+        write_future = None
+        try:
+            param = self.save_params[idx]
+            param.nWidth = frame.stFrameInfo.nWidth
+            param.nHeight = frame.stFrameInfo.nHeight
+            param.enPixelType = frame.stFrameInfo.enPixelType
+            param.pData = frame.pBufAddr
+            param.nDataLen = frame.stFrameInfo.nFrameLen
+            param.nBufferSize = pool.buf_size
+            param.pImageBuffer = buf
+            param.nImageLen = 0
             
-            # บันทึกไฟล์ใหม่
-            ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-            image_path = os.path.join(folder, f"cam{cam_idx}_{ts}.jpg")
-            with open(image_path, "wb") as f:
-                f.write(string_at(param.pImageBuffer, param.nImageLen))
-            self.log(f"📸 Saved {image_path}")
-        
-        cam.MV_CC_FreeImageBuffer(frame)
-        return image_path
+            if cam.MV_CC_SaveImageEx2(param) == 0:
+                # ส่งให้ writer เขียนจาก buffer ตรงๆ (ไม่ copy) แล้วค่อยคืน buffer
+                write_future = self.writer.submit(
+                    image_path,
+                    data=memoryview(buf)[:param.nImageLen],
+                    release=lambda: pool.release(buf),
+                )
+                write_future.image_path = image_path
+                write_future.size = param.nImageLen
+                if self.previews is not None:
+                    # สำเนา JPEG (buffer ของ pool จะถูกนำกลับไปใช้หลังเขียนไฟล์)
+                    self.previews.offer_encoded(image_path, bytes(memoryview(buf)[:param.nImageLen]))
+        finally:
+            if write_future is None:
+                pool.release(buf)
+            cam.MV_CC_FreeImageBuffer(frame)
+        return write_future
+    
+    def _encode_on_host(self, cam, frame, idx, image_path):
+        """raw -> BGR (pixel_convert) คืน frame ให้ SDK ทันที แล้ว encode บน host (opencv / turbo / png / webp)"""
+        encoder = self.encoders[idx]
+        info = frame.stFrameInfo
+        try:
+            raw = np.ctypeslib.as_array(frame.pBufAddr, shape=(info.nFrameLen,))
+            image = pixel_convert.convert(raw, info.nWidth, info.nHeight, info.enPixelType, bgr=True)
+        finally:
+            cam.MV_CC_FreeImageBuffer(frame)
+        if image is None:
+            self.log(f"⚠️ Camera {idx + 1}: unsupported pixel format 0x{info.enPixelType:08X} - use encoder 'sdk'")
+            return None
+        try:
+            data = encoder.encode(image)
+        except Exception as e:
+            self.log(f"❌ Camera {idx + 1}: encode ({encoder.name}) failed: {e}")
+            return None
+        write_future = self.writer.submit(image_path, data=data)
+        write_future.image_path = image_path
+        write_future.size = len(data)
+        if self.previews is not None:
+            self.previews.offer_image(image_path, image)
+        return write_future
     
     def close_all(self):
         """ปิดกล้องทั้งหมด"""
+        for worker in self.workers:
+            worker.shutdown(wait=True)
+        self.workers = []
+        self.writer.close(wait=True)  # เขียนภาพที่ค้างใน queue ให้เสร็จก่อน
+        
         for cam in self.cameras:
             try:
                 cam.MV_CC_StopGrabbing()
@@ -195,134 +552,273 @@ class CameraServerThread(QThread):
     countdown_update = pyqtSignal(int)  # ส่ง countdown (3, 2, 1, 0)
     images_captured = pyqtSignal(list)  # ส่ง list ของ image paths
     image_retaken = pyqtSignal(str)  # ส่ง path ของภาพที่ถ่ายใหม่
+    retake_failed = pyqtSignal(int)  # camera index ที่ retake ไม่สำเร็จ (-1 = ทุกกล้อง)
+    memory_report = pyqtSignal(int, str)  # (camera index, สรุป buffer ของกล้อง)
     log_message = pyqtSignal(str)
     
     def __init__(self):
         super().__init__()
         self.running = True
         self.cam_mgr = None
-        self.current_order_no = None  # 🆕 เก็บ Order No ปัจจุบัน
+        self.current_order_no = None  # 🆕 Order No ที่ถ่ายล่าสุด (ใช้สำหรับ retake)
+        self.latest_order_no = None  # Order ล่าสุดที่รับเข้ามา (ใช้แสดง countdown)
+        self.pending_orders = set()  # Order ที่รอถ่าย/รอเขียนไฟล์ (กันรับซ้ำ)
+        self.pending_lock = threading.Lock()
+        self.scheduler = None
+        self.conveyor = None  # ConveyorScheduler: คำนวณเวลาถ่ายจากความเร็วสายพาน
+        self.capture_executor = None  # ถ่ายรูปทีละ order ตามลำดับ (FIFO)
+        self.extractor = OrderExtractor(ORDER_FORMATS)
+        self.order_index = None  # OrderIndex: order ที่ถ่ายแล้ว (แทนการ listdir ทุกบรรทัด)
+        self.catalog = EvidenceCatalog(CATALOG_PATH, log_callback=self.log)  # ใช้ร่วมกับ GUI (query)
+        self.layout = EvidenceLayout(OUTPUT_DIR, EVIDENCE_LAYOUT, EVIDENCE_HASH_CHARS, catalog=self.catalog)
+        self.previews = PreviewService(log_callback=self.log)  # thumbnail ของภาพที่ถ่าย (ใช้ร่วมกับ GUI)
     
     def log(self, msg):
         self.log_message.emit(msg)
     
-    def folder_has_images(self, path):
-        if not os.path.exists(path):
-            return False
-        return any(f.lower().endswith(".jpg") for f in os.listdir(path))
+    def _emit_memory_report(self):
+        for report in self.cam_mgr.memory_report():
+            text = f"🧠 JPEG {report['buffers']}×{report['jpeg_bytes'] / max(report['buffers'], 1) / 1e6:.1f} MB"
+            self.memory_report.emit(report["cam"] - 1, text)
     
     def run(self):
         # เริ่ม Camera Manager
-        self.cam_mgr = HikCameraManager(log_callback=self.log)
+        self.cam_mgr = HikCameraManager(
+            log_callback=self.log, catalog=self.catalog, layout=self.layout, previews=self.previews
+        )
         
         if not self.cam_mgr.init_cameras():
             self.log("❌ Cannot initialize cameras - Server will run but won't capture")
+        self._emit_memory_report()
         
-        # เริ่ม Socket Server
-        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        server.bind(("0.0.0.0", PORT))
-        server.listen(1)
+        self.order_index = OrderIndex(OUTPUT_DIR, layout=self.layout, catalog=self.catalog, log_callback=self.log).load()
+        if CATALOG_BACKFILL_ON_START:
+            threading.Thread(target=self._backfill_catalog, name="catalog-backfill", daemon=True).start()
         
-        self.log(f"📡 Camera Server Listening on port {PORT}")
+        self.scheduler = OrderScheduler(log_callback=self.log)
+        self.scheduler.call_later(INDEX_EXPIRE_INTERVAL, self._expire_index)
+        self.conveyor = ConveyorScheduler(
+            self.scheduler,
+            ConveyorTracker(BELT_SPEED_MM_S, ENCODER_MM_PER_PULSE),
+            on_due=self._capture_due,
+            distance_mm=OCR_TO_CAMERA_MM,
+            offset_s=CAPTURE_OFFSET_MS / 1000.0,
+            min_gap_s=MIN_CAPTURE_GAP_MS / 1000.0,
+            fallback_delay_s=CAPTURE_DELAY_SECONDS,
+        )
+        self.capture_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="capture")
         
-        while self.running:
-            server.settimeout(1.0)
-            try:
-                conn, addr = server.accept()
-            except socket.timeout:
-                continue
-            except:
-                break
-            
-            self.log(f"🟢 OCR connected: {addr[0]}")
-            
-            with conn:
-                while self.running:
-                    try:
-                        data = conn.recv(1024)
-                        if not data:
-                            break
-                        
-                        text = data.decode("utf-8", errors="ignore")
-                        for line in text.splitlines():
-                            match = ORDER_PATTERN.search(line)
-                            if not match:
-                                continue
-                            
-                            order_no = match.group(1).upper()
-                            
-                            # 🔒 Validation
-                            if order_no.isdigit():
-                                self.log(f"⚠️ Ignore (digit only): {order_no}")
-                                continue
-                            
-                            folder = os.path.join(OUTPUT_DIR, order_no)
-                            if self.folder_has_images(folder):
-                                self.log(f"⏭️ Skip (already captured): {order_no}")
-                                continue
-                            
-                            # 🔔 New Order Detected
-                            self.log(f"🔔 New Order: {order_no}")
-                            self.current_order_no = order_no  # 🆕 เก็บไว้สำหรับ retake
-                            self.order_received.emit(order_no)
-                            
-                            # ⏱️ Countdown 3 วินาที
-                            for i in range(CAPTURE_DELAY_SECONDS, 0, -1):
-                                self.countdown_update.emit(i)
-                                time.sleep(1)
-                            
-                            self.countdown_update.emit(0)
-                            
-                            # 📸 Capture!
-                            if self.cam_mgr and len(self.cam_mgr.cameras) > 0:
-                                image_paths = self.cam_mgr.capture_all(order_no)
-                                self.images_captured.emit(image_paths)
-                                self.log(f"✅ Captured {len(image_paths)} images")
-                            else:
-                                self.log("⚠️ No cameras available")
-                    except:
-                        break
-            
-            self.log("Disconnected")
+        # เริ่ม Socket Server (รับได้หลาย OCR station พร้อมกัน)
+        server = IngestServer("0.0.0.0", PORT, self.handle_line, log_callback=self.log, label="Camera Server")
+        try:
+            server.serve_forever(lambda: self.running)
+        except OSError as e:
+            self.log(f"❌ Server Error: {e}")
         
         # Cleanup
+        dropped = self.scheduler.stop()
+        if dropped:
+            self.log(f"⚠️ Dropped {dropped} scheduled event(s) on shutdown")
+        self.capture_executor.shutdown(wait=True)
         if self.cam_mgr:
             self.cam_mgr.close_all()
-        server.close()
+        self.order_index.close()
+        self.catalog.close()
+        self.previews.close()
+    
+    def _backfill_catalog(self):
+        """เพิ่ม order ที่อยู่ใน OUTPUT_DIR แต่ยังไม่มีใน catalog (ภาพก่อนมี catalog) ให้ Order History เห็น
+        
+        เดิน folder รอบเดียวกันเติม order ที่ไม่อยู่ในไฟล์ .order_index ด้วย (ไม่บล็อก ingest server)
+        """
+        t0 = time.perf_counter()
+        try:
+            orders, images = self.catalog.backfill(self.layout, on_order=self.order_index.add_existing)
+        except Exception as e:
+            self.log(f"❌ Catalog backfill failed: {e}")
+            return
+        if orders:
+            self.log(f"🗃️ Catalog backfill: {orders} order(s), {images} image(s) ({time.perf_counter() - t0:.1f}s)")
+    
+    def handle_line(self, line, addr=None):
+        """1 บรรทัดจาก OCR client ใดก็ได้ (เรียกใน server thread ตามลำดับที่มาถึง)"""
+        if self.handle_conveyor_line(line):
+            return
+        
+        for match in self.extractor.extract_all(line):
+            # 🔒 Validation
+            if not match.valid:
+                self.log(f"⚠️ Ignore (invalid {match.carrier}): {match.order_no}")
+                continue
+            self.handle_order(match.order_no)
+    
+    def handle_order(self, order_no):
+        with self.pending_lock:
+            if order_no in self.pending_orders:
+                self.log(f"⏭️ Skip (already scheduled): {order_no}")
+                return
+        
+        if self.order_index.contains(order_no):
+            self.log(f"⏭️ Skip (already captured): {order_no}")
+            return
+        
+        # 🔔 New Order Detected -> ตั้งเวลาถ่าย แล้วกลับไปอ่าน socket ต่อทันที
+        self.schedule_order(order_no, time.monotonic())
+    
+    def handle_conveyor_line(self, line):
+        """SPEED=<mm/s> / ENCODER=<pulse> -> อัปเดตความเร็วสายพาน (return True ถ้าเป็นบรรทัดนี้)"""
+        match = CONVEYOR_PATTERN.match(line)
+        if not match:
+            return False
+        kind, value = match.group(1).upper(), float(match.group(2))
+        if kind == "SPEED":
+            self.conveyor.set_speed(value)
+            self.log(f"🏭 Belt speed: {value:.0f} mm/s")
+        else:
+            self.conveyor.update_encoder(value)
+        return True
+    
+    def schedule_order(self, order_no, t_accept):
+        """ตั้งเวลาถ่ายตามระยะทางบนสายพาน (FIFO) + countdown"""
+        with self.pending_lock:
+            self.pending_orders.add(order_no)
+        
+        due = self.conveyor.add(order_no, t_accept)
+        delay = f"{due - t_accept:.2f}s" if due is not None else "belt stopped"
+        self.log(f"🔔 New Order: {order_no} (capture in {delay}, in flight: {len(self.pending_orders)})")
+        self.latest_order_no = order_no
+        self.order_received.emit(order_no)
+        
+        # ⏱️ Countdown (แสดงเฉพาะ order ล่าสุด)
+        self._countdown_tick(order_no)
+    
+    def _countdown_tick(self, order_no):
+        """แสดงวินาทีที่เหลือ แล้วตั้ง tick ถัดไป (อ่าน due ใหม่ทุกครั้ง เผื่อความเร็วเปลี่ยน)"""
+        if order_no != self.latest_order_no:
+            return
+        due = self.conveyor.due_time(order_no)
+        now = time.monotonic()
+        if due is None:
+            if order_no in self.pending_orders:
+                # สายพานหยุด -> เช็คใหม่ทุก 1 วินาที
+                self.scheduler.call_at(now + 1.0, self._countdown_tick, order_no)
+            return
+        remaining = math.ceil(due - now - 0.001)
+        if remaining <= 0:
+            return
+        self.countdown_update.emit(remaining)
+        self.scheduler.call_at(due - (remaining - 1), self._countdown_tick, order_no)
+    
+    def _capture_due(self, order_no):
+        """ถึงเวลาถ่าย (scheduler thread) -> ส่งเข้าคิว capture ไม่ให้ timer ช้าตาม"""
+        self.capture_executor.submit(self._capture_order, order_no)
+    
+    def _capture_order(self, order_no):
+        if order_no == self.latest_order_no:
+            self.countdown_update.emit(0)
+        
+        # 📸 Capture! (เขียนไฟล์ต่อใน background แล้วค่อยแจ้ง GUI)
+        if not self.cam_mgr or len(self.cam_mgr.cameras) == 0:
+            self.log("⚠️ No cameras available")
+            self._release_order(order_no)
+            return
+        
+        self.current_order_no = order_no  # 🆕 เก็บไว้สำหรับ retake
+        try:
+            result = self.cam_mgr.capture_all(order_no)
+        except Exception as e:
+            self.log(f"❌ Capture error {order_no}: {e}")
+            self._release_order(order_no)
+            return
+        
+        def _saved(image_paths):
+            # บันทึกลง index ก่อนปล่อย pending (ไม่มีช่วงที่ order ซ้ำหลุดเข้ามาได้)
+            if image_paths:
+                self.order_index.add(order_no)
+            self._release_order(order_no)
+            self._on_images_saved(image_paths)
+        
+        when_all_saved(result["futures"], _saved)
+    
+    def _expire_index(self):
+        """ลบ order เก่ากว่า TTL ออกจาก memory เป็นระยะ (scheduler thread)"""
+        expired = self.order_index.expire()
+        if expired:
+            self.log(f"🗂️ Order index: expired {expired} old order(s) from memory")
+        self.scheduler.call_later(INDEX_EXPIRE_INTERVAL, self._expire_index)
+    
+    def _release_order(self, order_no):
+        with self.pending_lock:
+            self.pending_orders.discard(order_no)
     
     def stop(self):
         self.running = False
         self.wait()
     
-    def retake_camera(self, camera_index):
-        """ถ่ายรูปใหม่แค่กล้องเดียว"""
+    def _on_images_saved(self, image_paths):
+        """เรียกจาก writer thread เมื่อเขียนภาพของ order ครบแล้ว"""
+        self.images_captured.emit(image_paths)
+        self.log(f"✅ Captured {len(image_paths)} images")
+    
+    def _can_retake(self):
         if not self.current_order_no:
             self.log("⚠️ No current order")
-            return
+            return False
         
-        if not self.cam_mgr or len(self.cam_mgr.cameras) == 0:
+        if not self.cam_mgr or len(self.cam_mgr.cameras) == 0 or self.capture_executor is None:
             self.log("⚠️ No cameras available")
+            return False
+        return True
+    
+    def _on_single_captured(self, future, camera_index):
+        """worker ของกล้องถ่ายเสร็จ -> รอ writer เขียนไฟล์ (ไม่บล็อก thread ไหน)"""
+        try:
+            write_future = future.result()
+        except Exception as e:
+            self.log(f"❌ Retake camera {camera_index + 1} error: {e}")
+            write_future = None
+        if write_future is None:
+            self.log(f"❌ Retake camera {camera_index + 1} failed")
+            self.retake_failed.emit(camera_index)
             return
-        
-        self.log(f"🔄 Retaking camera {camera_index + 1}...")
-        image_path = self.cam_mgr.capture_single(self.current_order_no, camera_index)
-        
+        write_future.add_done_callback(lambda f: self._on_image_retaken(f, camera_index))
+    
+    def _on_image_retaken(self, future, camera_index):
+        image_path = future.result()
         if image_path:
             self.image_retaken.emit(image_path)
             self.log(f"✅ Retaken: {image_path}")
+        else:
+            self.retake_failed.emit(camera_index)
     
-    def retake_all(self):
-        """ถ่ายรูปใหม่ทั้งหมด"""
-        if not self.current_order_no:
-            self.log("⚠️ No current order")
+    def retake_camera(self, camera_index):
+        """ถ่ายรูปใหม่แค่กล้องเดียว (เรียกจาก GUI ได้ทันที: ถ่ายใน worker ของกล้อง ผลกลับทาง signal)"""
+        if not self._can_retake():
+            self.retake_failed.emit(camera_index)
             return
         
-        if not self.cam_mgr or len(self.cam_mgr.cameras) == 0:
-            self.log("⚠️ No cameras available")
+        self.log(f"🔄 Retaking camera {camera_index + 1}...")
+        future = self.cam_mgr.capture_single(self.current_order_no, camera_index)
+        if future is None:
+            self.retake_failed.emit(camera_index)
+            return
+        future.add_done_callback(lambda f: self._on_single_captured(f, camera_index))
+    
+    def retake_all(self):
+        """ถ่ายรูปใหม่ทั้งหมด (เข้าคิว capture เดียวกับ order ปกติ ผลกลับทาง images_captured)"""
+        if not self._can_retake():
+            self.retake_failed.emit(-1)
             return
         
         self.log(f"🔄 Retaking all cameras...")
-        image_paths = self.cam_mgr.capture_all(self.current_order_no)
-        self.images_captured.emit(image_paths)
-        self.log(f"✅ Retaken all: {len(image_paths)} images")
\ No newline at end of file
+        self.capture_executor.submit(self._retake_all_job, self.current_order_no)
+    
+    def _retake_all_job(self, order_no):
+        """รันใน capture executor (ไม่ชนกับ order ที่กำลังถ่าย)"""
+        try:
+            result = self.cam_mgr.capture_all(order_no, retake=True)
+        except Exception as e:
+            self.log(f"❌ Retake error {order_no}: {e}")
+            self.retake_failed.emit(-1)
+            return
+        when_all_saved(result["futures"], self._on_images_saved)
\ No newline at end of file
@@ -27,12 +27,74 @@ HIKROBOT_IPS = [
 # ================= SIMULATION MODE =================
 # ปิด simulation ทั้งหมด - ใช้กล้องจริง
 USE_SIMULATION = False  # ใช้กล้องจริงทั้งหมด
-HIKROBOT_USE_SIMULATION = False
+HIKROBOT_USE_SIMULATION = False  # True = ใช้กล้องจำลอง (fake_camera.py) แทน SDK
+
+# ================= TRIGGER CONFIG =================
+# "software" = สั่ง TriggerSoftware ทีละกล้อง
+# "action"   = GigE Action Command (broadcast ครั้งเดียว ทุกกล้องถ่ายพร้อมกัน)
+HIKROBOT_TRIGGER_MODE = "software"
+ACTION_DEVICE_KEY = 0x00000001
+ACTION_GROUP_KEY = 0x00000001
+ACTION_GROUP_MASK = 0xFFFFFFFF
+ACTION_BROADCAST_ADDRESS = "255.255.255.255"
+ACTION_ACK_TIMEOUT_MS = 100  # 0 = ไม่รอ ACK
+
+# ================= LIVE VIEW CONFIG =================
+# "callback" = SDK เรียก callback เมื่อได้ภาพ (ใช้ buffer ring ของ driver, ไม่ค้างภาพเก่า)
+# "poll"     = วน MV_CC_GetOneFrameTimeout แบบเดิม
+LIVE_ACQUISITION_MODE = "callback"
+LIVE_IMAGE_NODES = 3          # จำนวน buffer node ของ SDK ต่อกล้อง
+LIVE_LATE_MS = 200            # ภาพที่ถึง GUI ช้ากว่านี้ (นับจากได้จากกล้อง) = late
+LIVE_STATS_INTERVAL_S = 30    # log สถิติ live view ทุกกี่วินาที (0 = ไม่ log)
+PREVIEW_FPS = 15              # fps สูงสุดที่ส่งไปแสดงต่อกล้อง (0 = ไม่จำกัด) เฟรมที่เกินไม่ถูกแปลงสี
+LIVE_DOWNSCALE = True         # ย่อภาพใน camera thread ให้พอดีขนาดจอแสดงผล (GUI ไม่ต้อง scale เอง)
+LIVE_SCALE_INTERPOLATION = "area"  # "area" (คมกว่า) / "linear" / "nearest" (เร็วสุด)
+LIVE_HALF_DEMOSAIC = True     # จอเล็กกว่าครึ่งภาพ: แปลงภาพกล้องแบบครึ่งขนาด (Bayer 2x2 -> 1 pixel) เร็วกว่า demosaic เต็ม
+
+# ================= PREVIEW CONFIG (ภาพที่ถ่ายแล้ว) =================
+PREVIEW_SIZE = (640, 480)     # กรอบ thumbnail ที่ใช้แสดงใน CameraCard (decode ลดขนาดให้ใกล้เคียงนี้)
+PREVIEW_WORKERS = 2           # thread ที่ decode / ย่อ thumbnail
+PREVIEW_CACHE_SIZE = 64       # จำนวน thumbnail ใน LRU cache
+
+# ================= ORDER HISTORY CONFIG =================
+THUMB_SIZE = (160, 120)       # ขนาด thumbnail ใน grid ของ Order History
+THUMB_CACHE_SIZE = 600        # thumbnail ใน memory (ประมาณ 10 หน้าจอ)
+THUMB_CACHE_DAYS = 30         # ลบ thumbnail บน disk ที่ไม่ได้เปิดเกินกี่วัน
+HISTORY_PAGE_SIZE = 200       # จำนวน order ที่ query จาก catalog ต่อครั้ง
+
+# ================= ORDER FORMAT CONFIG =================
+# รูปแบบเลขที่รับ (ดู order_extractor.FORMATS): "shopee", "spx", "lazada", "lex"
+ORDER_FORMATS = ["shopee"]
+
+# ================= CONVEYOR CONFIG =================
+# เวลาถ่าย = ระยะ OCR -> กล้อง / ความเร็วสายพาน (500 mm/s, 1500 mm = 3 วินาที)
+# ความเร็วอัปเดตได้ทาง socket เดียวกับ OCR: "SPEED=520" (mm/s) หรือ "ENCODER=123456" (pulse สะสม)
+BELT_SPEED_MM_S = 500.0     # None = ไม่ใช้ (ใช้ delay คงที่แบบเดิม)
+OCR_TO_CAMERA_MM = 1500.0   # ระยะจากจุดอ่าน OCR ถึงจุดถ่ายรูป
+ENCODER_MM_PER_PULSE = 0.1  # ระยะต่อ 1 pulse ของ encoder
+CAPTURE_OFFSET_MS = 0       # ชดเชย latency trigger/exposure (ถ่ายเร็วขึ้นเท่านี้)
+MIN_CAPTURE_GAP_MS = 150    # ระยะห่างขั้นต่ำระหว่าง capture ของ order ติดกัน
 
 # ================= PATH CONFIG =================
 OUTPUT_DIR = "./evidence_images"
 if not os.path.exists(OUTPUT_DIR):
     os.makedirs(OUTPUT_DIR)
+CATALOG_PATH = os.path.join(OUTPUT_DIR, "evidence.db")  # SQLite catalog ของภาพหลักฐานทั้งหมด
+CATALOG_BACKFILL_ON_START = True  # เดิน OUTPUT_DIR ใน background ตอนเปิดโปรแกรม: เพิ่ม order ที่ยังไม่มีใน catalog / .order_index
+THUMB_CACHE_DIR = os.path.join(OUTPUT_DIR, ".thumbs")  # thumbnail ของ Order History (folder ขึ้นต้นด้วย . ไม่ถูกนับเป็น order)
+# โครงสร้าง folder ของ order ใหม่: "flat" (แบบเดิม), "date" (YYYY/MM/DD/ORDER),
+# "hash" (hh/ORDER), "date_hash" (YYYY/MM/DD/hh/ORDER) - order เก่าแบบ flat ยังหาเจอเสมอ
+# ค่าเริ่มต้น flat (OUTPUT_DIR/<ORDER>/ เหมือนเดิม ไม่กระทบ backup / script) - เปิด shard เองเมื่อพร้อม
+# ย้ายของเดิมเข้า layout ใหม่: python migrate_evidence.py --layout date_hash
+EVIDENCE_LAYOUT = "flat"
+EVIDENCE_HASH_CHARS = 2  # 2 = 256 bucket
+
+# ================= EVIDENCE ENCODER CONFIG =================
+# "sdk" (JPEG จาก MV_CC_SaveImageEx2), "opencv" (cv2 JPEG), "turbo" (libjpeg-turbo ถ้าติดตั้ง),
+# "png" (lossless), "webp" - เทียบเวลา/ขนาด: python benchmarks/bench_encoders.py
+EVIDENCE_ENCODER = "sdk"
+EVIDENCE_ENCODER_PER_CAMERA = {}  # เลือกต่อกล้อง (เลขกล้องเริ่มที่ 1) เช่น {2: "turbo"}
+EVIDENCE_QUALITY = 90  # คุณภาพ JPEG / WebP
 
 # ================= UI THEME (Modern Dark) =================
 COLORS = {
@@ -0,0 +1,352 @@
+# -*- coding: utf-8 -*-
+"""
+Evidence Catalog - บันทึกทุกภาพหลักฐานลง SQLite (WAL) แทนการเดินหา folder
+- record_image() แค่ใส่ queue -> writer thread รวมเป็น batch แล้ว commit ครั้งเดียว (ไม่ช้าตาม capture)
+- อ่านได้พร้อมกันหลาย thread (connection ต่อ thread, WAL ไม่บล็อก writer)
+- ทุก query ใช้ index (order_no / captured_at / cam) -> O(log n) แม้มีหลายล้านภาพ
+- backfill(layout) เพิ่ม order ที่อยู่บน disk แต่ยังไม่มีใน catalog (ภาพก่อนมี catalog)
+
+ตัวอย่าง: order ที่ cam3 ถ่ายเมื่อวาน
+    catalog.orders_between(yesterday_start, today_start, cam=3)
+"""
+
+import os
+import time
+import queue
+import sqlite3
+import threading
+from datetime import datetime
+from evidence_layout import parse_image_name
+
+# =============================
+# CONFIG
+# =============================
+BATCH_SIZE = 500  # จำนวน row สูงสุดต่อ transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    id          INTEGER PRIMARY KEY,
+    order_no    TEXT    NOT NULL,
+    cam         INTEGER NOT NULL,
+    path        TEXT    NOT NULL,
+    size        INTEGER,
+    captured_at REAL    NOT NULL,  -- epoch ตอน trigger
+    saved_at    REAL,              -- epoch ตอนเขียนไฟล์เสร็จ
+    capture_ms  REAL,              -- trigger -> encode เสร็จ
+    grab_ms     REAL,
+    encode_ms   REAL,
+    retake      INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_images_order ON images(order_no);
+CREATE INDEX IF NOT EXISTS idx_images_captured ON images(captured_at);
+CREATE INDEX IF NOT EXISTS idx_images_cam_captured ON images(cam, captured_at);
+
+CREATE TABLE IF NOT EXISTS orders (
+    order_no       TEXT PRIMARY KEY,
+    first_captured REAL    NOT NULL,
+    last_captured  REAL    NOT NULL,
+    image_count    INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_orders_last ON orders(last_captured);
+"""
+
+INSERT_IMAGE = """
+INSERT INTO images (order_no, cam, path, size, captured_at, saved_at, capture_ms, grab_ms, encode_ms, retake)
+VALUES (:order_no, :cam, :path, :size, :captured_at, :saved_at, :capture_ms, :grab_ms, :encode_ms, :retake)
+"""
+
+UPSERT_ORDER = """
+INSERT INTO orders (order_no, first_captured, last_captured, image_count)
+VALUES (:order_no, :captured_at, :captured_at, 1)
+ON CONFLICT(order_no) DO UPDATE SET
+    first_captured = min(first_captured, excluded.first_captured),
+    last_captured  = max(last_captured, excluded.last_captured),
+    image_count    = image_count + 1
+"""
+
+
+class EvidenceCatalog:
+    """SQLite catalog ของภาพหลักฐาน (writer thread 1 ตัว + reader connection ต่อ thread)"""
+
+    def __init__(self, db_path, log_callback=None):
+        self.db_path = db_path
+        self.log_callback = log_callback
+        self.queue = queue.Queue()
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.readers = []  # reader connection ของทุก thread (ปิดทั้งหมดตอน close)
+        self.metrics = {"queued": 0, "written": 0, "batches": 0, "failed": 0}
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        conn.commit()
+        conn.close()
+
+        self.thread = threading.Thread(target=self._writer_loop, name="evidence-catalog", daemon=True)
+        self.thread.start()
+
+    def log(self, msg):
+        if self.log_callback:
+            self.log_callback(msg)
+        else:
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
+
+    def _connect(self, check_same_thread=True):
+        conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=check_same_thread)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # WAL + NORMAL: ไม่ fsync ทุก commit แต่ไม่เสีย DB
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _reader(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            # ใช้เฉพาะ thread นี้ แต่ close() ปิดจาก thread อื่นได้
+            conn = self.local.conn = self._connect(check_same_thread=False)
+            with self.lock:
+                self.readers.append(conn)
+        return conn
+
+    # ---------- Write (off capture path) ----------
+    def record_image(self, order_no, cam, path, size=None, captured_at=None, saved_at=None,
+                     capture_ms=None, grab_ms=None, encode_ms=None, retake=False):
+        """ใส่ queue แล้ว return ทันที (writer thread บันทึกให้)"""
+        row = {
+            "order_no": order_no,
+            "cam": cam,
+            "path": path,
+            "size": size,
+            "captured_at": time.time() if captured_at is None else captured_at,
+            "saved_at": saved_at,
+            "capture_ms": capture_ms,
+            "grab_ms": grab_ms,
+            "encode_ms": encode_ms,
+            "retake": int(bool(retake)),
+        }
+        with self.lock:
+            self.metrics["queued"] += 1
+        self.queue.put(row)
+
+    def _writer_loop(self):
+        conn = self._connect()
+        running = True
+        while running:
+            batch = [self.queue.get()]
+            # รวมทุกอย่างที่ค้างอยู่เป็น transaction เดียว
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            rows = [row for row in batch if row is not None]
+            running = len(rows) == len(batch)
+            if rows:
+                try:
+                    with conn:
+                        conn.executemany(INSERT_IMAGE, rows)
+                        conn.executemany(UPSERT_ORDER, rows)
+                    with self.lock:
+                        self.metrics["written"] += len(rows)
+                        self.metrics["batches"] += 1
+                except sqlite3.Error as e:
+                    with self.lock:
+                        self.metrics["failed"] += len(rows)
+                    self.log(f"❌ Catalog write failed ({len(rows)} rows): {e}")
+            for _ in batch:
+                self.queue.task_done()
+        conn.close()
+
+    def flush(self):
+        """รอจนทุก row ที่อยู่ใน queue ถูก commit"""
+        self.queue.join()
+
+    def close(self):
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+        # ปิด reader ของทุก thread (GUI / preview / worker) ไม่ให้ค้าง WAL reader ตอนปิดโปรแกรม
+        with self.lock:
+            readers, self.readers = self.readers, []
+        for conn in readers:
+            conn.close()
+        self.local = threading.local()
+
+    def backfill(self, layout, on_order=None):
+        """เดิน folder ทุก order ใน layout แล้วบันทึก order ที่ยังไม่มีใน catalog return (จำนวน order, จำนวนภาพ)
+
+        เวลาถ่ายจากชื่อไฟล์ camN_YYYYmmdd_HHMMSS (ไม่ตรง pattern ใช้ mtime) - รอจน commit ครบก่อน return
+        on_order(order_no) เรียกทุก order ที่เดินผ่าน (เช่น OrderIndex.add_existing - ไม่ต้องเดิน folder ซ้ำ)
+        """
+        orders = images = 0
+        for order_no, folder in layout.iter_orders():
+            if on_order is not None:
+                on_order(order_no)
+            if self.has_order(order_no):
+                continue
+            added = 0
+            with os.scandir(folder) as it:
+                for entry in it:
+                    parsed = parse_image_name(entry.name)
+                    if parsed is None or not entry.is_file():
+                        continue
+                    cam, captured_at = parsed
+                    st = entry.stat()
+                    self.record_image(order_no, cam, entry.path, size=st.st_size,
+                                      captured_at=captured_at, saved_at=st.st_mtime)
+                    added += 1
+            if added:
+                orders += 1
+                images += added
+        self.flush()
+        return orders, images
+
+    # ---------- Query (indexed) ----------
+    def has_order(self, order_no):
+        row = self._reader().execute(
+            "SELECT 1 FROM orders WHERE order_no = ?", (order_no,)
+        ).fetchone()
+        return row is not None
+
+    def get_order(self, order_no):
+        row = self._reader().execute(
+            "SELECT * FROM orders WHERE order_no = ?", (order_no,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def order_folder(self, order_no):
+        """folder ของภาพล่าสุดของ order (ใช้ resolve layout แบบ date โดยไม่ต้องสแกน)"""
+        row = self._reader().execute(
+            "SELECT path FROM images WHERE order_no = ? ORDER BY captured_at DESC LIMIT 1", (order_no,)
+        ).fetchone()
+        return os.path.dirname(row[0]) if row else None
+
+    def relocate_order(self, order_no, old_folder, new_folder):
+        """แก้ path ของภาพหลังย้าย folder (ใช้โดย migrate_evidence.py) return จำนวน row"""
+        old_folder = os.path.normpath(old_folder)
+        conn = self._reader()
+        rows = conn.execute("SELECT id, path FROM images WHERE order_no = ?", (order_no,)).fetchall()
+        updates = [
+            (os.path.join(new_folder, os.path.basename(row["path"])), row["id"])
+            for row in rows if os.path.normpath(os.path.dirname(row["path"])) == old_folder
+        ]
+        with conn:
+            conn.executemany("UPDATE images SET path = ? WHERE id = ?", updates)
+        return len(updates)
+
+    def order_images(self, order_no, latest_only=True):
+        """ภาพของ order (latest_only = เฉพาะภาพล่าสุดของแต่ละกล้อง เหมือนใน folder)"""
+        rows = self._reader().execute(
+            "SELECT * FROM images WHERE order_no = ? ORDER BY cam, captured_at", (order_no,)
+        ).fetchall()
+        images = [dict(row) for row in rows]
+        if latest_only:
+            latest = {}
+            for image in images:
+                latest[image["cam"]] = image
+            images = [latest[cam] for cam in sorted(latest)]
+        return images
+
+    def orders_between(self, start, end, cam=None, limit=None):
+        """order_no ที่มีภาพถ่ายในช่วง [start, end) (epoch) เลือกกล้องได้"""
+        if cam is None:
+            sql = ("SELECT DISTINCT order_no FROM images WHERE captured_at >= ? AND captured_at < ? "
+                   "ORDER BY order_no")
+            params = [start, end]
+        else:
+            sql = ("SELECT DISTINCT order_no FROM images WHERE cam = ? AND captured_at >= ? AND captured_at < ? "
+                   "ORDER BY order_no")
+            params = [cam, start, end]
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [row[0] for row in self._reader().execute(sql, params)]
+
+    def images_between(self, start, end, cam=None, limit=None):
+        if cam is None:
+            sql = "SELECT * FROM images WHERE captured_at >= ? AND captured_at < ? ORDER BY captured_at"
+            params = [start, end]
+        else:
+            sql = "SELECT * FROM images WHERE cam = ? AND captured_at >= ? AND captured_at < ? ORDER BY captured_at"
+            params = [cam, start, end]
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [dict(row) for row in self._reader().execute(sql, params)]
+
+    def search_orders(self, prefix="", limit=100):
+        """order ที่ขึ้นต้นด้วย prefix (range scan บน primary key) เรียงจากล่าสุด"""
+        if prefix:
+            rows = self._reader().execute(
+                "SELECT * FROM orders WHERE order_no >= ? AND order_no < ? ORDER BY order_no LIMIT ?",
+                (prefix, prefix + "\uffff", limit),
+            ).fetchall()
+        else:
+            rows = self._reader().execute(
+                "SELECT * FROM orders ORDER BY last_captured DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    def _order_filter(prefix, start, end):
+        """WHERE ของตาราง orders: prefix (range scan บน primary key) + ช่วงเวลา last_captured"""
+        clauses, params = [], []
+        if prefix:
+            clauses.append("order_no >= ? AND order_no < ?")
+            params += [prefix, prefix + "\uffff"]
+        if start is not None:
+            clauses.append("last_captured >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("last_captured < ?")
+            params.append(end)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def count_orders(self, prefix="", start=None, end=None):
+        where, params = self._order_filter(prefix, start, end)
+        return self._reader().execute("SELECT COUNT(*) FROM orders" + where, params).fetchone()[0]
+
+    @staticmethod
+    def _after(where, params, after):
+        """ต่อ WHERE ด้วย keyset: แถวที่อยู่หลัง after = (last_captured, order_no) ตามลำดับล่าสุดก่อน"""
+        if after is None:
+            return where, params
+        keyset = "(last_captured, order_no) < (?, ?)"
+        where = (where + " AND " + keyset) if where else (" WHERE " + keyset)
+        return where, params + list(after)
+
+    def orders_page(self, prefix="", start=None, end=None, after=None, limit=100):
+        """order ทีละหน้า เรียงจากล่าสุด + thumb_path (ภาพล่าสุดของกล้องเลขน้อยสุด) สำหรับ history view
+
+        after = (last_captured, order_no) ของแถวสุดท้ายหน้าก่อน (keyset: ไม่ต้อง OFFSET ข้ามแถว)
+        """
+        where, params = self._after(*self._order_filter(prefix, start, end), after)
+        sql = (
+            "SELECT o.*, (SELECT path FROM images i WHERE i.order_no = o.order_no "
+            "ORDER BY cam, captured_at DESC LIMIT 1) AS thumb_path "
+            "FROM orders o" + where + " ORDER BY last_captured DESC, order_no DESC LIMIT ?"
+        )
+        return [dict(row) for row in self._reader().execute(sql, params + [limit])]
+
+    def order_key_after(self, prefix="", start=None, end=None, after=None, skip=0):
+        """key (last_captured, order_no) ของแถวที่ skip ถัดจาก after หรือ None
+
+        ใช้ตอนกระโดดข้ามหลายหน้า: ข้ามเฉพาะ key บน idx_orders_last (ไม่ดึง thumbnail / ข้อมูลแถว)
+        """
+        where, params = self._after(*self._order_filter(prefix, start, end), after)
+        row = self._reader().execute(
+            "SELECT last_captured, order_no FROM orders" + where
+            + " ORDER BY last_captured DESC, order_no DESC LIMIT 1 OFFSET ?",
+            params + [skip],
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def count_between(self, start, end):
+        """(จำนวน order, จำนวนภาพ) ที่ถ่ายในช่วง [start, end)"""
+        row = self._reader().execute(
+            "SELECT COUNT(DISTINCT order_no), COUNT(*) FROM images WHERE captured_at >= ? AND captured_at < ?",
+            (start, end),
+        ).fetchone()
+        return row[0], row[1]
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Evidence Layout - โครงสร้าง folder ของภาพหลักฐาน (แบ่ง shard ไม่ให้ทุก order กองอยู่ใน folder เดียว)
+- flat      : OUTPUT_DIR/<ORDER>/                  (แบบเดิม)
+- date      : OUTPUT_DIR/<YYYY>/<MM>/<DD>/<ORDER>/ (วันที่ถ่ายครั้งแรก)
+- hash      : OUTPUT_DIR/<hh>/<ORDER>/             (hex prefix ของ hash order_no)
+- date_hash : OUTPUT_DIR/<YYYY>/<MM>/<DD>/<hh>/<ORDER>/
+
+resolve(order_no) หา folder ของ order ที่ถ่ายไปแล้วได้ทั้ง layout ใหม่และ flat แบบเดิม
+(ใช้ตอนเช็คซ้ำ / retake) -> ไม่ต้องย้ายไฟล์เก่าก่อนเปลี่ยน layout
+"""
+
+import os
+import re
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from image_encoder import IMAGE_EXTENSIONS
+
+# =============================
+# CONFIG
+# =============================
+SCHEMES = ("flat", "date", "hash", "date_hash")
+RESOLVE_CACHE_SIZE = 50_000  # order -> folder ที่ resolve แล้ว (LRU)
+DATE_SEARCH_DAYS = 3         # date layout: ลองวันล่าสุดก่อนถาม catalog / สแกน
+
+_DATE_PARTS = (re.compile(r"\d{4}$"), re.compile(r"\d{2}$"), re.compile(r"\d{2}$"))
+IMAGE_NAME_PATTERN = re.compile(r"^cam(\d+)_(\d{8}_\d{6})\.(?:jpe?g|png|webp)$", re.IGNORECASE)
+
+
+def shard_of(order_no, hash_chars=2):
+    """hex prefix จาก hash ของ order_no (กระจายเท่าๆ กัน 16^hash_chars bucket)"""
+    return hashlib.blake2b(order_no.encode(), digest_size=8).hexdigest()[:hash_chars]
+
+
+def parse_image_name(name):
+    """(เลขกล้อง, epoch ที่ถ่าย) จากชื่อไฟล์ camN_YYYYmmdd_HHMMSS.jpg หรือ None ถ้าไม่ใช่ภาพหลักฐาน"""
+    m = IMAGE_NAME_PATTERN.match(name)
+    if not m:
+        return None
+    return int(m.group(1)), time.mktime(time.strptime(m.group(2), "%Y%m%d_%H%M%S"))
+
+
+def folder_has_images(path):
+    if not path or not os.path.isdir(path):
+        return False
+    return any(f.lower().endswith(IMAGE_EXTENSIONS) for f in os.listdir(path))
+
+
+class EvidenceLayout:
+    """folder_for(order_no) -> folder ที่จะเขียนภาพ (ใช้ folder เดิมถ้า order นี้เคยถ่ายแล้ว)
+
+    catalog : EvidenceCatalog (ถ้ามี) ใช้หา folder ของ order ใน date layout โดยไม่ต้องสแกน
+    """
+
+    def __init__(self, root, scheme="flat", hash_chars=2, catalog=None):
+        if scheme not in SCHEMES:
+            raise ValueError(f"Unknown evidence layout: {scheme} (use {', '.join(SCHEMES)})")
+        self.root = root
+        self.scheme = scheme
+        self.hash_chars = hash_chars
+        self.catalog = catalog
+        self.lock = threading.Lock()
+        self.cache = OrderedDict()
+        self._hex = re.compile(r"[0-9a-f]{%d}$" % hash_chars)
+
+    # ---------- Path ----------
+    def new_folder(self, order_no, ts=None):
+        """folder ตาม layout ปัจจุบันสำหรับ order ใหม่ (ts = เวลาถ่าย ใช้กับ date layout)"""
+        return self._folder(self.scheme, order_no, ts)
+
+    def _folder(self, scheme, order_no, ts=None):
+        parts = [self.root]
+        if scheme in ("date", "date_hash"):
+            parts.extend(time.strftime("%Y %m %d", time.localtime(ts)).split())
+        if scheme in ("hash", "date_hash"):
+            parts.append(shard_of(order_no, self.hash_chars))
+        parts.append(order_no)
+        return os.path.join(*parts)
+
+    def folder_for(self, order_no, ts=None):
+        """folder สำหรับเขียนภาพ: ของเดิมถ้ามี (retake ไม่แยก folder) ไม่งั้นสร้างตาม layout"""
+        folder = self.resolve(order_no)
+        if folder is None:
+            folder = self.new_folder(order_no, ts)
+            self._remember(order_no, folder)
+        return folder
+
+    # ---------- Resolve ----------
+    def resolve(self, order_no):
+        """folder ที่มีภาพของ order นี้อยู่จริง หรือ None"""
+        with self.lock:
+            folder = self.cache.get(order_no)
+            if folder is not None:
+                self.cache.move_to_end(order_no)
+        if folder is not None and folder_has_images(folder):
+            return folder
+
+        for folder in self._candidates(order_no):
+            if folder_has_images(folder):
+                self._remember(order_no, folder)
+                return folder
+        return None
+
+    def _candidates(self, order_no):
+        """ลำดับที่ลอง: hash path (คำนวณจาก order_no) -> catalog -> วันล่าสุด -> flat เดิม"""
+        yield self._folder("hash", order_no)
+        if self.catalog is not None:
+            folder = self.catalog.order_folder(order_no)
+            if folder:
+                yield folder
+        if self.scheme in ("date", "date_hash"):
+            now = time.time()
+            for day in range(DATE_SEARCH_DAYS):
+                yield self._folder(self.scheme, order_no, now - day * 86400)
+        yield self._folder("flat", order_no)
+
+    def _remember(self, order_no, folder):
+        with self.lock:
+            self.cache[order_no] = folder
+            self.cache.move_to_end(order_no)
+            if len(self.cache) > RESOLVE_CACHE_SIZE:
+                self.cache.popitem(last=False)
+
+    # ---------- Walk ----------
+    def iter_orders(self):
+        """yield (order_no, folder) ของทุก order ใน root ไม่ว่าจะอยู่ layout ไหน"""
+        if not os.path.isdir(self.root):
+            return
+        yield from self._walk(self.root, 0)
+
+    def _walk(self, path, depth):
+        with os.scandir(path) as it:
+            entries = [e for e in it if e.is_dir() and not e.name.startswith(".")]
+        for entry in entries:
+            if self._is_shard(entry.name, depth):
+                yield from self._walk(entry.path, depth + 1)
+            elif folder_has_images(entry.path):
+                yield entry.name, entry.path
+
+    def _is_shard(self, name, depth):
+        # order_no ยาวกว่าชื่อ shard เสมอ -> ชื่อสั้นที่เป็นวันที่/hex คือ shard
+        if depth < 3 and _DATE_PARTS[depth].match(name):
+            return True
+        return bool(self._hex.match(name))
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Evidence Writer - เขียนไฟล์ภาพหลักฐานแยกจาก capture path
+- Capture ส่ง JPEG (หรือฟังก์ชัน encode) เข้า bounded queue แล้วไปรับ order ถัดไปได้ทันที
+- Background threads: encode -> เขียน .tmp -> os.replace (atomic) -> ลบไฟล์เก่าของกล้องเดียวกัน
+- งานของ (folder, กล้อง) เดียวกันไปที่ thread เดิมเสมอ -> เขียน/ลบไฟล์ของกล้องเดียวกันตามลำดับ
+- Queue เต็ม = backpressure (submit รอ) และนับเป็น metrics
+"""
+
+import os
+import time
+import tempfile
+import queue
+import threading
+from concurrent.futures import Future
+from datetime import datetime
+from image_encoder import IMAGE_EXTENSIONS
+
+# =============================
+# CONFIG
+# =============================
+WRITER_THREADS = 2
+WRITER_QUEUE_SIZE = 16  # จำนวนภาพที่รอเขียนได้สูงสุด (รวมทุก thread)
+
+
+class EvidenceWriter:
+    """Pool ของ writer threads + bounded queue ต่อ thread (route ตาม folder + กล้อง)"""
+
+    def __init__(self, num_threads=WRITER_THREADS, max_queue=WRITER_QUEUE_SIZE, log_callback=None):
+        self.log_callback = log_callback
+        per_thread = max(1, max_queue // num_threads)
+        self.queues = [queue.Queue(maxsize=per_thread) for _ in range(num_threads)]
+        self.lock = threading.Lock()
+        self.metrics = {
+            "submitted": 0,
+            "written": 0,
+            "failed": 0,
+            "bytes": 0,
+            "max_depth": 0,
+            "blocked": 0,       # จำนวนครั้งที่ submit ต้องรอเพราะ queue เต็ม
+            "blocked_ms": 0.0,  # เวลารวมที่ capture ถูกบล็อก
+            "write_ms": 0.0,    # เวลารวมที่ใช้ encode + เขียนไฟล์
+        }
+        self.threads = []
+        for i, q in enumerate(self.queues):
+            t = threading.Thread(target=self._worker_loop, args=(q,), name=f"evidence-writer-{i + 1}", daemon=True)
+            t.start()
+            self.threads.append(t)
+
+    def log(self, msg):
+        if self.log_callback:
+            self.log_callback(msg)
+        else:
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
+
+    def submit(self, image_path, data=None, encode=None, release=None):
+        """ส่งงานเขียนไฟล์ return Future ที่ได้ image_path (หรือ None ถ้าล้มเหลว)
+
+        data    : bytes / memoryview ของภาพที่ encode แล้ว (JPEG / PNG / WebP)
+        encode  : ฟังก์ชันที่ return bytes (ใช้แทน data ถ้าต้องการ encode ใน writer)
+        release : เรียกหลังเขียนเสร็จ (เช่น คืน buffer เข้า pool)
+        """
+        future = Future()
+        job = (future, image_path, data, encode, release)
+        q = self._queue_for(image_path)
+
+        try:
+            q.put_nowait(job)
+        except queue.Full:
+            t0 = time.perf_counter()
+            q.put(job)
+            with self.lock:
+                self.metrics["blocked"] += 1
+                self.metrics["blocked_ms"] += (time.perf_counter() - t0) * 1000
+
+        with self.lock:
+            self.metrics["submitted"] += 1
+            self.metrics["max_depth"] = max(self.metrics["max_depth"], self._depth())
+        return future
+
+    def _queue_for(self, image_path):
+        """เลือก queue จาก hash ของ (folder, camN) - capture กับ retake ของกล้องเดียวกันไม่เขียนชนกัน"""
+        folder, name = os.path.split(image_path)
+        key = (folder, name.split("_", 1)[0])
+        return self.queues[hash(key) % len(self.queues)]
+
+    def _depth(self):
+        return sum(q.qsize() for q in self.queues)
+
+    def _worker_loop(self, q):
+        while True:
+            job = q.get()
+            if job is None:
+                q.task_done()
+                break
+            future, image_path, data, encode, release = job
+            t0 = time.perf_counter()
+            try:
+                if encode is not None:
+                    data = encode()
+                size = self._write_atomic(image_path, data)
+                self._remove_old_files(image_path)
+                with self.lock:
+                    self.metrics["written"] += 1
+                    self.metrics["bytes"] += size
+                    self.metrics["write_ms"] += (time.perf_counter() - t0) * 1000
+                self.log(f"📸 Saved {image_path}")
+                future.set_result(image_path)
+            except Exception as e:
+                with self.lock:
+                    self.metrics["failed"] += 1
+                self.log(f"❌ Write failed {image_path}: {e}")
+                future.set_result(None)
+            finally:
+                if release is not None:
+                    release()
+                q.task_done()
+
+    def _write_atomic(self, image_path, data):
+        """เขียนไฟล์ .tmp (ชื่อไม่ซ้ำ) แล้ว rename ทับ - ไม่มีไฟล์ครึ่งๆ กลางๆ ให้ GUI/backup เห็น"""
+        folder, name = os.path.split(image_path)
+        os.makedirs(folder, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=name + ".", suffix=".tmp", dir=folder)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.chmod(tmp_path, 0o644)  # mkstemp สร้างเป็น 0600 - ให้ backup / GUI อ่านได้เหมือนเดิม
+            os.replace(tmp_path, image_path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        return len(data)
+
+    def _remove_old_files(self, image_path):
+        """ลบภาพเก่าของกล้องเดียวกัน (camN_*.jpg / .png / .webp) หลังไฟล์ใหม่เข้าที่แล้ว"""
+        folder, name = os.path.split(image_path)
+        prefix = name.split("_", 1)[0] + "_"
+        for old_file in os.listdir(folder):
+            if old_file != name and old_file.startswith(prefix) and old_file.lower().endswith(IMAGE_EXTENSIONS):
+                try:
+                    os.remove(os.path.join(folder, old_file))
+                    self.log(f"🗑️ Removed old: {old_file}")
+                except OSError:
+                    pass
+
+    def stats(self):
+        """Backpressure metrics (depth ปัจจุบัน + ตัวนับสะสม)"""
+        with self.lock:
+            stats = dict(self.metrics)
+        stats["depth"] = self._depth()
+        stats["capacity"] = sum(q.maxsize for q in self.queues)
+        stats["avg_write_ms"] = round(stats["write_ms"] / stats["written"], 1) if stats["written"] else 0.0
+        return stats
+
+    def close(self, wait=True):
+        """รอเขียนงานที่ค้างให้เสร็จ แล้วหยุด threads"""
+        for q in self.queues:
+            q.put(None)
+        if wait:
+            for t in self.threads:
+                t.join()
+        self.threads = []
+
+
+def when_all_saved(futures, callback):
+    """เรียก callback(list ของ path ที่เขียนสำเร็จ) เมื่อทุก Future เสร็จ - ไม่บล็อกผู้เรียก"""
+    futures = list(futures)
+    if not futures:
+        callback([])
+        return
+
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def _done(_):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0] > 0:
+                return
+        callback([p for p in (f.result() for f in futures) if p])
+
+    for f in futures:
+        f.add_done_callback(_done)
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+Fake Hikrobot Camera Backend (ไม่ต้องมี SDK / ฮาร์ดแวร์)
+- API ชื่อเดียวกับ MvCamera (MV_CC_*, MV_GIGE_IssueActionCommand) เฉพาะส่วนที่ระบบใช้
+- รองรับ Software Trigger และ GigE Action Command (Action1)
+- บันทึกเวลา trigger ลงใน stFrameInfo.nHostTimeStamp (ms) เพื่อวัด sync ระหว่างกล้อง
+
+ใช้งาน: ตั้ง HIKROBOT_USE_SIMULATION = True ใน config.py
+แล้ว camera_server จะ `from fake_camera import *` แทน SDK จริง
+"""
+
+import os
+import sys
+import time
+import threading
+import cv2
+import numpy as np
+from ctypes import *
+
+# โหลดเฉพาะ struct / ค่าคงที่ (pure ctypes) ไม่โหลด DLL ของ SDK
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "MvImport"))
+from PixelType_header import *
+from CameraParams_const import *
+from CameraParams_header import *
+from MvErrorDefine_const import *
+
+from config import HIKROBOT_IPS
+import pixel_convert
+
+# =============================
+# CONFIG (กล้องจำลอง)
+# =============================
+FAKE_WIDTH = 1280
+FAKE_HEIGHT = 960
+FAKE_PIXEL_TYPE = PixelType_Gvsp_BayerRG8
+FAKE_READOUT_MS = 40  # เวลาจำลอง exposure + ส่งภาพ ต่อ 1 เฟรม
+
+
+def _ip_to_int(ip):
+    a, b, c, d = (int(x) for x in ip.split("."))
+    return (a << 24) | (b << 16) | (c << 8) | d
+
+
+# device info ต้องอยู่ตลอดอายุโปรแกรม (pointer ถูกเก็บใน device list)
+_DEVICE_INFOS = []
+for _ip in HIKROBOT_IPS:
+    _info = MV_CC_DEVICE_INFO()
+    memset(byref(_info), 0, sizeof(_info))
+    _info.nTLayerType = MV_GIGE_DEVICE
+    _info.SpecialInfo.stGigEInfo.nCurrentIp = _ip_to_int(_ip)
+    _DEVICE_INFOS.append(_info)
+
+
+class FakeMvCamera:
+    """กล้องจำลอง 1 ตัว (แทน MvCamera)"""
+    _open_cameras = []
+    _registry_lock = threading.Lock()
+
+    def __init__(self):
+        self.device_info = None
+        self.is_open = False
+        self.grabbing = False
+        self.nodes = {
+            "Width": FAKE_WIDTH,
+            "Height": FAKE_HEIGHT,
+            "PayloadSize": FAKE_WIDTH * FAKE_HEIGHT,
+            "TriggerMode": MV_TRIGGER_MODE_OFF,
+            "TriggerSource": "Software",
+            "ActionDeviceKey": 0,
+            "ActionGroupKey": 0,
+            "ActionGroupMask": 0,
+        }
+        self.frame_num = 0
+        self.pending = []  # เวลา trigger ที่ยังไม่ถูกอ่าน (ms)
+        self.cond = threading.Condition()
+        self.buf = (c_ubyte * (FAKE_WIDTH * FAKE_HEIGHT))()
+
+    # ---------- Enum / Handle ----------
+    @staticmethod
+    def MV_CC_EnumDevices(nTLayerType, stDevList):
+        count = 0
+        for info in _DEVICE_INFOS:
+            if info.nTLayerType & nTLayerType:
+                stDevList.pDeviceInfo[count] = pointer(info)
+                count += 1
+        stDevList.nDeviceNum = count
+        return MV_OK
+
+    def MV_CC_CreateHandle(self, stDevInfo):
+        self.device_info = stDevInfo
+        return MV_OK
+
+    def MV_CC_DestroyHandle(self):
+        self.device_info = None
+        return MV_OK
+
+    def MV_CC_OpenDevice(self, nAccessMode=MV_ACCESS_Exclusive, nSwitchoverKey=0):
+        if self.device_info is None:
+            return MV_E_HANDLE
+        self.is_open = True
+        with FakeMvCamera._registry_lock:
+            FakeMvCamera._open_cameras.append(self)
+        return MV_OK
+
+    def MV_CC_CloseDevice(self):
+        self.is_open = False
+        with FakeMvCamera._registry_lock:
+            if self in FakeMvCamera._open_cameras:
+                FakeMvCamera._open_cameras.remove(self)
+        return MV_OK
+
+    # ---------- Parameters ----------
+    def MV_CC_GetOptimalPacketSize(self):
+        return 8164
+
+    def MV_CC_SetIntValue(self, strKey, nValue):
+        self.nodes[strKey] = int(nValue)
+        return MV_OK
+
+    def MV_CC_GetIntValue(self, strKey, stIntValue):
+        if strKey not in self.nodes:
+            return MV_E_SUPPORT
+        stIntValue.nCurValue = int(self.nodes[strKey])
+        stIntValue.nMax = int(self.nodes[strKey])
+        return MV_OK
+
+    def MV_CC_SetEnumValue(self, strKey, nValue):
+        if strKey == "TriggerSource" and nValue == MV_TRIGGER_SOURCE_SOFTWARE:
+            nValue = "Software"
+        self.nodes[strKey] = nValue
+        return MV_OK
+
+    def MV_CC_SetEnumValueByString(self, strKey, strValue):
+        self.nodes[strKey] = strValue
+        return MV_OK
+
+    def MV_CC_SetBoolValue(self, strKey, bValue):
+        self.nodes[strKey] = bool(bValue)
+        return MV_OK
+
+    def MV_CC_SetFloatValue(self, strKey, fValue):
+        self.nodes[strKey] = float(fValue)
+        return MV_OK
+
+    def MV_CC_SetCommandValue(self, strKey):
+        if strKey != "TriggerSoftware":
+            return MV_E_SUPPORT
+        if self.nodes["TriggerMode"] != MV_TRIGGER_MODE_ON or self.nodes["TriggerSource"] != "Software":
+            return MV_E_PRECONDITION
+        self._fire()
+        return MV_OK
+
+    # ---------- Grabbing ----------
+    def MV_CC_StartGrabbing(self):
+        self.grabbing = True
+        return MV_OK
+
+    def MV_CC_StopGrabbing(self):
+        self.grabbing = False
+        with self.cond:
+            self.pending.clear()
+            self.cond.notify_all()
+        return MV_OK
+
+    def _fire(self):
+        """กล้องได้รับ trigger (software หรือ action)"""
+        if not self.grabbing:
+            return
+        with self.cond:
+            self.pending.append(int(time.time() * 1000))
+            self.cond.notify_all()
+
+    def MV_CC_GetImageBuffer(self, stFrame, nMsec):
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.pending or not self.grabbing, nMsec / 1000.0):
+                return MV_E_NODATA
+            if not self.pending:
+                return MV_E_NODATA
+            t_trigger = self.pending.pop(0)
+
+        time.sleep(FAKE_READOUT_MS / 1000.0)
+        self.frame_num += 1
+        memset(self.buf, (self.frame_num * 37) % 256, sizeof(self.buf))
+
+        stFrame.pBufAddr = cast(self.buf, POINTER(c_ubyte))
+        stFrame.stFrameInfo.nWidth = FAKE_WIDTH
+        stFrame.stFrameInfo.nHeight = FAKE_HEIGHT
+        stFrame.stFrameInfo.enPixelType = FAKE_PIXEL_TYPE
+        stFrame.stFrameInfo.nFrameNum = self.frame_num
+        stFrame.stFrameInfo.nHostTimeStamp = t_trigger
+        stFrame.stFrameInfo.nFrameLen = sizeof(self.buf)
+        return MV_OK
+
+    def MV_CC_FreeImageBuffer(self, stFrame):
+        return MV_OK
+
+    def MV_CC_SaveImageEx2(self, stSaveParam):
+        """Encode JPEG ด้วย OpenCV (แทน encoder ของ SDK)"""
+        h, w = stSaveParam.nHeight, stSaveParam.nWidth
+        raw = np.ctypeslib.as_array(stSaveParam.pData, shape=(stSaveParam.nDataLen,))
+        img = pixel_convert.convert(raw, w, h, stSaveParam.enPixelType, bgr=True)
+        if img is None:
+            return MV_E_PARAMETER
+        ok, jpg = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, int(stSaveParam.nJpgQuality)])
+        if not ok:
+            return MV_E_PARAMETER
+        if len(jpg) > stSaveParam.nBufferSize:
+            return MV_E_NOENOUGH_BUF
+        memmove(stSaveParam.pImageBuffer, jpg.ctypes.data, len(jpg))
+        stSaveParam.nImageLen = len(jpg)
+        return MV_OK
+
+    # ---------- GigE Action Command ----------
+    @staticmethod
+    def MV_GIGE_IssueActionCommand(pstActionCmdInfo, pstActionCmdResults):
+        """Broadcast action: ทุกกล้องที่ key/mask ตรงกันจะถูก trigger พร้อมกัน"""
+        with FakeMvCamera._registry_lock:
+            cameras = list(FakeMvCamera._open_cameras)
+
+        targets = [
+            cam for cam in cameras
+            if cam.nodes["TriggerMode"] == MV_TRIGGER_MODE_ON
+            and cam.nodes["TriggerSource"] == "Action1"
+            and cam.nodes["ActionDeviceKey"] == pstActionCmdInfo.nDeviceKey
+            and cam.nodes["ActionGroupKey"] == pstActionCmdInfo.nGroupKey
+            and cam.nodes["ActionGroupMask"] & pstActionCmdInfo.nGroupMask
+        ]
+        for cam in targets:
+            cam._fire()
+
+        # ACK (เฉพาะเมื่อขอ ACK และเตรียม pResults มาให้)
+        n = 0
+        if pstActionCmdInfo.nTimeOut > 0 and pstActionCmdResults.pResults:
+            capacity = pstActionCmdResults.nNumResults
+            for cam in targets[:capacity]:
+                ip = cam.device_info.SpecialInfo.stGigEInfo.nCurrentIp
+                addr = f"{ip >> 24 & 0xFF}.{ip >> 16 & 0xFF}.{ip >> 8 & 0xFF}.{ip & 0xFF}".encode()
+                memmove(pstActionCmdResults.pResults[n].strDeviceAddress, addr, len(addr))
+                pstActionCmdResults.pResults[n].nStatus = 0
+                n += 1
+        pstActionCmdResults.nNumResults = n
+        return MV_OK
+
+
+MvCamera = FakeMvCamera
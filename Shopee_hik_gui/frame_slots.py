@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+Frame Slots - ส่งภาพ live view จาก camera thread ไป GUI โดยไม่ copy ทั้งเฟรม
+- triple buffer: slot ที่กล้องกำลังเขียน / slot ล่าสุดที่เขียนเสร็จ / slot ที่ GUI กำลังอ่าน ไม่ซ้ำกันเสมอ
+  -> GUI ไม่เห็นภาพที่เขียนไม่เสร็จ (ไม่ tear) และกล้องไม่ต้องรอ GUI
+- camera thread แปลงสีลง slot โดยตรง (cv2 dst=) แล้ว publish -> generation +1
+- GUI acquire() ได้ slot ล่าสุดถ้ามี generation ใหม่กว่าที่เคยอ่าน สร้าง QImage ชี้ slot เดิม (ไม่ copy)
+  แล้ว release() หลัง QPixmap.fromImage
+- rate governor: should_render() ให้ส่งภาพไม่เกิน PREVIEW_FPS (เฟรมที่เกินไม่ต้องแปลง/ย่อ)
+- latest-wins: publish() บอกให้ emit signal เฉพาะเมื่อ GUI อ่าน signal ก่อนหน้าแล้ว
+  -> ใน event loop มี signal ค้างได้ไม่เกิน 1 ตัวต่อกล้อง latency ไม่สะสมตอน GUI ช้า
+- ขนาดจอแสดงผล (set_view_size) ผู้สร้าง thread ส่งขนาดของ card มาให้ -> camera thread ย่อภาพก่อนเขียน slot
+  GUI thread แค่วาดภาพเล็ก ไม่ต้อง scale ทุกเฟรม (ยังไม่ได้ตั้ง = ส่งภาพเต็มขนาดเหมือนเดิม)
+"""
+
+import time
+import threading
+from collections import namedtuple
+import cv2
+import numpy as np
+from PyQt5.QtGui import QImage
+from config import LIVE_DOWNSCALE, LIVE_SCALE_INTERPOLATION, PREVIEW_FPS, LIVE_STATS_INTERVAL_S
+
+SLOT_COUNT = 3
+INTERPOLATIONS = {"area": cv2.INTER_AREA, "linear": cv2.INTER_LINEAR, "nearest": cv2.INTER_NEAREST}
+SCALE_INTERPOLATION = INTERPOLATIONS.get(LIVE_SCALE_INTERPOLATION, cv2.INTER_AREA)
+
+Frame = namedtuple("Frame", "index generation array")
+
+STAT_KEYS = ("produced", "throttled", "published", "overwritten", "notified", "displayed")
+
+
+class FrameSlots:
+    """buffer วนใช้ระหว่าง producer 1 ตัว (camera thread) กับ reader 1 ตัว (GUI thread)"""
+
+    def __init__(self, count=SLOT_COUNT, max_fps=PREVIEW_FPS):
+        if count < 3:
+            raise ValueError("FrameSlots needs at least 3 slots")
+        self.count = count
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+        self.lock = threading.Lock()
+        self.buffers = [None] * count
+        self.generations = [0] * count
+        self.generation = 0
+        self.latest = -1        # slot ล่าสุดที่เขียนเสร็จ
+        self.reading = -1       # slot ที่ GUI กำลังอ่าน
+        self.read_generation = 0
+        self.view_size = None   # (width, height) ของจอแสดงผล None = ไม่ย่อ
+        self.next_due = 0.0     # monotonic: เวลาที่ส่งภาพถัดไปได้
+        self.notify_pending = False  # มี signal รอ GUI อยู่แล้ว
+        self.stats = dict.fromkeys(STAT_KEYS, 0)
+        self.stats_since = time.monotonic()
+
+    # ---------- Rate governor ----------
+    def should_render(self):
+        """producer เรียกทุกเฟรมที่ได้จากกล้อง: True = ถึงเวลาส่งภาพใหม่ False = ข้ามเฟรมนี้"""
+        now = time.monotonic()
+        with self.lock:
+            self.stats["produced"] += 1
+            if now < self.next_due:
+                self.stats["throttled"] += 1
+                return False
+            # ไม่สะสมเวลาค้าง: ถ้าช้ากว่ากำหนด เริ่มนับใหม่จากตอนนี้
+            self.next_due = max(self.next_due + self.min_interval, now)
+            return True
+
+    # ---------- Display size (จาก GUI) ----------
+    def set_view_size(self, width, height):
+        self.view_size = (width, height) if width > 0 and height > 0 else None
+
+    def display_shape(self, height, width):
+        """(height, width) ที่จะเขียนลง slot: ย่อให้พอดี view คงสัดส่วน ไม่ขยาย"""
+        view = self.view_size
+        if not LIVE_DOWNSCALE or view is None:
+            return height, width
+        scale = min(view[0] / width, view[1] / height)
+        if scale >= 1:
+            return height, width
+        return max(1, int(height * scale)), max(1, int(width * scale))
+
+    # ---------- Producer (camera thread) ----------
+    def begin_write(self, shape, dtype=np.uint8):
+        """return (index, array) ของ slot ว่างสำหรับเขียนภาพถัดไป (จองใหม่เมื่อขนาดเปลี่ยนเท่านั้น)"""
+        with self.lock:
+            index = next(i for i in range(self.count) if i != self.latest and i != self.reading)
+        buf = self.buffers[index]
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            buf = self.buffers[index] = np.empty(shape, dtype=dtype)
+        return index, buf
+
+    def write_resized(self, image):
+        """เขียน image ลง slot ว่าง (ย่อตาม view ถ้าจำเป็น) return index สำหรับ publish()"""
+        h, w = image.shape[:2]
+        th, tw = self.display_shape(h, w)
+        index, slot = self.begin_write((th, tw) + image.shape[2:], image.dtype)
+        if (th, tw) == (h, w):
+            np.copyto(slot, image)
+        else:
+            cv2.resize(image, (tw, th), dst=slot, interpolation=SCALE_INTERPOLATION)
+        return index
+
+    def publish(self, index):
+        """ประกาศว่า slot นี้เขียนเสร็จแล้ว
+
+        return True = ผู้เรียกควร emit signal (ไม่มี signal ค้างรอ GUI อยู่)
+        False = GUI จะเห็นภาพนี้จาก signal ที่ค้างอยู่แล้ว (latest-wins)
+        """
+        with self.lock:
+            if self.latest >= 0 and self.generations[self.latest] > self.read_generation:
+                self.stats["overwritten"] += 1  # ภาพก่อนหน้ายังไม่ถูกอ่าน -> ถูกแทนที่
+            self.generation += 1
+            self.generations[index] = self.generation
+            self.latest = index
+            self.stats["published"] += 1
+            if self.notify_pending:
+                return False
+            self.notify_pending = True
+            self.stats["notified"] += 1
+            return True
+
+    # ---------- Reader (GUI thread) ----------
+    def acquire(self):
+        """Frame ล่าสุดที่ยังไม่เคยอ่าน หรือ None (ต้อง release() เมื่อใช้เสร็จ)"""
+        with self.lock:
+            self.notify_pending = False  # รับ signal แล้ว ภาพถัดไปต้อง emit ใหม่
+            index = self.latest
+            if index < 0 or self.generations[index] <= self.read_generation:
+                return None
+            self.reading = index
+            self.read_generation = self.generations[index]
+            self.stats["displayed"] += 1
+            return Frame(index, self.generations[index], self.buffers[index])
+
+    def release(self, frame):
+        with self.lock:
+            if self.reading == frame.index:
+                self.reading = -1
+
+    # ---------- Metrics ----------
+    def take_stats(self):
+        """สถิติตั้งแต่เรียกครั้งก่อน (แล้วเริ่มนับใหม่) + fps ที่ผลิต/แสดงจริง"""
+        now = time.monotonic()
+        with self.lock:
+            stats, self.stats = self.stats, dict.fromkeys(STAT_KEYS, 0)
+            elapsed, self.stats_since = max(now - self.stats_since, 1e-6), now
+        stats["produced_fps"] = round(stats["produced"] / elapsed, 1)
+        stats["displayed_fps"] = round(stats["displayed"] / elapsed, 1)
+        return stats
+
+    def report(self, interval=LIVE_STATS_INTERVAL_S):
+        """ข้อความสรุปทุก interval วินาที (None = ยังไม่ถึงเวลา / ไม่มีภาพ)"""
+        if not interval or time.monotonic() - self.stats_since < interval:
+            return None
+        stats = self.take_stats()
+        if not stats["produced"]:
+            return None
+        return (
+            f"produced {stats['produced_fps']} fps / displayed {stats['displayed_fps']} fps | "
+            f"throttled {stats['throttled']} | coalesced {stats['overwritten']}"
+        )
+
+
+def frame_to_qimage(array):
+    """QImage (RGB888) ที่ชี้ข้อมูลของ array โดยตรง ใช้ได้เฉพาะระหว่าง acquire/release"""
+    h, w = array.shape[:2]
+    return QImage(array.data, w, h, array.strides[0], QImage.Format_RGB888)
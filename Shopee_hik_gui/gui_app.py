@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import sys
 import os
+import re
 from datetime import datetime
 from PyQt5.QtWidgets import *
 from PyQt5.QtGui import QFont, QPixmap
@@ -8,6 +9,7 @@ from PyQt5.QtCore import Qt, pyqtSignal, QTimer, QTime
 
 # ========== IMPORT CONFIG จากไฟล์ภายนอก ==========
 from config import COLORS, FONTS
+from frame_slots import frame_to_qimage
 
 # ========== Custom Widgets ==========
 
@@ -127,6 +129,12 @@ class CameraCard(QFrame):
             
         layout.addWidget(self.screen, stretch=1)
         
+        # หน่วยความจำ buffer ของกล้อง (ซ่อนไว้จนกว่าจะได้รายงาน)
+        self.mem_label = QLabel("")
+        self.mem_label.setStyleSheet(f"color: {COLORS['text_dim']}; font-size: 9px; border: none; background: transparent;")
+        self.mem_label.hide()
+        layout.addWidget(self.mem_label)
+        
         if not is_main:
             self.btn_retake = QPushButton("🔄 Retake")
             self.btn_retake.setCursor(Qt.PointingHandCursor)
@@ -178,7 +186,28 @@ class CameraCard(QFrame):
         pixmap = QPixmap.fromImage(qt_image)
         w, h = self.screen.width(), self.screen.height()
         if w > 10 and h > 10:
-            self.screen.setPixmap(pixmap.scaled(w, h, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+            view = self.screen.contentsRect()
+            if pixmap.width() <= view.width() and pixmap.height() <= view.height() and (
+                    pixmap.width() >= view.width() - 2 or pixmap.height() >= view.height() - 2):
+                # camera thread ย่อมาพอดีจอแล้ว -> วาดตรงๆ ไม่ต้อง scale บน GUI thread
+                self.screen.setPixmap(pixmap)
+            else:
+                self.screen.setPixmap(pixmap.scaled(w, h, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+    
+    def show_latest(self, slots):
+        """รับ FrameSlots จาก camera thread: วาด slot ล่าสุดโดยไม่ copy ภาพ (signal ที่ค้างเก่าจะไม่มีภาพใหม่ -> ข้าม)"""
+        frame = slots.acquire()
+        if frame is None:
+            return
+        try:
+            # QPixmap.fromImage copy ไปเป็น pixmap ระหว่างที่ slot ยังถูกจองอยู่
+            self.update_frame(frame_to_qimage(frame.array))
+        finally:
+            slots.release(frame)
+    
+    def update_memory(self, text):
+        self.mem_label.setText(text)
+        self.mem_label.setVisible(bool(text))
     
     def enable_retake(self, enabled=True):
         if hasattr(self, 'btn_retake'):
@@ -196,6 +225,8 @@ class MainUI(QMainWindow):
         self.success_count = 0
         self.pipeline_steps = {}
         self.current_order_no = None
+        self.previews = None  # PreviewService (ตั้งจาก controller) None = โหลดไฟล์ตรงๆ
+        self.preview_paths = set()  # path ที่หน้าหลักขอ preview ไว้ (service ใช้ร่วมกับ Order History)
         
         self.setup_ui()
 
@@ -311,6 +342,15 @@ class MainUI(QMainWindow):
         self.btn_retake_all.setEnabled(False)
         r_layout.addWidget(self.btn_retake_all)
         
+        self.btn_history = QPushButton("📚 Order History")
+        self.btn_history.setCursor(Qt.PointingHandCursor)
+        self.btn_history.setFixedHeight(36)
+        self.btn_history.setStyleSheet(f"""
+            QPushButton {{ background-color: {COLORS['bg_input']}; color: {COLORS['text']}; border: 1px solid {COLORS['border']}; border-radius: 6px; font-size: 13px; font-weight: bold; }}
+            QPushButton:hover {{ background-color: {COLORS['processing']}; color: #222; }}
+        """)
+        r_layout.addWidget(self.btn_history)
+        
         right_layout.addWidget(result_card)
         
         # Stats
@@ -323,11 +363,13 @@ class MainUI(QMainWindow):
         self.stat_success = StatBox("SUCCESS", COLORS['success'])
         self.stat_fail = StatBox("REJECTED", COLORS['error'])
         self.stat_rate = StatBox("YIELD RATE", COLORS['warning'])
+        self.stat_today = StatBox("ORDERS TODAY (CATALOG)", COLORS['processing'])
         
         stats_grid.addWidget(self.stat_total, 0, 0)
         stats_grid.addWidget(self.stat_success, 0, 1)
         stats_grid.addWidget(self.stat_fail, 1, 0)
         stats_grid.addWidget(self.stat_rate, 1, 1)
+        stats_grid.addWidget(self.stat_today, 2, 0, 1, 2)
         right_layout.addWidget(stats_container)
         
         # Pipeline
@@ -384,6 +426,9 @@ class MainUI(QMainWindow):
         if self.total_count > 0:
             self.stat_rate.val.setText(f"{(self.success_count / self.total_count) * 100:.1f}%")
 
+    def update_today(self, orders, images):
+        self.stat_today.val.setText(f"{orders} / {images} IMG")
+
     def animate_step(self, step, state='processing'):
         if step in self.pipeline_steps:
             self.pipeline_steps[step].set_status(state)
@@ -395,28 +440,66 @@ class MainUI(QMainWindow):
         else:
             self.result_stack.setCurrentIndex(0)
     
+    def set_preview_service(self, previews):
+        """ใช้ thumbnail จาก PreviewService (decode ใน worker) แทนการโหลดไฟล์เต็มบน GUI thread"""
+        self.previews = previews
+        previews.preview_ready.connect(self.show_preview)
+        previews.preview_failed.connect(self.show_preview_failed)
+    
+    def card_for_path(self, path, default=None):
+        """CameraCard ของภาพจากชื่อไฟล์ camN_*.jpg (ไม่เจอ = default)"""
+        match = re.search(r'cam(\d+)_', os.path.basename(path))
+        index = int(match.group(1)) - 1 if match else default
+        if index is None or not 0 <= index < len(self.hikrobot_cams):
+            return None
+        return self.hikrobot_cams[index]
+    
     def load_and_display_images(self, image_paths):
         for i, path in enumerate(image_paths):
-            if i >= len(self.hikrobot_cams):
-                break
             try:
-                if not os.path.exists(path):
+                if self.previews is not None:
+                    # ได้จาก cache ทันที หรือรอ preview_ready -> show_preview
+                    self.preview_paths.add(path)
+                    image = self.previews.request(path)
+                    if image is not None:
+                        self.show_preview(path, image)
+                    continue
+                card = self.card_for_path(path, default=i)
+                if card is None or not os.path.exists(path):
                     continue
                 pixmap = QPixmap(path)
                 if not pixmap.isNull():
-                    self.hikrobot_cams[i].update_frame(pixmap.toImage())
+                    card.update_frame(pixmap.toImage())
                     self.log(f"📷 Loaded {path}")
             except Exception as e:
                 self.log(f"❌ Error loading {path}: {e}")
     
+    def show_preview(self, path, image):
+        if path not in self.preview_paths:
+            return
+        self.preview_paths.discard(path)
+        card = self.card_for_path(path)
+        if card is not None:
+            card.update_frame(image)
+    
+    def show_preview_failed(self, path):
+        if path not in self.preview_paths:
+            return
+        self.preview_paths.discard(path)
+        card = self.card_for_path(path)
+        if card is not None:
+            card.set_active("UNREADABLE", COLORS['error'])
+        self.log(f"⚠️ Cannot read image {path}")
+    
     def enable_retake_buttons(self, enabled=True):
         self.btn_retake_all.setEnabled(enabled)
         for cam in self.hikrobot_cams:
             cam.enable_retake(enabled)
     
-    def update_main_camera(self, qt_image):
+    def update_main_camera(self, slots):
+        """ต่อกับ frame_ready ของ camera thread (FrameSlots)"""
         if hasattr(self, 'cam_main'):
-            self.cam_main.update_frame(qt_image)
+            self.cam_main.show_latest(slots)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
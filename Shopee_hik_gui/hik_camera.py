@@ -5,26 +5,77 @@ import cv2
 import numpy as np
 from ctypes import *
 from PyQt5.QtCore import QThread, pyqtSignal
-from PyQt5.QtGui import QImage
-from config import COLORS, OUTPUT_DIR, HIKROBOT_IPS
+from config import (
+    COLORS, OUTPUT_DIR, HIKROBOT_IPS, EVIDENCE_LAYOUT, EVIDENCE_HASH_CHARS,
+    LIVE_ACQUISITION_MODE, LIVE_IMAGE_NODES, LIVE_LATE_MS, LIVE_STATS_INTERVAL_S, LIVE_HALF_DEMOSAIC,
+    EVIDENCE_ENCODER, EVIDENCE_ENCODER_PER_CAMERA, EVIDENCE_QUALITY
+)
 import os
+import threading
 from datetime import datetime
+from evidence_layout import EvidenceLayout
+from frame_slots import FrameSlots
+import pixel_convert
+from image_encoder import create_encoder
 
 # พยายาม Import SDK
 try:
     sys.path.append(".")
     from MvImport.MvCameraControl_class import *
     SDK_AVAILABLE = True
+    # callback ของ MV_CC_RegisterImageCallBackEx2: (MV_FRAME_OUT*, pUser, bAutoFree)
+    FrameCallBackEx2 = get_platform_functype()(None, POINTER(MV_FRAME_OUT), c_void_p, c_bool)
 except ImportError:
     SDK_AVAILABLE = False
 
+FALLBACK_BUFFER_SIZE = 4096 * 3072 * 3  # ใช้เมื่ออ่าน PayloadSize ไม่ได้
+CALLBACK_BUFFERS = 3  # callback เขียน 1 + ภาพล่าสุดรอแปลง 1 + กำลังแปลง 1
+
+
+class FrameBufferPool:
+    """Raw frame buffer ของกล้อง 1 ตัว ขนาดตาม PayloadSize (ใช้ต่อข้าม reconnect ถ้าขนาดเท่าเดิม)"""
+    
+    def __init__(self):
+        self.buf_size = 0
+        self.count = 0
+        self.lock = threading.Lock()
+        self._free = []
+        self.allocations = 0
+        self.reuses = 0
+    
+    def ensure(self, buf_size, count):
+        """เตรียม buffer count ก้อน ขนาด buf_size return True ถ้าต้องจองใหม่"""
+        with self.lock:
+            if buf_size == self.buf_size and count == self.count and len(self._free) == count:
+                self.reuses += 1
+                return False
+            self.buf_size = buf_size
+            self.count = count
+            self._free = [np.empty(buf_size, dtype=np.uint8) for _ in range(count)]
+            self.allocations += 1
+            return True
+    
+    def acquire(self):
+        with self.lock:
+            return self._free.pop() if self._free else None
+    
+    def release(self, buf):
+        with self.lock:
+            if buf is not None and buf.size == self.buf_size and len(self._free) < self.count:
+                self._free.append(buf)
+    
+    def nbytes(self):
+        return self.buf_size * self.count
+
+
 class HikrobotCameraThread(QThread):
     """Thread สำหรับกล้อง Hikrobot แต่ละตัว"""
-    frame_received = pyqtSignal(QImage)
+    frame_ready = pyqtSignal(object)  # FrameSlots ของกล้องนี้ (GUI อ่าน slot ล่าสุดเอง ไม่ copy)
     status_changed = pyqtSignal(str, str, str)  # (text, color, border_color)
     log_message = pyqtSignal(str)
+    memory_changed = pyqtSignal(str)  # สรุปหน่วยความจำ buffer ของกล้องนี้ (แสดงบน CameraCard)
     
-    def __init__(self, camera_index=0, target_ip=None):
+    def __init__(self, camera_index=0, target_ip=None, acquisition_mode=LIVE_ACQUISITION_MODE, catalog=None, layout=None):
         super().__init__()
         self.camera_index = camera_index
         self.target_ip = target_ip
@@ -32,6 +83,30 @@ class HikrobotCameraThread(QThread):
         self.running = True
         self.save_request = None
         self.camera_name = f"Hikrobot-{camera_index + 1}"
+        self.acquisition_mode = acquisition_mode
+        # order -> folder (ใช้ layout ร่วมกับ camera server ได้ / catalog ช่วย resolve โดยไม่ต้องสแกน)
+        self.layout = layout or EvidenceLayout(OUTPUT_DIR, EVIDENCE_LAYOUT, EVIDENCE_HASH_CHARS, catalog=catalog)
+        # ภาพที่นี่แปลงเป็น RGB แล้ว -> "sdk" ใช้ไม่ได้ ใช้ OpenCV JPEG แทน
+        self.encoder = create_encoder(
+            EVIDENCE_ENCODER_PER_CAMERA.get(camera_index + 1, EVIDENCE_ENCODER), EVIDENCE_QUALITY
+        )
+        if not self.encoder.host:
+            self.encoder = create_encoder("opencv", EVIDENCE_QUALITY)
+        
+        # Callback mode: SDK thread วางภาพล่าสุดไว้ที่นี่ แล้ว QThread หยิบไปแปลง/แสดง
+        self.frame_lock = threading.Lock()
+        self.frame_event = threading.Event()
+        self.latest_frame = None  # (raw numpy, MV_FRAME_OUT_INFO_EX, perf_counter ตอนได้ภาพ)
+        self.shown_buffer = None  # raw buffer ที่ poll loop ถืออยู่ (คืน pool ตอนหยุด grab)
+        self.slots = FrameSlots()  # ภาพ RGB ที่แปลงแล้ว ส่งให้ GUI แบบ triple buffer
+        self.full_frame = None  # RGB เต็มขนาด (ใช้เมื่อต้องย่อก่อนแสดง / บันทึกภาพเต็ม)
+        self.half_frame = None  # RGB ครึ่งขนาด (preview ที่จอเล็กกว่าครึ่งภาพ)
+        self.pixel_type = None  # enPixelType ล่าสุด (log ครั้งเดียวเมื่อเปลี่ยน)
+        self.buffer_pool = FrameBufferPool()
+        self.payload_size = 0
+        self._frame_callback = None  # ต้องเก็บ reference ไว้ ไม่งั้น ctypes callback โดน GC
+        self.last_frame_num = None
+        self.live_stats = self._new_stats()
         
     def run(self):
         if not SDK_AVAILABLE:
@@ -45,60 +120,282 @@ class HikrobotCameraThread(QThread):
                 time.sleep(3)
                 continue
             
-            self.status_changed.emit("LIVE", COLORS['success'], COLORS['success'])
-            self.log_message.emit(f"✅ {self.camera_name} Connected")
+            mode = self.start_grabbing()
+            if mode is None:
+                self.close_camera()
+                time.sleep(3)
+                continue
             
-            # Buffer
-            data_buf_size = 4096 * 3072 * 3
-            data_buf = (c_ubyte * data_buf_size)()
-            stFrameInfo = MV_FRAME_OUT_INFO_EX()
+            self.status_changed.emit("LIVE", COLORS['success'], COLORS['success'])
+            self.log_message.emit(f"✅ {self.camera_name} Connected ({mode})")
             
-            # ลูปดึงภาพ
-            while self.running:
-                ret = self.cam.MV_CC_GetOneFrameTimeout(data_buf, data_buf_size, stFrameInfo, 1000)
-                
-                if ret == 0:
-                    # แปลง Raw -> RGB
-                    img_data = np.frombuffer(data_buf, count=stFrameInfo.nFrameLen, dtype=np.uint8)
-                    img_color = self.convert_image(img_data, stFrameInfo)
-                    
-                    if img_color is not None:
-                        # บันทึกภาพถ้ามีคำสั่ง
-                        if self.save_request:
-                            self.save_image(self.save_request, img_color)
-                            self.save_request = None
-                        
-                        # ส่งภาพไป GUI
-                        h, w, ch = img_color.shape
-                        bytes_per_line = ch * w
-                        qt_img = QImage(img_color.data, w, h, bytes_per_line, QImage.Format_RGB888)
-                        self.frame_received.emit(qt_img)
-                else:
-                    pass  # Timeout
+            if mode == "callback":
+                self.callback_loop()
+            else:
+                self.poll_loop()
             
             self.close_camera()
+            self._release_frames()
+    
+    def start_grabbing(self):
+        """เริ่มส่งภาพ return "callback" / "poll" หรือ None ถ้าไม่สำเร็จ"""
+        self.last_frame_num = None
+        self.latest_frame = None
+        self.frame_event.clear()
+        
+        mode = "poll"
+        self.payload_size = self._payload_size()
+        count = CALLBACK_BUFFERS if self.acquisition_mode == "callback" else 1
+        self.buffer_pool.ensure(self.payload_size, count)
+        self.memory_changed.emit(self.memory_text())
+        
+        if self.acquisition_mode == "callback":
+            # เก็บเฉพาะภาพล่าสุดใน buffer ring ของ SDK (live view ไม่ตามหลัง)
+            self.cam.MV_CC_SetImageNodeNum(LIVE_IMAGE_NODES)
+            self.cam.MV_CC_SetGrabStrategy(MV_GrabStrategy_LatestImagesOnly)
+            if self._frame_callback is None:
+                self._frame_callback = FrameCallBackEx2(self._on_frame)
+            # bAutoFree=True: SDK คืน buffer ให้เองหลัง callback return
+            ret = self.cam.MV_CC_RegisterImageCallBackEx2(self._frame_callback, None, True)
+            if ret == 0:
+                mode = "callback"
+            else:
+                self.log_message.emit(f"⚠️ {self.camera_name}: Register callback failed 0x{ret:08X} - using poll")
+        
+        ret = self.cam.MV_CC_StartGrabbing()
+        if ret != 0:
+            self.log_message.emit(f"❌ {self.camera_name}: Start Grabbing Failed")
+            return None
+        return mode
+    
+    def _payload_size(self):
+        """ขนาด raw frame สูงสุดจากกล้อง (PayloadSize) แบบเดียวกับ cv.py"""
+        value = MVCC_INTVALUE()
+        memset(byref(value), 0, sizeof(value))
+        if self.cam.MV_CC_GetIntValue("PayloadSize", value) == 0 and value.nCurValue > 0:
+            return value.nCurValue
+        self.log_message.emit(f"⚠️ {self.camera_name}: PayloadSize unavailable - using {FALLBACK_BUFFER_SIZE / 1e6:.0f} MB buffer")
+        return FALLBACK_BUFFER_SIZE
     
-    def convert_image(self, img_data, stFrameInfo):
-        """แปลงภาพจาก Raw Format"""
+    def memory_report(self):
+        pool = self.buffer_pool
+        return {
+            "payload": self.payload_size,
+            "buffers": pool.count,
+            "pool_bytes": pool.nbytes(),
+            "allocations": pool.allocations,
+            "reuses": pool.reuses,
+        }
+    
+    def memory_text(self):
+        report = self.memory_report()
+        return (
+            f"🧠 {report['buffers']}×{report['payload'] / 1e6:.1f} MB = {report['pool_bytes'] / 1e6:.1f} MB "
+            f"(alloc {report['allocations']}, reuse {report['reuses']})"
+        )
+    
+    def _on_frame(self, pstFrame, pUser, bAutoFree):
+        """รันใน thread ของ SDK: copy raw frame ลง buffer ของ pool แล้วรีบ return (ถือ GIL สั้นที่สุด)"""
+        data = None
         try:
-            if stFrameInfo.enPixelType == PixelType_Gvsp_Mono8:
-                img_data = img_data.reshape((stFrameInfo.nHeight, stFrameInfo.nWidth))
-                return cv2.cvtColor(img_data, cv2.COLOR_GRAY2RGB)
+            frame = pstFrame.contents
+            n = frame.stFrameInfo.nFrameLen
+            data = self.buffer_pool.acquire()
+            if data is None or n > data.size:
+                with self.frame_lock:
+                    self.live_stats["skipped"] += 1
+                return
+            info = MV_FRAME_OUT_INFO_EX()
+            memmove(byref(info), byref(frame.stFrameInfo), sizeof(info))
+            memmove(data.ctypes.data, frame.pBufAddr, n)
             
-            elif stFrameInfo.enPixelType == PixelType_Gvsp_BayerRG8:
-                img_data = img_data.reshape((stFrameInfo.nHeight, stFrameInfo.nWidth))
-                return cv2.cvtColor(img_data, cv2.COLOR_BayerRG2RGB)
+            with self.frame_lock:
+                self._count_frame(info)
+                previous = self.latest_frame
+                if previous is not None:
+                    self.live_stats["skipped"] += 1  # GUI ยังไม่ได้หยิบภาพก่อนหน้า -> ทับด้วยภาพใหม่
+                self.latest_frame = (data, info, time.perf_counter())
+            data = None  # ส่งต่อให้ callback_loop แล้ว
+            if previous is not None:
+                self.buffer_pool.release(previous[0])
+            self.frame_event.set()
+        except Exception:
+            # ห้ามโยน exception กลับเข้า SDK -> นับไว้แล้วรายงานใน _report_stats
+            with self.frame_lock:
+                self.live_stats["errors"] += 1
+        finally:
+            if data is not None:
+                self.buffer_pool.release(data)  # ไม่คืน = pool หมด live view ค้าง
+    
+    def _release_frames(self):
+        """คืน buffer ทั้งหมดเข้า pool หลังหยุด grab (ใช้ต่อตอน reconnect)"""
+        with self.frame_lock:
+            item = self.latest_frame
+            self.latest_frame = None
+        if item is not None:
+            self.buffer_pool.release(item[0])
+        self.buffer_pool.release(self.shown_buffer)
+        self.shown_buffer = None
+    
+    def callback_loop(self):
+        """หยิบภาพล่าสุดจาก callback มาแปลงและส่ง GUI (ภาพที่มาระหว่างนั้นถูกข้าม)"""
+        while self.running:
+            if not self.frame_event.wait(1.0):
+                self._report_stats()
+                continue
+            self.frame_event.clear()
+            with self.frame_lock:
+                item = self.latest_frame
+                self.latest_frame = None
+            if item is None:
+                continue
             
-            elif stFrameInfo.enPixelType == PixelType_Gvsp_BayerGB8:
-                img_data = img_data.reshape((stFrameInfo.nHeight, stFrameInfo.nWidth))
-                return cv2.cvtColor(img_data, cv2.COLOR_BayerGB2RGB)
+            data, info, t_arrived = item
+            try:
+                self.publish(data[:info.nFrameLen], info, t_arrived)
+            finally:
+                # แปลงลง slot แล้ว ไม่มีใครอ้าง raw buffer อีก -> คืน pool ทันที
+                self.buffer_pool.release(data)
+            self._report_stats()
+    
+    def poll_loop(self):
+        """ดึงภาพด้วย MV_CC_GetOneFrameTimeout (แบบเดิม)"""
+        # Buffer (ขนาด PayloadSize จาก pool)
+        data_buf = self.buffer_pool.acquire()
+        self.shown_buffer = data_buf  # คืน pool ใน _release_frames
+        data_buf_size = data_buf.size
+        data_ptr = data_buf.ctypes.data_as(POINTER(c_ubyte))
+        stFrameInfo = MV_FRAME_OUT_INFO_EX()
+        
+        # ลูปดึงภาพ
+        while self.running:
+            ret = self.cam.MV_CC_GetOneFrameTimeout(data_ptr, data_buf_size, stFrameInfo, 1000)
             
+            if ret == 0:
+                t_arrived = time.perf_counter()
+                with self.frame_lock:
+                    self._count_frame(stFrameInfo)
+                self.publish(data_buf[:stFrameInfo.nFrameLen], stFrameInfo, t_arrived)
+            else:
+                pass  # Timeout
+            self._report_stats()
+    
+    def set_view_size(self, width, height):
+        """ขนาดพื้นที่แสดงภาพของ card ที่ต่อกับ thread นี้: ย่อภาพให้พอดีจอก่อนส่ง GUI"""
+        self.slots.set_view_size(width, height)
+    
+    def publish(self, img_data, info, t_arrived):
+        """แปลง Raw -> RGB (ย่อให้พอดีจอ) ลง slot ว่าง บันทึกภาพ (ถ้ามีคำสั่ง) แล้วแจ้ง GUI"""
+        shape = (info.nHeight, info.nWidth, 3)
+        render = self.slots.should_render()
+        if not render:
+            # เกิน PREVIEW_FPS: ไม่แปลงภาพ ยกเว้นมีคำสั่งบันทึก
+            if self.save_request:
+                self._save_full(img_data, info, shape)
+            return
+        
+        display = self.slots.display_shape(info.nHeight, info.nWidth)
+        full = None
+        if display == shape[:2]:
+            # ไม่ต้องย่อ -> แปลงลง slot โดยตรง
+            index, full = self.slots.begin_write(shape)
+            if self.convert_image(img_data, info, dst=full) is None:
+                return
+        elif LIVE_HALF_DEMOSAIC and not self.save_request and display[0] * 2 <= info.nHeight:
+            # จอเล็กกว่าครึ่งภาพ: แปลงครึ่งขนาด (Bayer ไม่ต้อง demosaic เต็ม) แล้วย่อต่อ
+            half_shape = pixel_convert.output_shape(info.nWidth, info.nHeight, half=True)
+            if self.half_frame is None or self.half_frame.shape != half_shape:
+                self.half_frame = np.empty(half_shape, dtype=np.uint8)
+            if self.convert_image(img_data, info, dst=self.half_frame, half=True) is None:
+                return
+            index = self.slots.write_resized(self.half_frame)
+        else:
+            # แปลงเต็มขนาดลง buffer เดิม แล้วย่อลง slot (Bayer ต้อง demosaic ก่อนย่อ)
+            full = self._convert_full(img_data, info, shape)
+            if full is None:
+                return
+            index = self.slots.write_resized(full)
+        
+        # บันทึกภาพถ้ามีคำสั่ง (เต็มขนาดเสมอ)
+        if self.save_request and full is not None:
+            self.save_image(self.save_request, full)
+            self.save_request = None
+        
+        # ส่งภาพไป GUI (emit เฉพาะเมื่อไม่มี signal ค้างอยู่)
+        if self.slots.publish(index):
+            self.frame_ready.emit(self.slots)
+        with self.frame_lock:
+            self._count_shown(t_arrived)
+    
+    def _convert_full(self, img_data, info, shape):
+        if self.full_frame is None or self.full_frame.shape != shape:
+            self.full_frame = np.empty(shape, dtype=np.uint8)
+        return self.convert_image(img_data, info, dst=self.full_frame)
+    
+    def _save_full(self, img_data, info, shape):
+        full = self._convert_full(img_data, info, shape)
+        if full is not None:
+            self.save_image(self.save_request, full)
+            self.save_request = None
+    
+    # ---------- Live view stats ----------
+    def _new_stats(self):
+        return {"received": 0, "shown": 0, "skipped": 0, "lost": 0, "late": 0, "errors": 0, "since": time.monotonic()}
+    
+    def _count_frame(self, info):
+        """นับภาพที่ได้ + ภาพที่หายก่อนถึง host (เลขเฟรมกระโดด) - เรียกขณะถือ frame_lock"""
+        stats = self.live_stats
+        stats["received"] += 1
+        if self.last_frame_num is not None and info.nFrameNum > self.last_frame_num + 1:
+            stats["lost"] += info.nFrameNum - self.last_frame_num - 1
+        self.last_frame_num = info.nFrameNum
+    
+    def _count_shown(self, t_arrived):
+        stats = self.live_stats
+        stats["shown"] += 1
+        if (time.perf_counter() - t_arrived) * 1000 > LIVE_LATE_MS:
+            stats["late"] += 1
+    
+    def get_live_stats(self):
+        """สถิติตั้งแต่ log ครั้งล่าสุด: received / shown / skipped / lost / late / errors / fps"""
+        with self.frame_lock:
+            stats = dict(self.live_stats)
+        elapsed = max(time.monotonic() - stats.pop("since"), 1e-6)
+        stats["fps"] = round(stats["shown"] / elapsed, 1)
+        return stats
+    
+    def _report_stats(self):
+        if not LIVE_STATS_INTERVAL_S or time.monotonic() - self.live_stats["since"] < LIVE_STATS_INTERVAL_S:
+            return
+        stats = self.get_live_stats()
+        view = self.slots.take_stats()
+        with self.frame_lock:
+            self.live_stats = self._new_stats()
+        if stats["received"] == 0 and stats["errors"] == 0:
+            return
+        warn = "⚠️" if stats["lost"] or stats["late"] or stats["errors"] else "📊"
+        self.log_message.emit(
+            f"{warn} {self.camera_name}: {stats['fps']} fps | received {stats['received']} | "
+            f"shown {stats['shown']} | skipped {stats['skipped']} | lost {stats['lost']} | late {stats['late']} | "
+            f"errors {stats['errors']} | "
+            f"displayed {view['displayed_fps']} fps | throttled {view['throttled']}"
+        )
+    
+    def convert_image(self, img_data, stFrameInfo, dst=None, half=False):
+        """แปลงภาพจาก Raw Format ตาม enPixelType (dst = array RGB ปลายทาง เขียนลงไปตรงๆ ไม่จองใหม่)"""
+        pixel_type = stFrameInfo.enPixelType
+        if pixel_type != self.pixel_type:
+            self.pixel_type = pixel_type
+            name = pixel_convert.PIXEL_TYPE_NAMES.get(pixel_type)
+            if name:
+                self.log_message.emit(f"🎨 {self.camera_name}: Pixel format {name}")
             else:
-                img_data = img_data.reshape((stFrameInfo.nHeight, stFrameInfo.nWidth, -1))
-                if img_data.shape[2] == 1:
-                    return cv2.cvtColor(img_data, cv2.COLOR_GRAY2RGB)
-                return img_data
-        except:
+                self.log_message.emit(f"⚠️ {self.camera_name}: Unsupported pixel format 0x{pixel_type:08X}")
+        try:
+            return pixel_convert.convert(
+                img_data, stFrameInfo.nWidth, stFrameInfo.nHeight, pixel_type, dst=dst, half=half
+            )
+        except (ValueError, cv2.error):
             return None
     
     def init_camera(self):
@@ -106,7 +403,10 @@ class HikrobotCameraThread(QThread):
         try:
             device_list = MV_CC_DEVICE_INFO_LIST()
             ret = MvCamera.MV_CC_EnumDevices(MV_GIGE_DEVICE | MV_USB_DEVICE, device_list)
-            
+            if ret != 0:
+                self.log_message.emit(f"❌ {self.camera_name}: Enum Devices Failed 0x{ret:08X}")
+                return False
+
             if device_list.nDeviceNum == 0:
                 self.log_message.emit(f"❌ {self.camera_name}: No Device Found")
                 return False
@@ -137,12 +437,6 @@ class HikrobotCameraThread(QThread):
             if int(nPacketSize) > 0:
                 self.cam.MV_CC_SetIntValue("GevSCPSPacketSize", int(nPacketSize))
             
-            # เริ่มส่งภาพ
-            ret = self.cam.MV_CC_StartGrabbing()
-            if ret != 0:
-                self.log_message.emit(f"❌ {self.camera_name}: Start Grabbing Failed")
-                return False
-            
             return True
         except Exception as e:
             self.log_message.emit(f"❌ {self.camera_name} Init Error: {e}")
@@ -166,13 +460,15 @@ class HikrobotCameraThread(QThread):
     def save_image(self, order_no, img_array):
         """บันทึกภาพ"""
         try:
-            folder = os.path.join(OUTPUT_DIR, order_no)
+            folder = self.layout.folder_for(order_no)
             os.makedirs(folder, exist_ok=True)
             ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = os.path.join(folder, f"{self.camera_name}_{ts}.jpg")
+            filename = os.path.join(folder, f"{self.camera_name}_{ts}{self.encoder.ext}")
             
             save_img = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
-            cv2.imwrite(filename, save_img)
+            data = self.encoder.encode(save_img)
+            with open(filename, "wb") as f:
+                f.write(data)
             self.log_message.emit(f"✅ {self.camera_name} Saved: {filename}")
             self.status_changed.emit("CAPTURED", COLORS['success'], COLORS['success'])
         except Exception as e:
@@ -185,19 +481,24 @@ class HikrobotCameraThread(QThread):
         
         while self.running:
             try:
-                img = np.zeros((480, 640, 3), dtype=np.uint8)
-                img[:] = (30, 30, 30)
-                
-                noise = np.random.randint(0, 40, (480, 640, 3), dtype=np.uint8)
-                img = cv2.add(img, noise)
-                
-                cv2.putText(img, f"{self.camera_name}", (150, 240), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 255, 255), 2)
-                cv2.putText(img, "SIMULATION", (180, 280), cv2.FONT_HERSHEY_SIMPLEX, 1, (100, 200, 255), 2)
-                
-                h, w, ch = img.shape
-                img_copy = img.copy()
-                qt_img = QImage(img_copy.data, w, h, ch * w, QImage.Format_RGB888).copy()
-                self.frame_received.emit(qt_img)
+                # วาดเฉพาะเฟรมที่จะได้แสดง (PREVIEW_FPS)
+                if self.slots.should_render():
+                    if self.full_frame is None:
+                        self.full_frame = np.empty((480, 640, 3), dtype=np.uint8)
+                    img = self.full_frame
+                    img[:] = (30, 30, 30)
+                    
+                    noise = np.random.randint(0, 40, (480, 640, 3), dtype=np.uint8)
+                    cv2.add(img, noise, dst=img)
+                    
+                    cv2.putText(img, f"{self.camera_name}", (150, 240), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 255, 255), 2)
+                    cv2.putText(img, "SIMULATION", (180, 280), cv2.FONT_HERSHEY_SIMPLEX, 1, (100, 200, 255), 2)
+                    
+                    if self.slots.publish(self.slots.write_resized(img)):
+                        self.frame_ready.emit(self.slots)
+                report = self.slots.report()
+                if report:
+                    self.log_message.emit(f"📊 {self.camera_name}: {report}")
                 
                 if self.save_request:
                     self.log_message.emit(f"📸 (Sim) {self.camera_name} Saved {self.save_request}")
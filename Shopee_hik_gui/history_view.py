@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+"""
+Order History - ค้นหา / ดูภาพหลักฐานของ order ย้อนหลังจาก evidence catalog
+- ค้นหาด้วย prefix ของเลข order (range scan บน primary key) + เลือกวัน (หรือทุกวัน)
+- grid แบบ virtual: model ดึง order จาก catalog ทีละหน้า (HISTORY_PAGE_SIZE) เมื่อ view ต้องใช้
+  และขอ thumbnail เฉพาะแถวที่มองเห็นหลังหยุดเลื่อน -> วันละหลายหมื่น order ก็ไม่หน่วง
+- thumbnail เก็บบน disk (THUMB_CACHE_DIR) เปิดซ้ำไม่ต้อง decode ภาพเต็มอีก
+- เลือก order -> แสดงภาพล่าสุดของทุกกล้องใน CameraCard (ภาพขนาด preview จาก PreviewService)
+"""
+
+import os
+import time
+from datetime import datetime
+from PyQt5.QtWidgets import *
+from PyQt5.QtGui import QPixmap, QColor, QDesktopServices
+from PyQt5.QtCore import Qt, QTimer, QSize, QDate, QUrl, QAbstractListModel, QModelIndex
+from config import (
+    COLORS, FONTS, THUMB_SIZE, THUMB_CACHE_SIZE, THUMB_CACHE_DIR, THUMB_CACHE_DAYS, HISTORY_PAGE_SIZE
+)
+from gui_app import CameraCard
+from preview_service import PreviewService, prune_disk_cache
+
+GRID_PADDING = (24, 44)  # พื้นที่รอบ thumbnail ใน grid (ข้อความ 2 บรรทัดใต้ภาพ)
+THUMB_REQUEST_DELAY_MS = 80  # รอหยุดเลื่อนก่อนขอ thumbnail
+SEARCH_DELAY_MS = 250
+
+
+class OrderHistoryModel(QAbstractListModel):
+    """order จาก catalog แบบ lazy: query ทีละหน้าเมื่อ view ต้องใช้ (ไม่โหลดทั้งวันเข้า memory)"""
+
+    def __init__(self, catalog, thumbs, page_size=HISTORY_PAGE_SIZE):
+        super().__init__()
+        self.catalog = catalog
+        self.thumbs = thumbs
+        self.page_size = page_size
+        self.filter = ("", None, None)
+        self.count = 0
+        self.pages = {}         # เลขหน้า -> list ของ order (dict จาก catalog.orders_page)
+        self.keys = {0: None}   # เลขหน้า -> key (last_captured, order_no) ของแถวก่อนหน้านั้น (keyset)
+        self.waiting = {}       # thumb path -> row ที่รอ thumbnail
+        self.failed = set()     # thumb path ที่ decode ไม่ได้ (แสดง unreadable ไม่ขอซ้ำ)
+        self.placeholder = QPixmap(*THUMB_SIZE)
+        self.placeholder.fill(QColor(COLORS['bg_input']))
+        self.unreadable = QPixmap(*THUMB_SIZE)
+        self.unreadable.fill(QColor(COLORS['error']))
+        thumbs.preview_ready.connect(self._thumb_ready)
+        thumbs.preview_failed.connect(self._thumb_failed)
+
+    def set_filter(self, prefix="", start=None, end=None):
+        """เปลี่ยนเงื่อนไขค้นหา return จำนวน order ทั้งหมด (นับใน DB ไม่ดึงข้อมูล)"""
+        self.beginResetModel()
+        self.filter = (prefix, start, end)
+        self.pages = {}
+        self.keys = {0: None}
+        self.waiting = {}
+        self.failed = set()
+        self.count = self.catalog.count_orders(prefix, start, end)
+        self.endResetModel()
+        return self.count
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.count
+
+    def order_at(self, row):
+        page, offset = divmod(row, self.page_size)
+        if page not in self.pages:
+            prefix, start, end = self.filter
+            if page > 0 and self._page_key(page) is None:
+                rows = []  # เกินแถวสุดท้าย (มีการลบ order ระหว่างเปิดดู)
+            else:
+                rows = self.catalog.orders_page(prefix, start, end, self.keys[page], self.page_size)
+            self.pages[page] = rows
+            if len(rows) == self.page_size:
+                self.keys.setdefault(page + 1, (rows[-1]["last_captured"], rows[-1]["order_no"]))
+        rows = self.pages[page]
+        return rows[offset] if offset < len(rows) else None
+
+    def _page_key(self, page):
+        """key ก่อนหน้า page: เลื่อนต่อเนื่องได้จากหน้าก่อน / กระโดดไกลข้าม key จากหน้าที่ใกล้สุดที่รู้"""
+        if page not in self.keys:
+            known = max(p for p in self.keys if p < page)
+            prefix, start, end = self.filter
+            self.keys[page] = self.catalog.order_key_after(
+                prefix, start, end, self.keys[known], (page - known) * self.page_size - 1
+            )
+        return self.keys[page]
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        order = self.order_at(index.row())
+        if order is None:
+            return None
+        if role == Qt.DisplayRole:
+            return f"{order['order_no']}\n{datetime.fromtimestamp(order['last_captured']):%d/%m %H:%M:%S}"
+        if role == Qt.DecorationRole:
+            # cache อย่างเดียว - การ decode ขอผ่าน request_thumbnails (เฉพาะแถวที่มองเห็น)
+            if order["thumb_path"] in self.failed:
+                return self.unreadable
+            image = self.thumbs.get(order["thumb_path"]) if order["thumb_path"] else None
+            return image if image is not None else self.placeholder
+        if role == Qt.ToolTipRole:
+            if order["thumb_path"] in self.failed:
+                return f"{order['order_no']} - {order['image_count']} image(s) - image unreadable"
+            return f"{order['order_no']} - {order['image_count']} image(s)"
+        if role == Qt.UserRole:
+            return order
+        return None
+
+    def request_thumbnails(self, first, last):
+        """ขอ thumbnail ของแถว first..last ที่ยังไม่มีใน cache"""
+        for row in range(max(first, 0), min(last, self.count - 1) + 1):
+            order = self.order_at(row)
+            path = order["thumb_path"] if order else None
+            if path and path not in self.failed and self.thumbs.request(path) is None:
+                self.waiting[path] = row
+
+    def _thumb_ready(self, path, image):
+        row = self.waiting.pop(path, None)
+        if row is not None and row < self.count:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+    def _thumb_failed(self, path):
+        row = self.waiting.pop(path, None)
+        if row is not None:
+            self.failed.add(path)
+            if row < self.count:
+                index = self.index(row)
+                self.dataChanged.emit(index, index, [Qt.DecorationRole, Qt.ToolTipRole])
+
+
+class OrderHistoryWindow(QDialog):
+    def __init__(self, catalog, previews, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Order History")
+        self.resize(1200, 780)
+        self.setStyleSheet(f"background-color: {COLORS['bg_app']};")
+
+        self.catalog = catalog
+        self.previews = previews  # ภาพขนาด preview ของ order ที่เลือก (ใช้ร่วมกับหน้าหลัก)
+        self.thumbs = PreviewService(box=THUMB_SIZE, cache_size=THUMB_CACHE_SIZE, disk_cache=THUMB_CACHE_DIR)
+        self.thumbs.executor.submit(prune_disk_cache, THUMB_CACHE_DIR, THUMB_CACHE_DAYS)
+        self.model = OrderHistoryModel(catalog, self.thumbs)
+        self.detail_paths = {}  # path -> CameraCard ของ order ที่เลือก
+        self.detail_folder = None
+
+        self.search_timer = QTimer(self, singleShot=True, interval=SEARCH_DELAY_MS, timeout=self.refresh)
+        self.thumb_timer = QTimer(self, singleShot=True, interval=THUMB_REQUEST_DELAY_MS, timeout=self.request_visible)
+
+        self.setup_ui()
+        self.previews.preview_ready.connect(self._detail_ready)
+        self.previews.preview_failed.connect(self._detail_failed)
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(15, 15, 15, 15)
+        layout.setSpacing(10)
+
+        input_style = f"background-color: {COLORS['bg_input']}; color: {COLORS['text']}; border: 1px solid {COLORS['border']}; border-radius: 6px; padding: 6px; font-size: 13px;"
+
+        # Search bar
+        bar = QHBoxLayout()
+        self.search = QLineEdit()
+        self.search.setPlaceholderText("🔍 Order No. (prefix)")
+        self.search.setStyleSheet(input_style + f" font-family: {FONTS['mono']};")
+        self.search.textChanged.connect(lambda _: self.search_timer.start())
+        bar.addWidget(self.search, stretch=1)
+
+        self.date = QDateEdit(QDate.currentDate())
+        self.date.setCalendarPopup(True)
+        self.date.setDisplayFormat("dd/MM/yyyy")
+        self.date.setStyleSheet(input_style)
+        self.date.dateChanged.connect(lambda _: self.refresh())
+        bar.addWidget(self.date)
+
+        self.chk_all = QCheckBox("All dates")
+        self.chk_all.setStyleSheet(f"color: {COLORS['text_dim']}; font-size: 12px;")
+        self.chk_all.toggled.connect(self._all_dates_toggled)
+        bar.addWidget(self.chk_all)
+
+        self.lbl_count = QLabel("")
+        self.lbl_count.setStyleSheet(f"color: {COLORS['text_dim']}; font-size: 12px; font-weight: bold;")
+        bar.addWidget(self.lbl_count)
+        layout.addLayout(bar)
+
+        # Grid (virtual: วาด/ขอ thumbnail เฉพาะแถวที่มองเห็น)
+        self.grid = QListView()
+        self.grid.setViewMode(QListView.IconMode)
+        self.grid.setMovement(QListView.Static)
+        self.grid.setResizeMode(QListView.Adjust)
+        self.grid.setWrapping(True)
+        self.grid.setUniformItemSizes(True)
+        self.grid.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.grid.setIconSize(QSize(*THUMB_SIZE))
+        self.grid.setGridSize(QSize(THUMB_SIZE[0] + GRID_PADDING[0], THUMB_SIZE[1] + GRID_PADDING[1]))
+        self.grid.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.grid.setStyleSheet(f"""
+            QListView {{ background-color: {COLORS['bg_card']}; color: {COLORS['text']}; border: 1px solid {COLORS['border']}; border-radius: 8px; font-family: {FONTS['mono']}; font-size: 11px; }}
+            QListView::item:selected {{ background-color: {COLORS['active_bg']}; border: 1px solid {COLORS['processing']}; border-radius: 4px; }}
+        """)
+        self.grid.setModel(self.model)
+        self.grid.verticalScrollBar().valueChanged.connect(lambda _: self.thumb_timer.start())
+        self.grid.selectionModel().currentChanged.connect(self.show_order)
+        layout.addWidget(self.grid, stretch=3)
+
+        # Detail: ภาพทุกกล้องของ order ที่เลือก
+        detail = QFrame()
+        detail.setStyleSheet(f"QFrame {{ background-color: {COLORS['bg_card']}; border-radius: 10px; border: 1px solid {COLORS['border']}; }}")
+        d_layout = QVBoxLayout(detail)
+        d_layout.setContentsMargins(10, 10, 10, 10)
+
+        header = QHBoxLayout()
+        self.lbl_order = QLabel("SELECT AN ORDER")
+        self.lbl_order.setStyleSheet(f"color: {COLORS['shopee']}; font-size: 18px; font-weight: bold; font-family: {FONTS['mono']}; border: none; background: transparent;")
+        header.addWidget(self.lbl_order)
+        header.addStretch()
+        self.btn_folder = QPushButton("📂 Open Folder")
+        self.btn_folder.setCursor(Qt.PointingHandCursor)
+        self.btn_folder.setStyleSheet(f"""
+            QPushButton {{ background-color: {COLORS['bg_input']}; color: {COLORS['text']}; border: 1px solid {COLORS['border']}; border-radius: 4px; padding: 6px 12px; font-size: 11px; font-weight: bold; }}
+            QPushButton:hover {{ background-color: {COLORS['processing']}; color: #222; }}
+            QPushButton:disabled {{ color: {COLORS['text_dim']}; }}
+        """)
+        self.btn_folder.setEnabled(False)
+        self.btn_folder.clicked.connect(self.open_folder)
+        header.addWidget(self.btn_folder)
+        d_layout.addLayout(header)
+
+        cards = QHBoxLayout()
+        cards.setSpacing(8)
+        self.cards = []
+        for i in range(4):
+            card = CameraCard(f"Hikrobot-{i + 1}", "👁️", camera_index=i)
+            card.btn_retake.hide()
+            card.set_active("—")
+            self.cards.append(card)
+            cards.addWidget(card, stretch=1)
+        d_layout.addLayout(cards, stretch=1)
+        layout.addWidget(detail, stretch=2)
+
+    # ---------- Search ----------
+    def _all_dates_toggled(self, checked):
+        self.date.setEnabled(not checked)
+        self.refresh()
+
+    def refresh(self):
+        """query จำนวน order ตามเงื่อนไข (หน้าแรกดึงตอน view วาด)"""
+        prefix = self.search.text().strip().upper()
+        start = end = None
+        if not self.chk_all.isChecked():
+            day = self.date.date().toPyDate()
+            start = datetime(day.year, day.month, day.day).timestamp()
+            end = start + 86400
+        t0 = time.perf_counter()
+        try:
+            count = self.model.set_filter(prefix, start, end)
+        except Exception as e:
+            self.lbl_count.setText(f"❌ {e}")
+            return
+        self.lbl_count.setText(f"{count:,} order(s) · {(time.perf_counter() - t0) * 1000:.0f} ms")
+        self.grid.scrollToTop()
+        self.thumb_timer.start()
+
+    def request_visible(self):
+        """ขอ thumbnail เฉพาะแถวที่อยู่ในจอ (+1 แถวล่วงหน้า) - คำนวณจาก grid size ไม่ต้องถาม view ทีละ item"""
+        if not self.model.count:
+            return
+        cell = self.grid.gridSize()
+        viewport = self.grid.viewport()
+        cols = max(1, viewport.width() // cell.width())
+        top = self.grid.verticalScrollBar().value()
+        first_line = top // cell.height()
+        last_line = (top + viewport.height()) // cell.height() + 1
+        self.model.request_thumbnails(first_line * cols, (last_line + 1) * cols - 1)
+
+    # ---------- Detail ----------
+    def show_order(self, current, _previous=None):
+        order = current.data(Qt.UserRole) if current.isValid() else None
+        if not order:
+            return
+        images = self.catalog.order_images(order["order_no"])
+        self.lbl_order.setText(
+            f"{order['order_no']}  ·  {datetime.fromtimestamp(order['last_captured']):%d/%m/%Y %H:%M:%S}"
+        )
+        self.detail_paths = {}
+        self.detail_folder = os.path.dirname(images[0]["path"]) if images else None
+        self.btn_folder.setEnabled(bool(self.detail_folder and os.path.isdir(self.detail_folder)))
+
+        for card in self.cards:
+            card.set_active("NO IMAGE")
+        for image in images:
+            index = image["cam"] - 1
+            if not 0 <= index < len(self.cards):
+                continue
+            card = self.cards[index]
+            path = image["path"]
+            if not os.path.exists(path):
+                card.set_active("FILE MISSING", COLORS['error'])
+                continue
+            card.set_active("LOADING...")
+            card.set_preview_mode(f"{datetime.fromtimestamp(image['captured_at']):%H:%M:%S}", COLORS['processing'])
+            self.detail_paths[path] = card
+            preview = self.previews.request(path)
+            if preview is not None:
+                card.update_frame(preview)
+
+    def _detail_ready(self, path, image):
+        card = self.detail_paths.get(path)
+        if card is not None:
+            card.update_frame(image)
+
+    def _detail_failed(self, path):
+        card = self.detail_paths.get(path)
+        if card is not None:
+            card.set_active("UNREADABLE", COLORS['error'])
+
+    def open_folder(self):
+        if self.detail_folder:
+            QDesktopServices.openUrl(QUrl.fromLocalFile(os.path.abspath(self.detail_folder)))
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()  # มี order ใหม่ตั้งแต่เปิดครั้งก่อน
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.thumb_timer.start()
+
+    def shutdown(self):
+        self.thumbs.close()
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Image Encoder - เลือกวิธี encode ภาพหลักฐานได้ต่อกล้อง
+- "sdk"    : MV_CC_SaveImageEx2 (JPEG จาก SDK ของ Hikrobot ใช้ raw frame ตรงๆ) - camera_server เรียกเอง
+- "opencv" : cv2.imencode JPEG
+- "turbo"  : libjpeg-turbo ผ่าน simplejpeg หรือ PyTurboJPEG (ถ้าติดตั้ง) ไม่มี = ใช้ opencv แทน
+- "png"    : lossless (ไฟล์ใหญ่ เหมาะกับงานที่ต้องการภาพไม่เสีย)
+- "webp"   : ไฟล์เล็กกว่า JPEG ที่คุณภาพใกล้กัน แต่ encode ช้ากว่า
+
+host encoder รับภาพ BGR uint8 (จาก pixel_convert.convert(..., bgr=True)) แล้ว return bytes-like
+เทียบความเร็ว/ขนาด: python benchmarks/bench_encoders.py
+"""
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+PNG_COMPRESSION = 1  # 0-9 (1 = เร็ว ไฟล์ใหญ่ขึ้นเล็กน้อย)
+
+
+class ImageEncoder:
+    """Base: name ใช้ใน config, ext = นามสกุลไฟล์, host=False = encode ใน SDK (ไม่ผ่าน encode())"""
+    name = ""
+    ext = ".jpg"
+    host = True
+
+    def __init__(self, quality=90):
+        self.quality = quality
+
+    @classmethod
+    def available(cls):
+        return True
+
+    def encode(self, image):
+        """ภาพ BGR (h, w, 3) uint8 -> bytes-like"""
+        raise NotImplementedError
+
+
+class SdkJpegEncoder(ImageEncoder):
+    name = "sdk"
+    host = False
+
+    def encode(self, image):
+        raise RuntimeError("SDK encoder works on raw frames (MV_CC_SaveImageEx2)")
+
+
+class OpenCvJpegEncoder(ImageEncoder):
+    name = "opencv"
+
+    def __init__(self, quality=90):
+        super().__init__(quality)
+        self.params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+
+    def encode(self, image):
+        ok, data = cv2.imencode(".jpg", image, self.params)
+        if not ok:
+            raise RuntimeError("cv2.imencode failed")
+        return data
+
+
+class TurboJpegEncoder(ImageEncoder):
+    name = "turbo"
+
+    def __init__(self, quality=90):
+        super().__init__(quality)
+        self._encode = _load_turbo()
+
+    @classmethod
+    def available(cls):
+        return _load_turbo() is not None
+
+    def encode(self, image):
+        return self._encode(np.ascontiguousarray(image), self.quality)
+
+
+class PngEncoder(ImageEncoder):
+    name = "png"
+    ext = ".png"
+
+    def encode(self, image):
+        ok, data = cv2.imencode(".png", image, [cv2.IMWRITE_PNG_COMPRESSION, PNG_COMPRESSION])
+        if not ok:
+            raise RuntimeError("cv2.imencode failed")
+        return data
+
+
+class WebpEncoder(ImageEncoder):
+    name = "webp"
+    ext = ".webp"
+
+    def encode(self, image):
+        ok, data = cv2.imencode(".webp", image, [cv2.IMWRITE_WEBP_QUALITY, int(self.quality)])
+        if not ok:
+            raise RuntimeError("cv2.imencode failed")
+        return data
+
+
+_turbo = []
+
+
+def _load_turbo():
+    """ฟังก์ชัน encode(image_bgr, quality) ของ libjpeg-turbo ที่ติดตั้งอยู่ หรือ None"""
+    if not _turbo:
+        encode = None
+        try:
+            import simplejpeg
+            encode = lambda image, quality: simplejpeg.encode_jpeg(image, quality, colorspace="BGR")
+        except ImportError:
+            try:
+                from turbojpeg import TurboJPEG
+                jpeg = TurboJPEG()
+                encode = lambda image, quality: jpeg.encode(image, quality=quality)
+            except (ImportError, OSError):  # OSError = ไม่มี libturbojpeg
+                pass
+        _turbo.append(encode)
+    return _turbo[0]
+
+
+ENCODERS = {cls.name: cls for cls in (SdkJpegEncoder, OpenCvJpegEncoder, TurboJpegEncoder, PngEncoder, WebpEncoder)}
+
+
+def available_encoders():
+    return [name for name, cls in ENCODERS.items() if cls.available()]
+
+
+def create_encoder(name, quality=90, fallback="opencv"):
+    """สร้าง encoder ตามชื่อ (ชื่อไม่รู้จัก / library ไม่มี -> fallback)"""
+    cls = ENCODERS.get(name)
+    if cls is None or not cls.available():
+        cls = ENCODERS[fallback]
+    return cls(quality)
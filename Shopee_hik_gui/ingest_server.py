@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Ingest Server - รับข้อความจาก OCR (SCMVS) ได้หลาย client พร้อมกัน
+- selectors (non-blocking) thread เดียว: accept + อ่านทุก client ใน loop เดียว
+- แต่ละ client มี LineFramer ของตัวเอง (ข้อความที่ขาดกลางบรรทัดไม่ปนกัน)
+- ทุกบรรทัดจากทุก client ถูกส่งเข้า callback ตามลำดับที่มาถึง (order queue เดียว)
+"""
+
+import socket
+import selectors
+import time
+from datetime import datetime
+from line_framer import LineFramer, RECV_SIZE, IDLE_FLUSH_S
+
+# =============================
+# CONFIG
+# =============================
+LISTEN_BACKLOG = 16
+POLL_INTERVAL = 1.0  # วินาที (เช็ค running flag)
+
+
+class IngestServer:
+    """TCP server หลาย client -> on_line(line, addr)
+
+    on_line ถูกเรียกใน thread ที่รัน serve_forever() เท่านั้น
+    จึงไม่ต้องใช้ lock ระหว่าง client (ควรทำงานสั้น ไม่บล็อก)
+    """
+
+    def __init__(self, host, port, on_line, log_callback=None, label="Server"):
+        self.host = host
+        self.port = port
+        self.on_line = on_line
+        self.log_callback = log_callback
+        self.label = label
+        self.selector = None
+        self.server = None
+        self.clients = {}  # socket -> {"addr", "framer", "lines", "last_recv"}
+
+    def log(self, msg):
+        if self.log_callback:
+            self.log_callback(msg)
+        else:
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
+
+    def open(self):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind((self.host, self.port))
+        self.server.listen(LISTEN_BACKLOG)
+        self.server.setblocking(False)
+
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.server, selectors.EVENT_READ, None)
+        self.log(f"📡 {self.label} Listening on port {self.port}")
+
+    def serve_forever(self, is_running):
+        """วน loop จน is_running() เป็น False (เปิด socket เองถ้ายังไม่ได้ open)"""
+        if self.server is None:
+            self.open()
+        try:
+            while is_running():
+                has_partial = any(len(c["framer"]) for c in self.clients.values())
+                timeout = IDLE_FLUSH_S if has_partial else POLL_INTERVAL
+                for key, _ in self.selector.select(timeout=timeout):
+                    if key.data is None:
+                        self._accept()
+                    else:
+                        self._read(key.fileobj)
+                if has_partial:
+                    self._flush_partial(time.monotonic() - IDLE_FLUSH_S)
+        finally:
+            self.close()
+
+    def _accept(self):
+        try:
+            conn, addr = self.server.accept()
+        except (BlockingIOError, InterruptedError):
+            return
+        conn.setblocking(False)
+        self.clients[conn] = {"addr": addr, "framer": LineFramer(), "lines": 0, "last_recv": 0.0}
+        self.selector.register(conn, selectors.EVENT_READ, addr)
+        self.log(f"🟢 OCR connected: {addr[0]}:{addr[1]} (clients: {len(self.clients)})")
+
+    def _read(self, conn):
+        client = self.clients[conn]
+        try:
+            data = conn.recv(RECV_SIZE)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._drop(conn)
+            return
+
+        client["last_recv"] = time.monotonic()
+        framer = client["framer"]
+        overflows = framer.overflows
+        records = framer.feed(data)
+        if framer.overflows != overflows:
+            self.log(f"⚠️ {client['addr'][0]}: line longer than {framer.max_line} bytes - dropped")
+        self._dispatch(client, records)
+
+    def _dispatch(self, client, records):
+        for record in records:
+            # splitlines อีกชั้น: รองรับ client ที่ใช้ \r อย่างเดียว
+            for line in record.splitlines():
+                client["lines"] += 1
+                try:
+                    self.on_line(line, client["addr"])
+                except Exception as e:
+                    self.log(f"❌ {self.label} line handler error: {e}")
+
+    def _flush_partial(self, older_than):
+        """ส่งข้อความค้างที่ไม่มี newline และไม่มีข้อมูลเพิ่มมาสักพัก"""
+        for client in self.clients.values():
+            if len(client["framer"]) and client["last_recv"] <= older_than:
+                self._dispatch(client, client["framer"].flush())
+
+    def _drop(self, conn):
+        client = self.clients.pop(conn, None)
+        try:
+            self.selector.unregister(conn)
+        except (KeyError, ValueError):
+            pass
+        conn.close()
+        if client is None:
+            return
+        # บรรทัดสุดท้ายที่ไม่มี newline ก่อนปิด connection
+        self._dispatch(client, client["framer"].flush())
+        addr = client["addr"]
+        self.log(f"Disconnected: {addr[0]}:{addr[1]} (clients: {len(self.clients)})")
+
+    def close(self):
+        for conn in list(self.clients):
+            self._drop(conn)
+        if self.selector:
+            self.selector.close()
+            self.selector = None
+        if self.server:
+            self.server.close()
+            self.server = None
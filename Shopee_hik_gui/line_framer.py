@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Line Framer - ตัด stream ของ TCP ออกเป็นบรรทัด/record ที่ครบ
+- TCP ไม่รับประกันว่า 1 recv = 1 ข้อความ: order ที่ถูกตัดกลาง segment ต้องต่อกันก่อน parse
+- เก็บส่วนที่ยังไม่ครบไว้ใน buffer (carry-over) แล้วรอ recv ครั้งถัดไป
+- สแกนหา delimiter เฉพาะข้อมูลใหม่ (ไม่สแกนซ้ำทั้ง buffer ทุกครั้ง)
+- บรรทัดยาวเกิน max_line ถูกทิ้ง (กัน client ส่งขยะไม่มี newline จน memory โต)
+"""
+
+import socket
+
+# =============================
+# CONFIG
+# =============================
+RECV_SIZE = 65536        # recv ครั้งละมากๆ ลดจำนวน system call ตอนข้อมูลมาเป็นชุด
+MAX_LINE_BYTES = 64 * 1024
+IDLE_FLUSH_S = 0.2       # ข้อความที่ไม่มี delimiter ถ้าเงียบเกินนี้ถือว่าจบ record (SCMVS บางรุ่นไม่ส่ง \n)
+
+
+class LineFramer:
+    """feed(bytes) -> list ของ record (str) ที่ครบแล้ว
+
+    delimiter  : bytes ที่คั่น record (ค่าเริ่มต้น b"\\n", \\r ท้ายบรรทัดถูกตัดให้)
+    max_line   : ขนาดสูงสุดของ 1 record (byte) เกินแล้วทิ้งจนถึง delimiter ถัดไป
+    encoding   : None = คืนค่าเป็น bytes
+    skip_empty : ไม่คืน record ว่าง
+    """
+
+    def __init__(self, delimiter=b"\n", max_line=MAX_LINE_BYTES, encoding="utf-8", skip_empty=True):
+        if not delimiter:
+            raise ValueError("delimiter must not be empty")
+        self.delimiter = delimiter
+        self.max_line = max_line
+        self.encoding = encoding
+        self.skip_empty = skip_empty
+        self.buffer = bytearray()
+        self._scan = 0            # ตำแหน่งใน buffer ที่สแกนแล้ว (ไม่มี delimiter ก่อนหน้านี้)
+        self._discarding = False  # กำลังทิ้ง record ที่ยาวเกิน
+        self.records = 0
+        self.overflows = 0
+        self.bytes_in = 0
+
+    def __len__(self):
+        """จำนวน byte ที่ค้างอยู่ (ยังไม่ครบ record)"""
+        return len(self.buffer)
+
+    def feed(self, data):
+        if not data:
+            return []
+        self.bytes_in += len(data)
+        buffer = self.buffer
+        buffer += data
+
+        delim = self.delimiter
+        dlen = len(delim)
+        # หา delimiter ตัวสุดท้ายในข้อมูลใหม่เท่านั้น (delimiter อาจคร่อมข้อมูลเก่า/ใหม่ -> ถอยกลับ dlen - 1)
+        end = buffer.rfind(delim, max(0, self._scan - dlen + 1))
+        out = []
+        if end >= 0:
+            # ตัดทุก record ที่ครบในครั้งเดียว (decode + split ทั้งก้อน เร็วกว่าวนทีละบรรทัด)
+            records = self._split(bytes(buffer[:end]))
+            del buffer[:end + dlen]
+            if self._discarding:
+                records = records[1:]  # ส่วนท้ายของ record ที่ยาวเกิน
+                self._discarding = False
+            out = self._finish(records)
+        self._scan = len(buffer)
+
+        # Guard: record ยังไม่จบแต่ยาวเกินกำหนด -> ทิ้งส่วนที่ค้าง แล้วทิ้งต่อจนเจอ delimiter
+        if len(buffer) > self.max_line:
+            if not self._discarding:
+                self.overflows += 1
+                self._discarding = True
+            keep = dlen - 1  # เผื่อ delimiter คร่อมรอบถัดไป
+            del buffer[:len(buffer) - keep]
+            self._scan = len(buffer)
+        return out
+
+    def flush(self):
+        """คืน record สุดท้ายที่ไม่มี delimiter (เช่น ตอน client ปิด connection)"""
+        out = []
+        if self.buffer and not self._discarding:
+            out = self._finish(self._split(bytes(self.buffer)))
+        self.buffer = bytearray()
+        self._scan = 0
+        self._discarding = False
+        return out
+
+    def _split(self, block):
+        newline = self.delimiter == b"\n"
+        if self.encoding is None:
+            records = block.split(self.delimiter)
+            if newline:
+                records = [r[:-1] if r[-1:] == b"\r" else r for r in records]
+            return records
+        text = block.decode(self.encoding, errors="ignore")
+        if newline:
+            # splitlines ตัด \r\n / \r ให้ด้วย (เหมือนแบบเดิม) แต่ไม่คืน record ว่างท้ายสุด
+            return text.splitlines() if text else [""]
+        return text.split(self.delimiter.decode(self.encoding))
+
+    def _finish(self, records):
+        if self.skip_empty:
+            records = list(filter(None, records))
+        self.records += len(records)
+        return records
+
+
+def iter_lines(conn, framer=None, recv_size=RECV_SIZE, idle_flush=IDLE_FLUSH_S):
+    """อ่าน blocking socket แล้ว yield ทีละ record จน client ปิด connection"""
+    if framer is None:
+        framer = LineFramer()
+    while True:
+        # มีข้อมูลค้าง -> รอไม่เกิน idle_flush แล้วถือว่าจบ record
+        conn.settimeout(idle_flush if idle_flush and len(framer) else None)
+        try:
+            data = conn.recv(recv_size)
+        except socket.timeout:
+            yield from framer.flush()
+            continue
+        if not data:
+            yield from framer.flush()
+            return
+        yield from framer.feed(data)
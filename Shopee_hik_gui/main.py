@@ -2,14 +2,16 @@
 import sys
 import os
 import re
+import time
+from datetime import datetime
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtCore import QTimer
-from PyQt5.QtGui import QPixmap
 from config import COLORS
 
 # Import Modules
 from gui_app import MainUI
 from camera_server import CameraServerThread
+from history_view import OrderHistoryWindow
 
 class AppController:
     def __init__(self):
@@ -17,6 +19,8 @@ class AppController:
         
         # Camera Server
         self.camera_server = CameraServerThread()
+        self.ui.set_preview_service(self.camera_server.previews)
+        self.history = None  # OrderHistoryWindow (สร้างเมื่อเปิดครั้งแรก)
         
         # Timer (สำหรับ Reset แบบ Manual หรือกรณีต้องการใช้ในอนาคต)
         self.reset_timer = QTimer()
@@ -25,6 +29,7 @@ class AppController:
         
         self.setup_connections()
         self.start_threads()
+        self.refresh_today_stats()
     
     def setup_connections(self):
         # Camera Server -> Controller
@@ -32,12 +37,15 @@ class AppController:
         self.camera_server.countdown_update.connect(self.handle_countdown)
         self.camera_server.images_captured.connect(self.handle_images_captured)
         self.camera_server.image_retaken.connect(self.handle_image_retaken)
+        self.camera_server.retake_failed.connect(self.handle_retake_failed)
         self.camera_server.log_message.connect(self.ui.log)
+        self.camera_server.memory_report.connect(self.handle_memory_report)
         
         # Retake Buttons
         self.ui.btn_retake_all.clicked.connect(self.handle_retake_all)
         for cam in self.ui.hikrobot_cams:
             cam.retake_clicked.connect(self.handle_retake_single)
+        self.ui.btn_history.clicked.connect(self.show_history)
             
         # 🆕 เชื่อมต่อ Event ปิดโปรแกรม (สำคัญมาก)
         QApplication.instance().aboutToQuit.connect(self.on_exit)
@@ -53,10 +61,22 @@ class AppController:
     # 🆕 ฟังก์ชันสำหรับปิด Thread เมื่อปิดโปรแกรม
     def on_exit(self):
         print("🛑 Shutting down system...")
+        if self.history is not None:
+            self.history.shutdown()
         if self.camera_server.isRunning():
             self.camera_server.stop()
         print("✅ Shutdown Complete")
     
+    def show_history(self):
+        try:
+            if self.history is None:
+                self.history = OrderHistoryWindow(self.camera_server.catalog, self.camera_server.previews, parent=self.ui)
+            self.history.show()
+            self.history.raise_()
+            self.history.activateWindow()
+        except Exception as e:
+            self.ui.log(f"❌ Error opening order history: {e}")
+    
     def handle_new_order(self, order_no):
         try:
             self.reset_timer.stop()
@@ -93,12 +113,27 @@ class AppController:
         except Exception as e:
             self.ui.log(f"❌ Error in countdown: {e}")
     
+    def handle_memory_report(self, camera_index, text):
+        if camera_index < len(self.ui.hikrobot_cams):
+            self.ui.hikrobot_cams[camera_index].update_memory(text)
+    
+    def refresh_today_stats(self):
+        """จำนวน order / ภาพของวันนี้จาก evidence catalog (query ตาม index captured_at)"""
+        try:
+            midnight = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+            orders, images = self.camera_server.catalog.count_between(midnight, time.time() + 1)
+            self.ui.update_today(orders, images)
+        except Exception as e:
+            self.ui.log(f"❌ Catalog query error: {e}")
+    
     def handle_images_captured(self, image_paths):
         """จัดการเมื่อถ่ายรูปเสร็จ (แสดง Preview และใช้ฟังก์ชัน set_preview_mode)"""
         try:
             self.ui.animate_step('hikrobot', 'success')
             self.ui.animate_step('save', 'success')
             self.ui.update_stats(success=True)
+            # catalog บันทึกแบบ batch ใน background -> อ่านหลังจากนี้สักครู่
+            QTimer.singleShot(1000, self.refresh_today_stats)
             
             # 1. โหลดและแสดงภาพ
             self.ui.load_and_display_images(image_paths)
@@ -118,30 +153,33 @@ class AppController:
             self.ui.log(f"❌ Error handling captured images: {e}")
     
     def handle_image_retaken(self, image_path):
-        """จัดการเมื่อถ่ายรูปใหม่เสร็จ (กล้องเดียว)"""
+        """จัดการเมื่อถ่ายรูปใหม่เสร็จ (กล้องเดียว) - thumbnail มาจาก PreviewService ไม่ decode ไฟล์บน GUI thread"""
         try:
             match = re.search(r'cam(\d+)_', image_path)
             if match:
                 cam_idx = int(match.group(1)) - 1
                 if cam_idx < len(self.ui.hikrobot_cams):
-                    pixmap = QPixmap(image_path)
-                    if not pixmap.isNull():
-                        from PyQt5.QtCore import Qt
-                        scaled = pixmap.scaled(
-                            self.ui.hikrobot_cams[cam_idx].screen.size(),
-                            Qt.KeepAspectRatio,
-                            Qt.SmoothTransformation
-                        )
-                        self.ui.hikrobot_cams[cam_idx].screen.setPixmap(scaled)
-                        
-                        # ใช้ set_preview_mode เพื่ออัปเดตสถานะโดยไม่ลบรูป
-                        self.ui.hikrobot_cams[cam_idx].set_preview_mode("UPDATED", COLORS['success'])
-                        self.ui.log(f"🔄 Retaken cam {cam_idx + 1} Success")
-                        
-                        self.ui.hikrobot_cams[cam_idx].enable_retake(True)
+                    self.ui.load_and_display_images([image_path])
+                    
+                    # ใช้ set_preview_mode เพื่ออัปเดตสถานะโดยไม่ลบรูป
+                    self.ui.hikrobot_cams[cam_idx].set_preview_mode("UPDATED", COLORS['success'])
+                    self.ui.log(f"🔄 Retaken cam {cam_idx + 1} Success")
+                    
+                    self.ui.hikrobot_cams[cam_idx].enable_retake(True)
         except Exception as e:
             self.ui.log(f"❌ Error handling retaken image: {e}")
     
+    def handle_retake_failed(self, camera_index):
+        """retake ไม่สำเร็จ -> เปิดปุ่มให้กดใหม่ได้ (camera_index -1 = ทุกกล้อง)"""
+        if camera_index < 0:
+            for cam in self.ui.hikrobot_cams:
+                cam.set_preview_mode("RETAKE FAILED", COLORS['error'])
+            self.ui.enable_retake_buttons(True)
+        elif camera_index < len(self.ui.hikrobot_cams):
+            self.ui.hikrobot_cams[camera_index].set_preview_mode("RETAKE FAILED", COLORS['error'])
+            self.ui.hikrobot_cams[camera_index].enable_retake(True)
+        self.ui.log(f"❌ Retake failed ({'all cameras' if camera_index < 0 else f'cam {camera_index + 1}'})")
+    
     def handle_retake_single(self, camera_index):
         try:
             self.ui.log(f"🔄 Retaking camera {camera_index + 1}...")
@@ -150,6 +188,7 @@ class AppController:
             self.ui.hikrobot_cams[camera_index].set_active("📸 RETAKING", COLORS['warning'], COLORS['warning'])
             self.ui.hikrobot_cams[camera_index].enable_retake(False)
             
+            # ไม่บล็อก GUI: ถ่ายใน worker ของกล้อง ผลกลับมาทาง image_retaken / retake_failed
             self.camera_server.retake_camera(camera_index)
         except Exception as e:
             self.ui.log(f"❌ Error retaking single camera: {e}")
@@ -162,6 +201,7 @@ class AppController:
             for cam in self.ui.hikrobot_cams:
                 cam.set_active("📸 RETAKING", COLORS['warning'], COLORS['warning'])
             
+            # เข้าคิว capture ผลกลับมาทาง images_captured / retake_failed
             self.camera_server.retake_all()
         except Exception as e:
             self.ui.log(f"❌ Error retaking all: {e}")
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+ย้าย folder ภาพหลักฐานเดิม (flat หรือ layout อื่น) เข้า layout ใหม่ แบบ offline
+- ต้องปิด camera server ก่อนรัน (ไม่มีการ lock กับ capture ที่กำลังเขียน)
+- date layout ใช้เวลาจากชื่อไฟล์ camN_YYYYmmdd_HHMMSS.jpg ภาพแรก (ไม่มีใช้ mtime ของ folder)
+- แก้ path ใน evidence catalog ให้ตรงกับที่ใหม่ด้วย แล้วเพิ่ม order บน disk ที่ยังไม่มีใน catalog (backfill)
+- .order_index เก็บแค่เลข order ไม่ต้องแก้
+
+    python migrate_evidence.py --layout date_hash --dry-run
+    python migrate_evidence.py --layout date_hash
+"""
+
+import os
+import time
+import shutil
+import argparse
+from config import OUTPUT_DIR, CATALOG_PATH, EVIDENCE_LAYOUT, EVIDENCE_HASH_CHARS
+from evidence_layout import EvidenceLayout, SCHEMES, parse_image_name
+from evidence_catalog import EvidenceCatalog
+
+
+def capture_time(folder):
+    """เวลาที่ถ่ายครั้งแรกของ order (จากชื่อไฟล์) หรือ mtime ของ folder"""
+    stamps = [parsed[1] for parsed in map(parse_image_name, os.listdir(folder)) if parsed]
+    if stamps:
+        return min(stamps)
+    return os.stat(folder).st_mtime
+
+
+def move_folder(src, dst):
+    """ย้ายทั้ง folder (หรือรวมไฟล์เข้า folder ปลายทางที่มีอยู่แล้ว) return จำนวนไฟล์ที่ข้าม"""
+    if not os.path.exists(dst):
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        shutil.move(src, dst)
+        return 0
+    skipped = 0
+    for name in os.listdir(src):
+        target = os.path.join(dst, name)
+        if os.path.exists(target):
+            skipped += 1
+            continue
+        shutil.move(os.path.join(src, name), target)
+    if not skipped:
+        os.rmdir(src)
+    return skipped
+
+
+def remove_empty_parents(path, root):
+    """ลบ folder shard ที่ว่างหลังย้ายออก (ไม่ลบ root)"""
+    root = os.path.abspath(root)
+    path = os.path.abspath(os.path.dirname(path))
+    while path != root and path.startswith(root) and os.path.isdir(path) and not os.listdir(path):
+        os.rmdir(path)
+        path = os.path.dirname(path)
+
+
+def migrate(root, scheme, hash_chars, catalog_path=None, dry_run=False):
+    layout = EvidenceLayout(root, scheme, hash_chars)
+    catalog = None
+    if catalog_path and not dry_run:
+        catalog = EvidenceCatalog(catalog_path)
+
+    t0 = time.perf_counter()
+    orders = list(layout.iter_orders())
+    print(f"🗂️ {len(orders)} order folder(s) in {root} -> layout '{scheme}'")
+
+    moved = kept = failed = rows = 0
+    try:
+        for order_no, folder in orders:
+            target = layout.new_folder(order_no, capture_time(folder))
+            if os.path.normpath(target) == os.path.normpath(folder):
+                kept += 1
+                continue
+            if dry_run:
+                print(f"  {folder} -> {target}")
+                moved += 1
+                continue
+            try:
+                skipped = move_folder(folder, target)
+                if skipped:
+                    print(f"⚠️ {order_no}: {skipped} file(s) already in {target} - left in {folder}")
+                else:
+                    remove_empty_parents(folder, root)
+                if catalog is not None:
+                    rows += catalog.relocate_order(order_no, folder, target)
+                moved += 1
+            except OSError as e:
+                failed += 1
+                print(f"❌ {order_no}: {e}")
+        if catalog is not None:
+            added, images = catalog.backfill(layout)
+            print(f"🗃️ Catalog backfill: {added} order(s), {images} image(s)")
+    finally:
+        if catalog is not None:
+            catalog.close()
+
+    action = "would move" if dry_run else "moved"
+    print(
+        f"✅ {action} {moved}, unchanged {kept}, failed {failed}, "
+        f"catalog rows updated {rows} ({time.perf_counter() - t0:.1f}s)"
+    )
+    return failed == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move evidence folders into a sharded layout (run offline)")
+    parser.add_argument("--root", default=OUTPUT_DIR)
+    parser.add_argument("--layout", default=EVIDENCE_LAYOUT, choices=SCHEMES)
+    parser.add_argument("--hash-chars", type=int, default=EVIDENCE_HASH_CHARS)
+    parser.add_argument("--catalog", default=CATALOG_PATH)
+    parser.add_argument("--dry-run", action="store_true", help="แสดงสิ่งที่จะย้าย โดยไม่ย้ายจริง")
+    args = parser.parse_args()
+    ok = migrate(args.root, args.layout, args.hash_chars, args.catalog, args.dry_run)
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
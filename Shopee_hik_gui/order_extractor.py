@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Order Extractor - ดึงเลข Order / Tracking จากข้อความ OCR (ที่เดียว ใช้ร่วมทุก server)
+- หลายรูปแบบ (Shopee, SPX, Lazada, ...) ผ่านครั้งเดียวได้ทุก match ใน buffer (หลายบรรทัดก็ได้)
+- Fast path: lower() ข้อความครั้งเดียว แล้วใช้ regex แบบ case-sensitive ที่ขึ้นต้นด้วย keyword
+  regex engine จะกระโดดหา keyword ด้วย literal search (เร็วกว่า re.I ที่ต้องลองทุกตำแหน่ง)
+- แต่ละรูปแบบ finditer แยกกัน แล้วรวมตามตำแหน่ง (เร็วกว่า alternation หลายรูปแบบในก้อนเดียวมาก)
+- ข้อความที่ไม่มี keyword ของรูปแบบไหนเลย จบที่ str.find ไม่ต้องรัน regex
+"""
+
+import re
+from collections import namedtuple
+
+# =============================
+# FORMATS
+# =============================
+# name -> (keyword, regex, validator, word_start)
+# regex เขียนเป็นตัวพิมพ์เล็ก (ใช้กับข้อความที่ lower() แล้ว) ขึ้นต้นด้วย keyword
+# และมี named group ชื่อเดียวกับ name
+# word_start = ต้องไม่มีตัวอักษร/ตัวเลขติดข้างหน้า (เช็คเองแทน lookbehind ที่ทำให้ regex ช้าลงมาก)
+FORMATS = {
+    # 🔒 Shopee Order No = 14 chars (ตัวอักษร+ตัวเลข ห้ามเป็นตัวเลขล้วน)
+    "shopee": (
+        "shopee",
+        r"shopee\s*order\s*no\.?\s*(?P<shopee>[a-z0-9]{14})",
+        lambda v: not v.isdigit(),
+        False,
+    ),
+    # Shopee Express tracking เช่น SPXTH0123456789
+    "spx": (
+        "spx",
+        r"(?P<spx>spx[a-z]{2}\d{10,13})\b",
+        None,
+        True,
+    ),
+    # Lazada Order No (ตัวเลขล้วน)
+    "lazada": (
+        "lazada",
+        r"lazada\s*order\s*no\.?\s*(?P<lazada>\d{12,16})",
+        None,
+        False,
+    ),
+    # Lazada Express (LEX) tracking เช่น LEXDO0123456789
+    "lex": (
+        "lex",
+        r"(?P<lex>lex[a-z]{2,4}\d{8,12})\b",
+        None,
+        True,
+    ),
+}
+
+DEFAULT_FORMATS = ("shopee",)
+
+OrderMatch = namedtuple("OrderMatch", "carrier order_no valid start end")
+
+
+class OrderExtractor:
+    """extract_all(text) -> list ของ OrderMatch ตามลำดับในข้อความ
+
+    match ที่ไม่ผ่าน validator (เช่น Shopee ที่เป็นตัวเลขล้วน) คืนมาด้วย valid=False
+    ให้ผู้เรียก log แล้วข้ามเอง
+    """
+
+    def __init__(self, formats=DEFAULT_FORMATS):
+        unknown = [name for name in formats if name not in FORMATS]
+        if unknown:
+            raise ValueError(f"Unknown order format(s): {', '.join(unknown)}")
+
+        self.formats = tuple(formats)
+        self.entries = [
+            (FORMATS[name][0], name, re.compile(FORMATS[name][1]), FORMATS[name][2], FORMATS[name][3])
+            for name in self.formats
+        ]
+        # ใช้เมื่อ lower() ทำให้ความยาวข้อความเปลี่ยน (ตำแหน่งใน lower() ไม่ตรงกับข้อความเดิม)
+        self.combined = re.compile("|".join(f"(?:{FORMATS[name][1]})" for name in self.formats), re.I)
+
+    def has_candidate(self, text):
+        """Fast path: มี keyword ของรูปแบบไหนบ้างไหม (ไม่มี = ไม่มี order แน่นอน)"""
+        lowered = text.lower()
+        return any(entry[0] in lowered for entry in self.entries)
+
+    def extract_all(self, text):
+        if not text:
+            return []
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            return self._extract_combined(text)
+
+        matches = []
+        for keyword, name, pattern, validator, word_start in self.entries:
+            if keyword not in lowered:
+                continue
+            # search ต่อกันเอง (ถูกกว่า finditer เมื่อมี match น้อยต่อบรรทัด)
+            m = pattern.search(lowered)
+            while m is not None:
+                start = m.start()
+                if not (word_start and start and lowered[start - 1].isalnum()):
+                    matches.append(self._make_match(m, name, validator))
+                m = pattern.search(lowered, m.end())
+
+        if len(self.entries) > 1 and len(matches) > 1:
+            # รวมหลายรูปแบบตามตำแหน่ง ตัดตัวที่ซ้อนทับกัน (ตัวที่เริ่มก่อนชนะ)
+            matches.sort(key=lambda m: m.start)
+            merged, last_end = [], -1
+            for match in matches:
+                if match.start >= last_end:
+                    merged.append(match)
+                    last_end = match.end
+            matches = merged
+        return matches
+
+    def _extract_combined(self, text):
+        matches = []
+        for m in self.combined.finditer(text):
+            name = m.lastgroup
+            start = m.start()
+            if FORMATS[name][3] and start and text[start - 1].isalnum():
+                continue
+            matches.append(self._make_match(m, name, FORMATS[name][2]))
+        return matches
+
+    @staticmethod
+    def _make_match(m, name, validator):
+        order_no = m.group(name).upper()
+        valid = validator is None or validator(order_no)
+        return OrderMatch(name, order_no, valid, m.start(name), m.end(name))
+
+    def extract(self, text):
+        """order แรกที่ valid หรือ None"""
+        for match in self.extract_all(text):
+            if match.valid:
+                return match
+        return None
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+Order Index - เช็ค order ที่ถ่ายแล้ว โดยไม่ต้อง os.listdir ทุกบรรทัด OCR
+- recent : dict order -> เวลาที่ถ่าย (ภายใน TTL) ตอบจาก memory เลย ไม่แตะ disk
+           (contains(..., verify=True) = เช็คว่า folder ยังมีภาพอยู่จริงด้วย)
+- bloom  : Bloom filter ของทุก order ที่เคยถ่าย (ขนาดคงที่ ไม่โตตามจำนวน order)
+           ไม่อยู่ใน bloom = ไม่เคยถ่ายแน่นอน -> ไม่แตะ disk เลย
+           อยู่ใน bloom แต่เก่ากว่า TTL (หรือ false positive) -> ถาม catalog (SQLite) แล้วค่อยเช็ค folder
+- ไฟล์ index (append-only: "order<TAB>epoch") ใน OUTPUT_DIR ใช้ warm start ตอนเปิดโปรแกรม
+  ถ้ายังไม่มีไฟล์ (หรืออ่านไม่ได้) สแกน OUTPUT_DIR ครั้งเดียวแล้วสร้างให้ (ทุก layout: flat / date / hash)
+- order บน disk ที่ไม่อยู่ในไฟล์ (ถ่ายก่อนมีไฟล์ index / copy มาจากเครื่องอื่น) เพิ่มด้วย add_existing()
+  จากการเดิน folder ใน background (camera server ใช้ร่วมกับ catalog backfill) ไม่บล็อกตอนเปิดโปรแกรม
+"""
+
+import os
+import math
+import time
+import hashlib
+import threading
+from datetime import datetime
+from evidence_layout import EvidenceLayout
+
+# =============================
+# CONFIG
+# =============================
+INDEX_FILENAME = ".order_index"
+RECENT_TTL_SECONDS = 7 * 24 * 3600  # order ที่ถ่ายภายในช่วงนี้เช็คจาก memory ตรงๆ
+BLOOM_CAPACITY = 2_000_000          # จำนวน order ที่รองรับโดย false positive ไม่เกิน BLOOM_FP_RATE
+BLOOM_FP_RATE = 0.001
+
+
+class BloomFilter:
+    """Bloom filter บน bytearray (double hashing จาก blake2b ครั้งเดียว)"""
+
+    def __init__(self, capacity=BLOOM_CAPACITY, fp_rate=BLOOM_FP_RATE):
+        self.num_bits = max(8, int(-capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class OrderIndex:
+    """contains(order_no) -> ถ่ายแล้วหรือยัง (ความหมายเดียวกับ folder_has_images เดิม)
+
+    layout   : EvidenceLayout ที่ใช้หา folder ของ order (ค่าเริ่มต้น flat ใน output_dir)
+    catalog  : EvidenceCatalog (ถ้ามี) เช็คก่อนแตะ disk
+    """
+
+    def __init__(self, output_dir, layout=None, ttl=RECENT_TTL_SECONDS, catalog=None, log_callback=None):
+        self.output_dir = output_dir
+        self.catalog = catalog
+        self.layout = layout or EvidenceLayout(output_dir)
+        self.ttl = ttl
+        self.log_callback = log_callback
+        self.path = os.path.join(output_dir, INDEX_FILENAME)
+        self.lock = threading.Lock()
+        self.recent = {}
+        self.bloom = BloomFilter()
+        self.stats = {"memory_hits": 0, "memory_stale": 0, "bloom_misses": 0, "catalog_hits": 0, "disk_checks": 0}
+        self._file = None
+
+    def log(self, msg):
+        if self.log_callback:
+            self.log_callback(msg)
+        else:
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
+
+    # ---------- Warm start ----------
+    def load(self):
+        """โหลดไฟล์ index (หรือสแกน OUTPUT_DIR ถ้ายังไม่มี / อ่านไม่ได้) แล้วเปิดไฟล์ไว้ append"""
+        t0 = time.perf_counter()
+        entries = None
+        if os.path.exists(self.path):
+            try:
+                entries = self._read_index()
+                source = "index"
+            except (OSError, UnicodeDecodeError) as e:
+                self.log(f"⚠️ Order index unreadable ({e}) - rescan {self.output_dir}")
+        if entries is None:
+            source = "scan"
+            entries = self._scan_output_dir()
+            self._write_index(entries)
+
+        cutoff = time.time() - self.ttl
+        with self.lock:
+            for order_no, ts in entries:
+                self.bloom.add(order_no)
+                if ts >= cutoff:
+                    self.recent[order_no] = ts
+        self._file = open(self.path, "a", encoding="utf-8")
+
+        self.log(
+            f"🗂️ Order index ({source}): {self.bloom.count} orders, "
+            f"{len(self.recent)} recent, {(time.perf_counter() - t0) * 1000:.0f} ms"
+        )
+        return self
+
+    def _read_index(self):
+        entries = []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                order_no, _, ts = line.rstrip("\n").partition("\t")
+                if not order_no:
+                    continue
+                try:
+                    entries.append((order_no, float(ts)))
+                except ValueError:
+                    entries.append((order_no, 0.0))
+        return entries
+
+    def _scan_output_dir(self):
+        """order ทุก folder ที่มีอยู่บน disk (ใช้ mtime ของ folder เป็นเวลาที่ถ่าย)"""
+        return [(order_no, os.stat(folder).st_mtime) for order_no, folder in self.layout.iter_orders()]
+
+    def _write_index(self, entries):
+        os.makedirs(self.output_dir, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for order_no, ts in entries:
+                f.write(f"{order_no}\t{ts:.0f}\n")
+        os.replace(tmp_path, self.path)
+
+    # ---------- Lookup ----------
+    def contains(self, order_no, verify=False):
+        """verify = เช็ค folder บน disk ด้วยแม้อยู่ใน recent (เช่นก่อน retake / หลังลบ folder เอง)"""
+        now = time.time()
+        with self.lock:
+            ts = self.recent.get(order_no)
+            recent = ts is not None and now - ts <= self.ttl
+            if ts is not None and not recent:
+                del self.recent[order_no]  # หมดอายุ -> ไปเช็คแบบ bloom/disk
+            if not recent and order_no not in self.bloom:
+                self.stats["bloom_misses"] += 1
+                return False
+
+        if recent:
+            if not verify:
+                with self.lock:
+                    self.stats["memory_hits"] += 1
+                return True
+            # folder อยู่ใน cache ของ layout -> เช็คแค่ว่ายังมีภาพอยู่ (ไม่ต้องสแกนหา)
+            found = self.layout.resolve(order_no) is not None
+            with self.lock:
+                if found:
+                    self.stats["memory_hits"] += 1
+                else:
+                    self.stats["memory_stale"] += 1
+                    self.recent.pop(order_no, None)
+            return found
+
+        # เก่ากว่า TTL หรือ false positive -> catalog (index lookup) ก่อน แล้วค่อยเช็ค folder จริง
+        # (order ที่ถ่ายก่อนมี catalog จะมีแค่ใน folder)
+        if self.catalog is not None and self.catalog.has_order(order_no):
+            found, key = True, "catalog_hits"
+        else:
+            found, key = self.layout.resolve(order_no) is not None, "disk_checks"
+        with self.lock:
+            self.stats[key] += 1
+            if found:
+                self.recent[order_no] = now
+        return found
+
+    def __contains__(self, order_no):
+        return self.contains(order_no)
+
+    # ---------- Update ----------
+    def add(self, order_no, ts=None):
+        """บันทึกว่า order นี้ถ่ายแล้ว (เรียกหลังเขียนภาพเสร็จ)"""
+        ts = time.time() if ts is None else ts
+        with self.lock:
+            is_new = order_no not in self.recent
+            self.recent[order_no] = ts
+            if is_new:
+                self.bloom.add(order_no)
+                if self._file:
+                    self._file.write(f"{order_no}\t{ts:.0f}\n")
+                    self._file.flush()
+
+    def add_existing(self, order_no, ts=0.0):
+        """order ที่เจอบน disk ระหว่างเดิน folder: เพิ่มเข้า bloom + ไฟล์ถ้ายังไม่มี (ไม่เข้า recent)
+
+        return True ถ้าเป็น order ใหม่ของ index
+        """
+        with self.lock:
+            if order_no in self.recent or order_no in self.bloom:
+                return False
+            self.bloom.add(order_no)
+            if self._file:
+                self._file.write(f"{order_no}\t{ts:.0f}\n")
+                self._file.flush()
+        return True
+
+    def expire(self, now=None):
+        """ลบ order ที่เก่ากว่า TTL ออกจาก memory (ยังอยู่ใน bloom) return จำนวนที่ลบ"""
+        cutoff = (time.time() if now is None else now) - self.ttl
+        with self.lock:
+            old = [order_no for order_no, ts in self.recent.items() if ts < cutoff]
+            for order_no in old:
+                del self.recent[order_no]
+        return len(old)
+
+    def close(self):
+        with self.lock:
+            if self._file:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+Order Scheduler - ตั้งเวลาถ่ายรูปโดยไม่บล็อก socket receive loop
+- รับ order แล้วจดเวลา -> ตั้งงานไว้ที่ t + delay (heap เรียงตามเวลา)
+- Thread เดียวคอยปลุกตามเวลา แล้วเรียก callback
+- หลาย order อยู่ระหว่างรอได้พร้อมกัน (หลายพัสดุบนสายพาน)
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+
+class ScheduledCall:
+    """งานที่ตั้งเวลาไว้ (ยกเลิกได้ด้วย cancel())"""
+    __slots__ = ("when", "callback", "args", "cancelled")
+
+    def __init__(self, when, callback, args):
+        self.when = when
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class OrderScheduler:
+    """Timer heap บน time.monotonic() + worker thread 1 ตัว
+
+    callback ถูกเรียกใน scheduler thread ตามลำดับเวลา (เวลาเท่ากัน = ลำดับที่ตั้ง)
+    callback ควรสั้น - งานหนัก (เช่น capture) ให้ส่งต่อไป executor
+    """
+
+    def __init__(self, name="order-scheduler", log_callback=None):
+        self.log_callback = log_callback
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def call_at(self, when, callback, *args):
+        """เรียก callback(*args) ที่เวลา when (time.monotonic())"""
+        call = ScheduledCall(when, callback, args)
+        with self._cond:
+            heapq.heappush(self._heap, (when, next(self._seq), call))
+            self._cond.notify()
+        return call
+
+    def call_later(self, delay, callback, *args):
+        return self.call_at(time.monotonic() + delay, callback, *args)
+
+    def pending(self):
+        """จำนวนงานที่ยังไม่ถึงเวลา (ไม่นับที่ยกเลิกแล้ว)"""
+        with self._cond:
+            return sum(1 for _, _, call in self._heap if not call.cancelled)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running:
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    delay = self._heap[0][0] - time.monotonic()
+                    if delay <= 0:
+                        break
+                    self._cond.wait(delay)
+                if not self._running:
+                    return
+                _, _, call = heapq.heappop(self._heap)
+
+            if call.cancelled:
+                continue
+            try:
+                call.callback(*call.args)
+            except Exception as e:
+                if self.log_callback:
+                    self.log_callback(f"❌ Scheduler callback error: {e}")
+
+    def stop(self):
+        """หยุด thread - งานที่ยังไม่ถึงเวลาจะถูกทิ้ง return จำนวนที่ทิ้ง"""
+        with self._cond:
+            dropped = sum(1 for _, _, call in self._heap if not call.cancelled)
+            self._heap.clear()
+            self._running = False
+            self._cond.notify()
+        self._thread.join()
+        return dropped
+
+
+class ConveyorTracker:
+    """ประมาณตำแหน่งสายพาน (mm) ตามเวลา
+
+    - ความเร็วเริ่มต้นจาก config (mm/s) หรือ None = ไม่รู้ความเร็ว
+    - อัปเดตได้จาก socket: ความเร็วตรงๆ (SPEED) หรือค่า encoder สะสม (ENCODER)
+    - ค่า encoder แรก / counter ลดลง (wrap หรือ reset ตอน reconnect) = เปลี่ยนกรอบอ้างอิงของตำแหน่ง
+    """
+
+    def __init__(self, speed_mm_s=None, mm_per_pulse=1.0):
+        self.speed = speed_mm_s
+        self.mm_per_pulse = mm_per_pulse
+        self._pos0 = 0.0
+        self._t0 = time.monotonic()
+        self._last_encoder = None  # (count, t)
+
+    def position(self, now=None):
+        now = time.monotonic() if now is None else now
+        return self._pos0 + (self.speed or 0.0) * (now - self._t0)
+
+    def set_speed(self, speed_mm_s, now=None):
+        now = time.monotonic() if now is None else now
+        self._pos0 = self.position(now)
+        self._t0 = now
+        self.speed = max(0.0, float(speed_mm_s))
+
+    def update_encoder(self, count, now=None):
+        """ค่า encoder สะสม -> ตำแหน่งจริง + ประมาณความเร็วจากช่วงก่อนหน้า
+
+        return shift (mm) ที่ต้องบวกให้ตำแหน่งที่คำนวณไว้ก่อนหน้า เมื่อเปลี่ยนกรอบอ้างอิง (0.0 = กรอบเดิม)
+        """
+        now = time.monotonic() if now is None else now
+        shift = 0.0
+        if self._last_encoder is None or count < self._last_encoder[0]:
+            # ค่าแรก (เวลา×ความเร็ว -> pulse) หรือ counter wrap/reset: ตำแหน่งที่ประมาณไว้ตอนนี้ = count ใหม่
+            # ไม่ประมาณความเร็วจากช่วงนี้ (ไม่รู้ว่าเดินไปกี่ pulse)
+            shift = count * self.mm_per_pulse - self.position(now)
+        else:
+            last_count, last_t = self._last_encoder
+            if now > last_t:
+                self.speed = max(0.0, (count - last_count) * self.mm_per_pulse / (now - last_t))
+        self._last_encoder = (count, now)
+        self._pos0 = count * self.mm_per_pulse
+        self._t0 = now
+        return shift
+
+    def eta(self, target_pos, now=None):
+        """เวลา (monotonic) ที่สายพานจะถึง target_pos หรือ None ถ้าสายพานหยุด/ไม่รู้ความเร็ว"""
+        now = time.monotonic() if now is None else now
+        if not self.speed:
+            return None
+        return now + max(0.0, target_pos - self.position(now)) / self.speed
+
+
+class ConveyorScheduler:
+    """ตั้งเวลาถ่ายแต่ละ order ตามระยะทางบนสายพาน (FIFO, หลาย order พร้อมกัน)
+
+    due = เวลาที่พัสดุวิ่งจากจุด OCR ถึงจุดกล้อง (distance_mm) - offset
+    order ถัดไปต้องห่างจาก order ก่อนหน้าอย่างน้อย min_gap_s (ไม่แซงคิว)
+    ความเร็วเปลี่ยน -> คำนวณเวลาใหม่ให้ทุก order ที่ยังรออยู่
+    encoder เปลี่ยนกรอบอ้างอิง (ค่าแรก / reset) -> เลื่อน target ของ order ที่รออยู่ตามกรอบใหม่
+    ถ้าไม่รู้ความเร็ว (speed = None) ใช้ fallback_delay_s แบบเดิม
+    """
+
+    def __init__(self, scheduler, tracker, on_due, distance_mm,
+                 offset_s=0.0, min_gap_s=0.0, fallback_delay_s=3.0):
+        self.scheduler = scheduler
+        self.tracker = tracker
+        self.on_due = on_due
+        self.distance_mm = distance_mm
+        self.offset_s = offset_s
+        self.min_gap_s = min_gap_s
+        self.fallback_delay_s = fallback_delay_s
+        self.lock = threading.RLock()
+        self.orders = {}  # order_no -> {"target", "accepted", "due", "call"} (dict เรียงตามลำดับเข้า)
+
+    def add(self, order_no, now=None):
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            target = self.tracker.position(now) + self.distance_mm
+            self.orders[order_no] = {"target": target, "accepted": now, "due": None, "call": None}
+            self._reschedule(now)
+            return self.orders[order_no]["due"]
+
+    def due_time(self, order_no):
+        with self.lock:
+            entry = self.orders.get(order_no)
+            return entry["due"] if entry else None
+
+    def set_speed(self, speed_mm_s, now=None):
+        with self.lock:
+            self.tracker.set_speed(speed_mm_s, now)
+            self._reschedule(now)
+
+    def update_encoder(self, count, now=None):
+        with self.lock:
+            shift = self.tracker.update_encoder(count, now)
+            if shift:
+                for entry in self.orders.values():
+                    entry["target"] += shift
+            self._reschedule(now)
+
+    def _reschedule(self, now=None):
+        now = time.monotonic() if now is None else now
+        prev_due = None
+        for order_no, entry in self.orders.items():
+            if self.tracker.speed is None:
+                due = entry["accepted"] + self.fallback_delay_s
+            else:
+                due = self.tracker.eta(entry["target"], now)
+                if due is None:
+                    # สายพานหยุด -> รอ speed/encoder update ครั้งถัดไป
+                    self._cancel(entry)
+                    entry["due"] = None
+                    prev_due = None
+                    continue
+                due = max(now, due - self.offset_s)
+            if prev_due is not None:
+                due = max(due, prev_due + self.min_gap_s)
+            prev_due = due
+
+            if entry["call"] is not None and entry["due"] is not None and abs(entry["due"] - due) < 0.001:
+                continue
+            self._cancel(entry)
+            entry["due"] = due
+            entry["call"] = self.scheduler.call_at(due, self._fire, order_no)
+
+    def _cancel(self, entry):
+        if entry["call"] is not None:
+            entry["call"].cancel()
+            entry["call"] = None
+
+    def _fire(self, order_no):
+        with self.lock:
+            if self.orders.pop(order_no, None) is None:
+                return
+        self.on_due(order_no)
+
+    def __len__(self):
+        with self.lock:
+            return len(self.orders)
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Pixel Convert - แปลง raw frame ของ Hikrobot (ตาม enPixelType) เป็นภาพ 8-bit RGB/BGR
+- CONVERTERS: dispatch table PixelType -> ฟังก์ชันแปลง (ไม่ต้องไล่ if/elif ทุกเฟรม)
+- Mono 8/10/12/16, Mono10/12 Packed, Bayer GR/RG/GB/BG 8/10/12/16 (+ Packed), YUV422 (UYVY/YUYV), RGB8/BGR8
+- Packed (GVSP: 2 pixel ใน 3 byte): byte 0 และ 2 คือ 8 bit บนของแต่ละ pixel -> slice ทีเดียวได้ภาพ 8-bit
+  ไม่ต้อง unpack ทีละ bit (unpack_packed ใช้เมื่อต้องการค่าเต็ม 10/12 bit)
+- half=True: ภาพครึ่งขนาดสำหรับ preview - Bayer ใช้ 1 block 2x2 = 1 pixel (ไม่ต้อง demosaic เต็ม)
+
+หมายเหตุ: ชื่อ Bayer ของ OpenCV เลื่อนจากชื่อ GenICam 1 pixel
+(sensor BayerRG = RGGB ต้องใช้ cv2.COLOR_BayerBG2RGB)
+"""
+
+import os
+import sys
+import cv2
+import numpy as np
+
+# ค่าคงที่อย่างเดียว (ไม่โหลด DLL ของ SDK) -> ใช้ได้ทั้งกล้องจริงและ simulation
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "MvImport"))
+from PixelType_header import *
+
+# =============================
+# BAYER LAYOUT
+# =============================
+# layout -> (OpenCV code RGB, OpenCV code BGR, ตำแหน่ง (row, col) ของ R และ B ใน block 2x2)
+BAYER_LAYOUTS = {
+    "RG": (cv2.COLOR_BayerBG2RGB, cv2.COLOR_BayerBG2BGR, (0, 0), (1, 1)),
+    "GR": (cv2.COLOR_BayerGB2RGB, cv2.COLOR_BayerGB2BGR, (0, 1), (1, 0)),
+    "GB": (cv2.COLOR_BayerGR2RGB, cv2.COLOR_BayerGR2BGR, (1, 0), (0, 1)),
+    "BG": (cv2.COLOR_BayerRG2RGB, cv2.COLOR_BayerRG2BGR, (1, 1), (0, 0)),
+}
+
+
+def output_shape(width, height, half=False):
+    if half:
+        return (height // 2, width // 2, 3)
+    return (height, width, 3)
+
+
+def _out(dst, shape):
+    return np.empty(shape, dtype=np.uint8) if dst is None else dst
+
+
+def _half(img, width, height, dst=None):
+    """ครึ่งขนาดแบบ nearest (เลือก pixel คู่) - cv2.resize เร็วกว่า slice [::2] ของ numpy มาก"""
+    return cv2.resize(img, (width // 2, height // 2), dst=dst, interpolation=cv2.INTER_NEAREST)
+
+
+# =============================
+# UNPACK -> 8 bit (h, w)
+# =============================
+def _mono8_plane(data, width, height):
+    return data[:width * height].reshape(height, width)
+
+
+def _unpacked_plane(bits):
+    """10/12/16 bit ใน container 16-bit little endian -> 8 bit บน"""
+    shift = bits - 8
+
+    def plane(data, width, height):
+        if shift == 8:
+            # 16 bit: byte บนคือผลลัพธ์เลย
+            return data[1:width * height * 2:2].reshape(height, width)
+        values = data[:width * height * 2].view("<u2").reshape(height, width)
+        return (values >> shift).astype(np.uint8)
+    return plane
+
+
+def _packed_plane(data, width, height):
+    """GVSP 10p/12p: [p0 บน 8 bit][bit ล่างของ p0,p1][p1 บน 8 bit] -> byte 0, 2"""
+    count = width * height
+    packed = data[:count * 3 // 2]
+    plane = np.empty(count, dtype=np.uint8)
+    plane[0::2] = packed[0::3]
+    plane[1::2] = packed[2::3]
+    return plane.reshape(height, width)
+
+
+def unpack_packed(data, bits, count):
+    """GVSP packed -> uint16 ค่าเต็ม (vectorized ทั้งก้อน)"""
+    groups = data[:count * 3 // 2].reshape(-1, 3).astype(np.uint16)
+    out = np.empty((groups.shape[0], 2), dtype=np.uint16)
+    low_bits = bits - 8
+    mask = (1 << low_bits) - 1
+    out[:, 0] = (groups[:, 0] << low_bits) | (groups[:, 1] & mask)
+    out[:, 1] = (groups[:, 2] << low_bits) | ((groups[:, 1] >> 4) & mask)
+    return out.reshape(-1)[:count]
+
+
+# =============================
+# CONVERTERS
+# =============================
+def _mono(plane):
+    def convert(data, width, height, dst=None, half=False, bgr=False):
+        img = plane(data, width, height)
+        if half:
+            img = _half(img, width, height)
+        out = _out(dst, output_shape(width, height, half))
+        return cv2.cvtColor(img, cv2.COLOR_GRAY2RGB, dst=out)
+    return convert
+
+
+def _bayer(plane, layout):
+    code_rgb, code_bgr, (r_row, r_col), (b_row, b_col) = BAYER_LAYOUTS[layout]
+    g1, g2 = (r_row, 1 - r_col), (1 - r_row, r_col)
+
+    def convert(data, width, height, dst=None, half=False, bgr=False):
+        mosaic = plane(data, width, height)
+        out = _out(dst, output_shape(width, height, half))
+        if not half:
+            return cv2.cvtColor(mosaic, code_bgr if bgr else code_rgb, dst=out)
+        # 1 block 2x2 -> 1 pixel: R, เฉลี่ย G สองตัว, B
+        h2, w2 = height // 2 * 2, width // 2 * 2
+        r = mosaic[r_row:h2:2, r_col:w2:2]
+        b = mosaic[b_row:h2:2, b_col:w2:2]
+        g = cv2.addWeighted(mosaic[g1[0]:h2:2, g1[1]:w2:2], 0.5, mosaic[g2[0]:h2:2, g2[1]:w2:2], 0.5, 0)
+        return cv2.merge([b, g, r] if bgr else [r, g, b], dst=out)
+    return convert
+
+
+def _yuv422(code_rgb, code_bgr):
+    def convert(data, width, height, dst=None, half=False, bgr=False):
+        img = data[:width * height * 2].reshape(height, width, 2)
+        code = code_bgr if bgr else code_rgb
+        if not half:
+            return cv2.cvtColor(img, code, dst=_out(dst, output_shape(width, height)))
+        # chroma ถูก subsample แนวนอนอยู่แล้ว: แปลงเต็มแล้วเลือก pixel คู่
+        return _half(cv2.cvtColor(img, code), width, height, dst=_out(dst, output_shape(width, height, half)))
+    return convert
+
+
+def _rgb8(swap):
+    def convert(data, width, height, dst=None, half=False, bgr=False):
+        img = data[:width * height * 3].reshape(height, width, 3)
+        if half:
+            img = _half(img, width, height)
+        out = _out(dst, output_shape(width, height, half))
+        if swap != bgr:
+            return cv2.cvtColor(img, cv2.COLOR_RGB2BGR, dst=out)
+        np.copyto(out, img)
+        return out
+    return convert
+
+
+CONVERTERS = {
+    PixelType_Gvsp_Mono8: _mono(_mono8_plane),
+    PixelType_Gvsp_Mono10: _mono(_unpacked_plane(10)),
+    PixelType_Gvsp_Mono12: _mono(_unpacked_plane(12)),
+    PixelType_Gvsp_Mono16: _mono(_unpacked_plane(16)),
+    PixelType_Gvsp_Mono10_Packed: _mono(_packed_plane),
+    PixelType_Gvsp_Mono12_Packed: _mono(_packed_plane),
+    PixelType_Gvsp_RGB8_Packed: _rgb8(swap=False),
+    PixelType_Gvsp_BGR8_Packed: _rgb8(swap=True),
+    PixelType_Gvsp_YUV422_Packed: _yuv422(cv2.COLOR_YUV2RGB_UYVY, cv2.COLOR_YUV2BGR_UYVY),
+    PixelType_Gvsp_YUV422_YUYV_Packed: _yuv422(cv2.COLOR_YUV2RGB_YUYV, cv2.COLOR_YUV2BGR_YUYV),
+}
+for _layout in BAYER_LAYOUTS:
+    CONVERTERS[globals()[f"PixelType_Gvsp_Bayer{_layout}8"]] = _bayer(_mono8_plane, _layout)
+    for _bits in (10, 12, 16):
+        CONVERTERS[globals()[f"PixelType_Gvsp_Bayer{_layout}{_bits}"]] = _bayer(_unpacked_plane(_bits), _layout)
+    for _bits in (10, 12):
+        CONVERTERS[globals()[f"PixelType_Gvsp_Bayer{_layout}{_bits}_Packed"]] = _bayer(_packed_plane, _layout)
+
+PIXEL_TYPE_NAMES = {
+    value: name[len("PixelType_Gvsp_"):]
+    for name, value in list(globals().items())
+    if name.startswith("PixelType_Gvsp_") and value in CONVERTERS
+}
+
+
+def is_supported(pixel_type):
+    return pixel_type in CONVERTERS
+
+
+def convert(data, width, height, pixel_type, dst=None, half=False, bgr=False):
+    """raw (uint8 1 มิติ) -> ภาพ 8-bit (h, w, 3) RGB (bgr=True สำหรับ cv2.imwrite)
+
+    dst  : array ปลายทางขนาด output_shape() (เขียนลงไปตรงๆ ไม่จองใหม่)
+    half : ครึ่งขนาด (preview)
+    return None ถ้าไม่รองรับ pixel type นี้
+    """
+    converter = CONVERTERS.get(pixel_type)
+    if converter is None:
+        return None
+    return converter(data, width, height, dst=dst, half=half, bgr=bgr)
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+Preview Service - thumbnail ของภาพหลักฐานสำหรับ GUI โดยไม่ decode ภาพเต็มบน GUI thread
+- capture engine ส่งภาพที่เพิ่ง encode (JPEG bytes / BGR array) มาให้ทันที (offer_encoded / offer_image)
+  -> ย่อใน worker pool ระหว่างที่ writer เขียนไฟล์ GUI ไม่ต้องอ่านไฟล์ที่เพิ่งเขียนซ้ำ
+- ภาพที่ไม่มีใน memory (เช่น order เก่า) decode จากไฟล์แบบลดขนาดตั้งแต่ตอน decode
+  (JPEG DCT scaling ผ่าน cv2.IMREAD_REDUCED_COLOR_2/4/8) ใน worker pool
+- LRU cache คีย์ path + mtime (ไฟล์ถูกเขียนทับ = mtime เปลี่ยน = decode ใหม่)
+- disk_cache (ถ้าตั้ง): เก็บ thumbnail เป็นไฟล์เล็ก (ชื่อ = hash ของ path + mtime + ขนาด) เปิดครั้งหน้าไม่ต้อง decode ภาพเต็ม
+- ผลลัพธ์กลับ GUI ทาง signal preview_ready(path, QImage) / preview_failed(path) ถ้า decode ไม่ได้
+"""
+
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import cv2
+import numpy as np
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtGui import QImage
+from config import PREVIEW_SIZE, PREVIEW_WORKERS, PREVIEW_CACHE_SIZE
+
+# ตัวหารขนาดที่ decoder ลดให้ได้ตอน decode (ใหญ่ไปเล็ก)
+REDUCED_FLAGS = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2))
+
+
+def reduced_flag(width, height, box=PREVIEW_SIZE):
+    """flag ของ cv2.imread/imdecode ที่ลดขนาดมากที่สุดโดยภาพยังใหญ่กว่า box"""
+    for factor, flag in REDUCED_FLAGS:
+        if width // factor >= box[0] or height // factor >= box[1]:
+            return flag
+    return cv2.IMREAD_COLOR
+
+
+def jpeg_size(data):
+    """(width, height) จาก header ของ JPEG (SOF marker) หรือ None - ไม่ต้อง decode"""
+    data = memoryview(data)
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        length = (data[i + 2] << 8) | data[i + 3]
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            return (data[i + 7] << 8) | data[i + 8], (data[i + 5] << 8) | data[i + 6]
+        i += 2 + length
+    return None
+
+
+def fit(image, box=PREVIEW_SIZE):
+    """ย่อ BGR ให้พอดี box (คงสัดส่วน ไม่ขยาย)"""
+    h, w = image.shape[:2]
+    scale = min(box[0] / w, box[1] / h)
+    if scale >= 1:
+        return image
+    return cv2.resize(image, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+
+
+def to_qimage(image_bgr):
+    """BGR -> QImage RGB888 ที่เป็นเจ้าของข้อมูลเอง (ส่งข้าม thread ได้)"""
+    rgb = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
+    h, w = rgb.shape[:2]
+    return QImage(rgb.data, w, h, rgb.strides[0], QImage.Format_RGB888).copy()
+
+
+def decode_file(path, box=PREVIEW_SIZE):
+    """อ่านไฟล์แบบลดขนาด (JPEG: อ่าน header ก่อนเพื่อเลือก scale) return BGR หรือ None"""
+    with open(path, "rb") as f:
+        data = f.read()
+    return decode_bytes(data, box)
+
+
+def decode_bytes(data, box=PREVIEW_SIZE):
+    size = jpeg_size(data)
+    flag = reduced_flag(*size, box=box) if size else cv2.IMREAD_COLOR
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flag)
+    return None if image is None else fit(image, box)
+
+
+def prune_disk_cache(folder, max_age_days):
+    """ลบ thumbnail ที่ไม่ได้ใช้เกิน max_age_days (ดูจาก mtime ของไฟล์ thumbnail) return จำนวนที่ลบ"""
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    for dirpath, _, files in os.walk(folder):
+        for name in files:
+            path = os.path.join(dirpath, name)
+            try:
+                if os.stat(path).st_mtime < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                pass
+    return removed
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class PreviewService(QObject):
+    """worker pool + LRU cache ของ thumbnail (เรียก request จาก GUI thread, offer_* จาก thread ไหนก็ได้)"""
+    preview_ready = pyqtSignal(str, object)  # (path, QImage)
+    preview_failed = pyqtSignal(str)  # path ที่ GUI ขอไว้แต่อ่าน/decode ไม่ได้ (ไฟล์เสีย / หาย)
+
+    def __init__(self, box=PREVIEW_SIZE, workers=PREVIEW_WORKERS, cache_size=PREVIEW_CACHE_SIZE,
+                 disk_cache=None, log_callback=None):
+        super().__init__()
+        self.box = box
+        self.disk_cache = disk_cache  # folder ของ thumbnail บน disk (None = memory อย่างเดียว)
+        self.cache_size = cache_size
+        self.log_callback = log_callback
+        self.lock = threading.Lock()
+        self.cache = OrderedDict()  # path -> (mtime_ns หรือ None = จาก capture ยังไม่รู้ mtime, QImage)
+        self.inflight = set()       # path ที่กำลัง decode
+        self.wanted = set()         # path ที่ GUI ขอไว้ (emit เมื่อ decode เสร็จ)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="preview")
+        self.stats = {"hits": 0, "offered": 0, "decoded": 0, "disk_hits": 0, "failed": 0}
+
+    def log(self, msg):
+        if self.log_callback:
+            self.log_callback(msg)
+        else:
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
+
+    # ---------- จาก capture engine ----------
+    def offer_encoded(self, path, data):
+        """JPEG/PNG/WebP bytes ที่เพิ่ง encode (ต้องเป็นสำเนาที่ไม่ถูกนำกลับไปใช้)"""
+        self._submit(path, lambda: decode_bytes(data, self.box), offered=True)
+
+    def offer_image(self, path, image_bgr):
+        """ภาพ BGR เต็มขนาดที่ใช้ encode (ห้ามแก้ array หลังส่งมา)"""
+        self._submit(path, lambda: fit(image_bgr, self.box), offered=True)
+
+    # ---------- จาก GUI ----------
+    def request(self, path):
+        """QImage ถ้ามีใน cache (ใช้ได้เลย) ไม่งั้น None แล้วจะได้ preview_ready / preview_failed ตามมา"""
+        image = self.get(path)
+        if image is not None:
+            return image
+        with self.lock:
+            self.wanted.add(path)
+            busy = path in self.inflight
+        if not busy:
+            self._submit(path, lambda: self._load_file(path))
+        return None
+
+    def get(self, path):
+        """thumbnail จาก cache เท่านั้น (mtime ต้องตรงกับไฟล์ปัจจุบัน)"""
+        mtime = _mtime(path)
+        with self.lock:
+            entry = self.cache.get(path)
+            if entry is None:
+                return None
+            cached_mtime, image = entry
+            if cached_mtime is None and mtime is not None:
+                # thumbnail จาก capture: ไฟล์เขียนเสร็จแล้ว -> ผูกกับ mtime นี้
+                self.cache[path] = (mtime, image)
+            elif cached_mtime != mtime:
+                del self.cache[path]
+                return None
+            self.cache.move_to_end(path)
+            self.stats["hits"] += 1
+            return image
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+    # ---------- Disk cache ----------
+    def disk_path(self, path, mtime):
+        key = hashlib.blake2b(f"{os.path.abspath(path)}|{mtime}|{self.box}".encode(), digest_size=16).hexdigest()
+        return os.path.join(self.disk_cache, key[:2], key + ".jpg")
+
+    def _load_file(self, path):
+        """thumbnail จาก disk cache ถ้ามี ไม่งั้น decode ภาพ (ลดขนาด) แล้วเก็บลง disk cache"""
+        if not self.disk_cache:
+            return decode_file(path, self.box)
+        cached = self.disk_path(path, _mtime(path))
+        thumb = cv2.imread(cached) if os.path.exists(cached) else None
+        if thumb is not None:
+            os.utime(cached)  # prune_disk_cache ลบตามเวลาที่ใช้ล่าสุด
+            with self.lock:
+                self.stats["disk_hits"] += 1
+            return thumb
+        thumb = decode_file(path, self.box)
+        if thumb is not None:
+            os.makedirs(os.path.dirname(cached), exist_ok=True)
+            ok, data = cv2.imencode(".jpg", thumb, [cv2.IMWRITE_JPEG_QUALITY, 80])
+            if ok:
+                tmp = cached + ".tmp"
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, cached)
+        return thumb
+
+    # ---------- Worker ----------
+    def _submit(self, path, make, offered=False):
+        with self.lock:
+            self.inflight.add(path)
+        try:
+            self.executor.submit(self._run, path, make, offered)
+        except RuntimeError:  # ปิด service แล้ว
+            with self.lock:
+                self.inflight.discard(path)
+
+    def _run(self, path, make, offered):
+        image = None
+        try:
+            thumb = make()
+            if thumb is not None:
+                image = to_qimage(thumb)
+        except Exception as e:
+            self.log(f"❌ Preview {os.path.basename(path)}: {e}")
+        with self.lock:
+            self.inflight.discard(path)
+            if image is None:
+                self.stats["failed"] += 1
+            else:
+                self.stats["offered" if offered else "decoded"] += 1
+                self.cache[path] = (None if offered else _mtime(path), image)
+                self.cache.move_to_end(path)
+                while len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+            emit = path in self.wanted
+            self.wanted.discard(path)
+        if not emit:
+            return
+        if image is None:
+            self.preview_failed.emit(path)
+        else:
+            self.preview_ready.emit(path, image)
@@ -2,13 +2,13 @@
 import cv2
 import numpy as np
 from PyQt5.QtCore import QThread, pyqtSignal
-from PyQt5.QtGui import QImage
 from config import COLORS
+from frame_slots import FrameSlots, SCALE_INTERPOLATION
 import time
 
 class RTSPThread(QThread):
     """Thread สำหรับดึง RTSP stream จากกล้อง"""
-    frame_received = pyqtSignal(QImage)
+    frame_ready = pyqtSignal(object)  # FrameSlots (GUI อ่าน slot ล่าสุดเอง ไม่ copy)
     status_changed = pyqtSignal(str, str, str)  # (text, color, border_color)
     log_message = pyqtSignal(str)
     
@@ -18,6 +18,11 @@ class RTSPThread(QThread):
         self.camera_name = camera_name
         self.running = True
         self.cap = None
+        self.slots = FrameSlots()
+    
+    def set_view_size(self, width, height):
+        """ขนาดพื้นที่แสดงภาพของ card ที่ต่อกับ thread นี้: ย่อภาพให้พอดีจอก่อนส่ง GUI"""
+        self.slots.set_view_size(width, height)
         
     def run(self):
         retry_count = 0
@@ -41,26 +46,33 @@ class RTSPThread(QThread):
                 self.status_changed.emit("LIVE", COLORS['success'], COLORS['success'])
                 retry_count = 0
                 
-                # ลูปอ่านภาพ
+                # ลูปอ่านภาพ (อ่านลง buffer เดิมทุกเฟรม)
+                # อ่านต่อเนื่องตามจังหวะ stream (ไม่ sleep -> ภาพไม่ค้างใน buffer)
+                # เฟรมที่เกิน PREVIEW_FPS แค่ grab() ไม่ต้อง decode เป็นภาพ/แปลงสี
+                frame = None
                 while self.running:
-                    ret, frame = self.cap.read()
+                    if not self.slots.should_render():
+                        if not self.cap.grab():
+                            self.log_message.emit(f"⚠️ {self.camera_name}: Lost connection")
+                            break
+                        self._report()
+                        continue
+                    
+                    ret, frame = self.cap.read(frame)
                     
                     if not ret:
                         self.log_message.emit(f"⚠️ {self.camera_name}: Lost connection")
                         break
                     
-                    # แปลง BGR -> RGB
-                    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    h, w, ch = rgb_frame.shape
-                    bytes_per_line = ch * w
-                    
-                    # สร้าง QImage - ต้อง copy data เพื่อป้องกัน crash
-                    rgb_copy = rgb_frame.copy()
-                    qt_image = QImage(rgb_copy.data, w, h, bytes_per_line, QImage.Format_RGB888).copy()
-                    self.frame_received.emit(qt_image)
-                    
-                    # ลดภาระ CPU
-                    time.sleep(0.033)  # ~30 FPS
+                    # ย่อให้พอดีจอก่อน (แปลงสีภาพเล็กถูกกว่า) แล้วแปลง BGR -> RGB ลง slot ว่างโดยตรง
+                    h, w = frame.shape[:2]
+                    th, tw = self.slots.display_shape(h, w)
+                    src = frame if (th, tw) == (h, w) else cv2.resize(frame, (tw, th), interpolation=SCALE_INTERPOLATION)
+                    index, slot = self.slots.begin_write((th, tw, 3))
+                    cv2.cvtColor(src, cv2.COLOR_BGR2RGB, dst=slot)
+                    if self.slots.publish(index):
+                        self.frame_ready.emit(self.slots)
+                    self._report()
                     
             except Exception as e:
                 self.log_message.emit(f"❌ {self.camera_name} Error: {str(e)}")
@@ -81,6 +93,11 @@ class RTSPThread(QThread):
         
         self.status_changed.emit("OFFLINE", COLORS['text_dim'], COLORS['border'])
     
+    def _report(self):
+        report = self.slots.report()
+        if report:
+            self.log_message.emit(f"📊 {self.camera_name}: {report}")
+    
     def stop(self):
         """หยุด thread"""
         self.running = False
@@ -91,7 +108,7 @@ class RTSPThread(QThread):
 
 class SimulatedRTSPThread(QThread):
     """Thread จำลอง RTSP สำหรับ testing (ไม่มีกล้องจริง)"""
-    frame_received = pyqtSignal(QImage)
+    frame_ready = pyqtSignal(object)
     status_changed = pyqtSignal(str, str, str)
     log_message = pyqtSignal(str)
     
@@ -100,6 +117,11 @@ class SimulatedRTSPThread(QThread):
         self.camera_name = camera_name
         self.running = True
         self.frame_count = 0
+        self.slots = FrameSlots()
+        self.canvas = np.empty((480, 640, 3), dtype=np.uint8)
+    
+    def set_view_size(self, width, height):
+        self.slots.set_view_size(width, height)
         
     def run(self):
         self.log_message.emit(f"🔧 {self.camera_name}: Simulation Mode")
@@ -107,31 +129,34 @@ class SimulatedRTSPThread(QThread):
         
         while self.running:
             try:
-                # สร้างภาพจำลอง
-                img = np.zeros((480, 640, 3), dtype=np.uint8)
-                
-                # พื้นหลังสีเทา
-                img[:] = (40, 40, 40)
-                
-                # เพิ่ม noise
-                noise = np.random.randint(0, 30, (480, 640, 3), dtype=np.uint8)
-                img = cv2.add(img, noise)
-                
-                # ข้อความ
-                text = f"{self.camera_name} - SIMULATION"
-                cv2.putText(img, text, (50, 240), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 255, 0), 2)
-                
-                # Frame counter
-                frame_text = f"Frame: {self.frame_count}"
-                cv2.putText(img, frame_text, (50, 280), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 1)
-                
                 self.frame_count += 1
                 
-                # แปลงเป็น QImage - copy เพื่อป้องกัน crash
-                h, w, ch = img.shape
-                img_copy = img.copy()
-                qt_image = QImage(img_copy.data, w, h, ch * w, QImage.Format_RGB888).copy()
-                self.frame_received.emit(qt_image)
+                # วาดเฉพาะเฟรมที่จะได้แสดง (PREVIEW_FPS)
+                if self.slots.should_render():
+                    # สร้างภาพจำลอง (วาดลง canvas เดิม แล้วย่อลง slot)
+                    img = self.canvas
+                    
+                    # พื้นหลังสีเทา
+                    img[:] = (40, 40, 40)
+                    
+                    # เพิ่ม noise
+                    noise = np.random.randint(0, 30, (480, 640, 3), dtype=np.uint8)
+                    cv2.add(img, noise, dst=img)
+                    
+                    # ข้อความ
+                    text = f"{self.camera_name} - SIMULATION"
+                    cv2.putText(img, text, (50, 240), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 255, 0), 2)
+                    
+                    # Frame counter
+                    frame_text = f"Frame: {self.frame_count}"
+                    cv2.putText(img, frame_text, (50, 280), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 1)
+                    
+                    if self.slots.publish(self.slots.write_resized(img)):
+                        self.frame_ready.emit(self.slots)
+                
+                report = self.slots.report()
+                if report:
+                    self.log_message.emit(f"📊 {self.camera_name}: {report}")
                 
                 time.sleep(0.033)  # ~30 FPS
             except Exception as e:
@@ -20,6 +20,12 @@ except ImportError as e:
     print(f"Details: {e}")
     sys.exit(1)
 
+# LineFramer: ต่อข้อความที่ถูกตัดข้าม TCP segment ให้ครบบรรทัดก่อน parse
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "Shopee_hik_gui"))
+from line_framer import iter_lines
+# pixel_convert: แปลง raw ตาม enPixelType (Mono/Bayer/Packed/YUV/RGB) ไม่ต้องเดา layout
+import pixel_convert
+
 # --- CONFIG ---
 HOST = '0.0.0.0'
 PORT = 5001        # Port ที่รอรับ Trigger จากกล้อง OCR
@@ -97,22 +103,14 @@ class HikRobotCamera:
         ret = self.cam.MV_CC_GetOneFrameTimeout(self.data_buf, self.nPayloadSize, stFrameInfo, 1000)
         
         if ret == 0:
-            # แปลงข้อมูลภาพ (ปรับแก้ตามประเภทกล้องของคุณ)
+            # แปลงข้อมูลภาพตาม pixel format ที่กล้องส่งมา (BGR สำหรับ cv2.imwrite)
             h, w = stFrameInfo.nHeight, stFrameInfo.nWidth
-            
-            # สมมติว่าเป็น Mono8 (ขาวดำ) หรือ RGB ดิบ
-            # สร้าง Numpy Array จาก Buffer
             p_data = (c_ubyte * stFrameInfo.nFrameLen).from_address(addressof(self.data_buf))
-            image_data = np.frombuffer(p_data, dtype=np.uint8).reshape(h, w, -1) # ปรับ Shape อัตโนมัติ
-
-            # ถ้าภาพเป็นขาวดำ (Mono) มันจะเป็น (h, w, 1) -> (h, w)
-            if image_data.shape[2] == 1:
-                image_data = image_data.reshape(h, w)
-                final_image = image_data # ใช้ได้เลย
-            else:
-                # ถ้าเป็น Bayer (ภาพสีที่ยังไม่แปลง) ต้อง Convert
-                # ลองรันดูก่อน ถ้าภาพเพี้ยนค่อยมาแก้บรรทัดนี้ครับ
-                final_image = cv2.cvtColor(image_data, cv2.COLOR_BayerRG2RGB) 
+            image_data = np.frombuffer(p_data, dtype=np.uint8)
+            final_image = pixel_convert.convert(image_data, w, h, stFrameInfo.enPixelType, bgr=True)
+            if final_image is None:
+                log(f"❌ Unsupported pixel format: 0x{stFrameInfo.enPixelType:08X}")
+                return
 
             # --- SAVE ---
             clean_id = "".join(x for x in order_id if x.isalnum())
@@ -153,17 +151,11 @@ def run_server():
             log(f"🟢 Connected by OCR Camera: {addr}")
             
             with conn:
-                while True:
-                    data = conn.recv(1024)
-                    if not data: break
-                    
-                    ocr_text = data.decode('utf-8', errors='ignore').strip()
-                    if ocr_text:
-                        for line in ocr_text.splitlines():
-                            clean_txt = line.strip()
-                            if clean_txt:
-                                log(f"🔔 Triggered ID: {clean_txt}")
-                                cam.take_snapshot(clean_txt)
+                for line in iter_lines(conn):
+                    clean_txt = line.strip()
+                    if clean_txt:
+                        log(f"🔔 Triggered ID: {clean_txt}")
+                        cam.take_snapshot(clean_txt)
         except Exception as e:
             log(f"Error: {e}")
             time.sleep(1)
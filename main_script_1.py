@@ -12,7 +12,6 @@ CURRENT VERSION (Shopee Order No = 14 chars only)
 import socket
 import os
 import sys
-import re
 from datetime import datetime
 from ctypes import *
 
@@ -26,6 +25,12 @@ except ImportError:
     print("❌ Cannot import MvCameraControl_class.py")
     sys.exit(1)
 
+# LineFramer: ต่อข้อความที่ถูกตัดข้าม TCP segment ให้ครบบรรทัดก่อน parse
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "Shopee_hik_gui"))
+from line_framer import iter_lines
+from order_extractor import OrderExtractor
+from order_index import OrderIndex
+
 # =============================
 # CONFIG
 # =============================
@@ -36,11 +41,8 @@ TRIGGER_TIMEOUT_MS = 3000
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-# 🔒 Shopee Order No = 14 chars ONLY
-ORDER_PATTERN = re.compile(
-    r"Shopee\s*Order\s*No\.?\s*([A-Z0-9]{14})",
-    re.I
-)
+# 🔒 Shopee Order No = 14 chars ONLY (ดู order_extractor.FORMATS)
+ORDER_EXTRACTOR = OrderExtractor(["shopee"])
 
 # =============================
 # UTILS
@@ -48,11 +50,6 @@ ORDER_PATTERN = re.compile(
 def log(msg):
     print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
 
-def folder_has_images(path):
-    if not os.path.exists(path):
-        return False
-    return any(f.lower().endswith(".jpg") for f in os.listdir(path))
-
 # =============================
 # CAMERA MANAGER
 # =============================
@@ -104,9 +101,12 @@ class HikCameraManager:
         folder = os.path.join(OUTPUT_DIR, order_no)
         os.makedirs(folder, exist_ok=True)
 
+        saved = 0
         for idx, cam in enumerate(self.cameras):
             cam.MV_CC_SetCommandValue("TriggerSoftware")
-            self._grab_and_save(cam, folder, idx + 1)
+            if self._grab_and_save(cam, folder, idx + 1):
+                saved += 1
+        return saved
 
     def _grab_and_save(self, cam, folder, cam_idx):
         frame = MV_FRAME_OUT()
@@ -114,7 +114,7 @@ class HikCameraManager:
 
         ret = cam.MV_CC_GetImageBuffer(frame, TRIGGER_TIMEOUT_MS)
         if ret != 0:
-            return
+            return False
 
         buf_size = frame.stFrameInfo.nWidth * frame.stFrameInfo.nHeight * 4 + 2048
         param = MV_SAVE_IMAGE_PARAM_EX()
@@ -130,7 +130,8 @@ class HikCameraManager:
         param.nBufferSize = buf_size
         param.pImageBuffer = (c_ubyte * buf_size)()
 
-        if cam.MV_CC_SaveImageEx2(param) == 0:
+        saved = cam.MV_CC_SaveImageEx2(param) == 0
+        if saved:
             ts = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"{folder}/cam{cam_idx}_{ts}.jpg"
             with open(filename, "wb") as f:
@@ -138,6 +139,7 @@ class HikCameraManager:
             log(f"📸 Saved {filename}")
 
         cam.MV_CC_FreeImageBuffer(frame)
+        return saved
 
 # =============================
 # SOCKET SERVER
@@ -147,6 +149,9 @@ def run_server():
     if not cam_mgr.init_cameras():
         return
 
+    # order ที่ถ่ายแล้ว (เช็คใน memory ก่อน ไม่ต้อง listdir ทุกบรรทัด)
+    order_index = OrderIndex(OUTPUT_DIR, log_callback=log).load()
+
     server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     server.bind((HOST, PORT))
     server.listen(1)
@@ -158,31 +163,22 @@ def run_server():
         log(f"🟢 OCR connected: {addr}")
 
         with conn:
-            while True:
-                data = conn.recv(1024)
-                if not data:
-                    break
-
-                text = data.decode("utf-8", errors="ignore")
-                for line in text.splitlines():
-                    match = ORDER_PATTERN.search(line)
-                    if not match:
-                        continue
-
-                    order_no = match.group(1).upper()
+            for line in iter_lines(conn):
+                for match in ORDER_EXTRACTOR.extract_all(line):
+                    order_no = match.order_no
 
                     # 🔒 Final validation
-                    if order_no.isdigit():
+                    if not match.valid:
                         log(f"⚠️ Ignore invalid OrderNo (digit only): {order_no}")
                         continue
 
-                    folder = os.path.join(OUTPUT_DIR, order_no)
-                    if folder_has_images(folder):
+                    if order_index.contains(order_no):
                         log(f"⏭️ Skip (already captured): {order_no}")
                         continue
 
                     log(f"🔔 New Order Detected: {order_no}")
-                    cam_mgr.capture_all(order_no)
+                    if cam_mgr.capture_all(order_no):
+                        order_index.add(order_no)
 
 # =============================
 # MAIN
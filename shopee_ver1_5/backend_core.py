@@ -7,7 +7,10 @@ import os
 import base64
 import config
 from datetime import datetime
+from collections import deque
 from sc2000_driver import SC2000Driver
+import gui_protocol
+from gui_protocol import KIND_HELLO, KIND_JSON, KIND_JPEG, LEGACY_VERSION
 
 # Mock Hikrobot Import (กรณีไม่มี SDK จริง)
 try:
@@ -17,9 +20,113 @@ except ImportError:
     HIKROBOT_AVAILABLE = False
     print("⚠️ Hikrobot SDK not found. Running in simulation mode for side cameras.")
 
+class GuiClient:
+    """
+    GUI 1 ตัว: queue ขาออกของตัวเอง + writer thread -> GUI ที่ช้า/ค้างไม่บล็อก thread ที่รับข้อมูลจาก SC2000
+    - live_image ค้างได้ไม่เกิน GUI_LIVE_QUEUE ภาพ (เกิน = ทิ้งภาพเก่าสุด)
+    - ข้อความควบคุม (process_step, job_complete, ...) ไม่ถูกทิ้ง ถ้าค้างเกิน GUI_CONTROL_QUEUE = GUI ค้าง -> ตัดการเชื่อมต่อ
+    """
+    def __init__(self, sock, addr, version, on_closed=None):
+        self.sock = sock
+        self.addr = addr
+        self.version = version # 0 = JSON ทีละบรรทัดแบบเดิม
+        self.on_closed = on_closed
+        self.queue = deque() # (frame bytes, droppable, enqueued_at)
+        self.cond = threading.Condition()
+        self.live_queued = 0
+        self.closed = False
+        
+        # Metrics
+        self.sent = 0
+        self.dropped = 0
+        self.bytes_sent = 0
+        self.last_lag = 0.0 # วินาที จากเข้า queue ถึงส่งเสร็จ
+        self.max_lag = 0.0
+        
+        self.sock.settimeout(config.GUI_SEND_TIMEOUT)
+        self.thread = threading.Thread(target=self.writer_loop, daemon=True)
+        self.thread.start()
+
+    def enqueue(self, frame, droppable=False):
+        with self.cond:
+            if self.closed:
+                return
+            if droppable and self.live_queued >= config.GUI_LIVE_QUEUE:
+                # ทิ้ง live_image เก่าสุดที่ยังไม่ได้ส่ง (ข้อความควบคุมคงลำดับเดิม)
+                for i, item in enumerate(self.queue):
+                    if item[1]:
+                        del self.queue[i]
+                        break
+                self.live_queued -= 1
+                self.dropped += 1
+            elif not droppable and len(self.queue) - self.live_queued >= config.GUI_CONTROL_QUEUE:
+                print(f"⚠️ GUI {self.addr} stalled ({len(self.queue)} queued) - disconnecting")
+                self._close_locked()
+                return
+            self.queue.append((frame, droppable, time.perf_counter()))
+            if droppable:
+                self.live_queued += 1
+            self.cond.notify()
+
+    def writer_loop(self):
+        while True:
+            with self.cond:
+                while not self.queue and not self.closed:
+                    self.cond.wait()
+                if self.closed:
+                    break
+                frame, droppable, enqueued_at = self.queue.popleft()
+                if droppable:
+                    self.live_queued -= 1
+            try:
+                self.sock.sendall(frame)
+            except OSError as e:
+                print(f"⚠️ GUI {self.addr} send failed: {e}")
+                self.close()
+                break
+            lag = time.perf_counter() - enqueued_at
+            self.sent += 1
+            self.bytes_sent += len(frame)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+        if self.on_closed:
+            self.on_closed(self)
+
+    def close(self):
+        with self.cond:
+            self._close_locked()
+
+    def _close_locked(self):
+        self.closed = True
+        self.queue.clear()
+        self.live_queued = 0
+        self.cond.notify()
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR) # ปลุก writer ที่ค้างอยู่ใน sendall
+        except OSError:
+            pass
+
+    def stats(self):
+        with self.cond:
+            queued = len(self.queue)
+        return {
+            "addr": f"{self.addr[0]}:{self.addr[1]}",
+            "version": self.version,
+            "queued": queued,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "bytes_sent": self.bytes_sent,
+            "lag_ms": round(self.last_lag * 1000, 1),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+        }
+
 class BackendServer:
     def __init__(self):
-        self.clients = [] # GUI Clients
+        self.clients = [] # GUI Clients (GuiClient)
         self.lock = threading.Lock()
         
         # 1. Init SC2000 Driver
@@ -45,8 +152,12 @@ class BackendServer:
         
         # Keep main thread alive
         try:
+            last_stats = time.time()
             while True:
                 time.sleep(1)
+                if time.time() - last_stats >= config.GUI_STATS_INTERVAL:
+                    last_stats = time.time()
+                    self.print_client_stats()
         except KeyboardInterrupt:
             self.sc2000.stop()
             print("\n🛑 Shutting down...")
@@ -55,31 +166,94 @@ class BackendServer:
     def gui_accept_loop(self):
         while True:
             client, addr = self.broadcast_sock.accept()
-            print(f"🖥️ GUI Connected: {addr}")
-            with self.lock:
-                self.clients.append(client)
-                
-            # Send initial status
-            self.send_to_gui("system_status", {"status": "ready", "hikrobot": HIKROBOT_AVAILABLE})
+            # handshake ใน thread แยก (client เก่าไม่ส่ง HELLO ต้องรอ timeout)
+            threading.Thread(target=self.gui_handshake, args=(client, addr), daemon=True).start()
+
+    def gui_handshake(self, client, addr):
+        """ตกลง version กับ GUI: ได้ HELLO = binary frame, ไม่ได้ภายใน timeout = JSON แบบเดิม"""
+        version = LEGACY_VERSION
+        try:
+            client.settimeout(config.GUI_HELLO_TIMEOUT)
+            magic, _, kind, length = gui_protocol.HEADER.unpack(gui_protocol.recv_exact(client, gui_protocol.HEADER.size))
+            if magic == gui_protocol.MAGIC and kind == KIND_HELLO and length <= 4096:
+                offer = json.loads(gui_protocol.recv_exact(client, length))
+                version = gui_protocol.negotiate(offer.get("versions"))
+        except socket.timeout:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"⚠️ GUI Handshake Failed {addr}: {e}")
+            client.close()
+            return
+        client.settimeout(None)
+
+        try:
+            if version != LEGACY_VERSION:
+                client.sendall(gui_protocol.pack_json(KIND_HELLO, {"version": version}, version))
+        except OSError:
+            client.close()
+            return
+        with self.lock:
+            self.clients.append(GuiClient(client, addr, version, on_closed=self.remove_client))
+        print(f"🖥️ GUI Connected: {addr} (protocol v{version})")
+
+        # Send initial status
+        self.send_to_gui("system_status", {"status": "ready", "hikrobot": HIKROBOT_AVAILABLE})
 
     def send_to_gui(self, msg_type, data):
-        """ส่ง JSON ไปหา GUI"""
+        """ส่งข้อความควบคุม (JSON) ไปหา GUI"""
         payload = {
             "type": msg_type,
             "data": data,
             "timestamp": datetime.now().isoformat()
         }
-        msg = json.dumps(payload) + "\n"
-        
+        body = json.dumps(payload).encode('utf-8')
+
+        def encode(version):
+            if version == LEGACY_VERSION:
+                return body + b"\n"
+            return gui_protocol.pack(KIND_JSON, body, version)
+        self.broadcast(encode)
+
+    def send_live_image(self, jpeg):
+        """ส่ง JPEG ไปหา GUI: binary client ได้ JPEG ดิบ, client เก่าได้ base64 ใน JSON (encode เมื่อมี client เก่าเท่านั้น)"""
+        def encode(version):
+            if version == LEGACY_VERSION:
+                payload = {
+                    "type": "live_image",
+                    "data": {"image": base64.b64encode(jpeg).decode('ascii')},
+                    "timestamp": datetime.now().isoformat()
+                }
+                return (json.dumps(payload) + "\n").encode('utf-8')
+            return gui_protocol.pack(KIND_JPEG, jpeg, version)
+        self.broadcast(encode, droppable=True)
+
+    def broadcast(self, encode, droppable=False):
+        """ใส่ queue ของทุก client แล้ว return ทันที (encode ครั้งเดียวต่อ version, writer thread ของแต่ละ client ส่งเอง)"""
+        with self.lock:
+            clients = list(self.clients)
+        encoded = {}
+        for client in clients:
+            if client.version not in encoded:
+                encoded[client.version] = encode(client.version)
+            client.enqueue(encoded[client.version], droppable)
+
+    def remove_client(self, client):
+        with self.lock:
+            if client in self.clients:
+                self.clients.remove(client)
+        stats = client.stats()
+        print(f"🔌 GUI Disconnected: {stats['addr']} (sent {stats['sent']}, dropped {stats['dropped']})")
+
+    def client_stats(self):
+        """lag / queue / drop ของ GUI แต่ละตัว"""
         with self.lock:
-            dead_clients = []
-            for client in self.clients:
-                try:
-                    client.sendall(msg.encode('utf-8'))
-                except:
-                    dead_clients.append(client)
-            for d in dead_clients:
-                self.clients.remove(d)
+            clients = list(self.clients)
+        return [client.stats() for client in clients]
+
+    def print_client_stats(self):
+        for stats in self.client_stats():
+            print(f"📊 GUI {stats['addr']} v{stats['version']}: queued {stats['queued']}, sent {stats['sent']}, "
+                  f"dropped {stats['dropped']}, lag {stats['lag_ms']} ms (max {stats['max_lag_ms']} ms)")
 
     # ================= LOGIC HANDLERS =================
     def handle_sc2000_data(self, data):
@@ -88,7 +262,7 @@ class BackendServer:
         
         if msg_type == "image":
             # Pass-through image to GUI immediately (Real-time view)
-            self.send_to_gui("live_image", {"image": data["data"]})
+            self.send_live_image(base64.b64decode(data["data"]))
             
         elif msg_type == "ocr":
             text = data.get("data", "")
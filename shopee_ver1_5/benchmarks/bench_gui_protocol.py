@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: live_image จาก BackendServer -> GUI แบบเดิม (JSON + base64 ทีละบรรทัด) เทียบ binary frame (gui_protocol)
+
+- bytes ต่อ frame
+- encode (ฝั่ง Backend) / decode จนได้ JPEG bytes (ฝั่ง BackendListener) ต่อ frame
+- messages/s ผ่าน socket จริง (socketpair: ส่งใน thread หนึ่ง อ่าน+แยก frame อีก thread)
+
+ใช้งาน:
+    python benchmarks/bench_gui_protocol.py
+    python benchmarks/bench_gui_protocol.py --width 1280 --height 960 --count 2000
+"""
+
+import os
+import sys
+import json
+import time
+import base64
+import socket
+import argparse
+import threading
+from datetime import datetime
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import gui_protocol
+from gui_protocol import FrameReader, KIND_JPEG
+
+
+def make_jpeg(width, height, quality):
+    """ภาพทดสอบ (gradient + noise + ข้อความ) ขนาดใกล้ภาพ live จริงมากกว่าภาพสีเดียว"""
+    rng = np.random.default_rng(1)
+    img = np.tile(np.linspace(0, 255, width, dtype=np.uint8), (height, 1))
+    img = cv2.merge([img, img[::-1], np.full_like(img, 96)])
+    img = cv2.add(img, rng.integers(0, 24, img.shape, dtype=np.uint8))
+    cv2.putText(img, "SPX1234567890", (40, height // 2), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 255, 0), 4)
+    return cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])[1].tobytes()
+
+
+# ---------- แบบเดิม ----------
+def legacy_encode(jpeg):
+    payload = {"type": "live_image", "data": {"image": base64.b64encode(jpeg).decode('ascii')},
+               "timestamp": datetime.now().isoformat()}
+    return (json.dumps(payload) + "\n").encode('utf-8')
+
+
+def legacy_decode(buffer):
+    """เหมือน BackendListener เดิม: decode str -> split บรรทัด -> json.loads -> b64decode"""
+    images = []
+    text = buffer.decode('utf-8', errors='ignore')
+    while '\n' in text:
+        line, text = text.split('\n', 1)
+        images.append(base64.b64decode(json.loads(line)["data"]["image"]))
+    return images, text.encode('utf-8')
+
+
+# ---------- binary ----------
+def binary_encode(jpeg):
+    return gui_protocol.pack(KIND_JPEG, jpeg)
+
+
+def timed(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1000
+
+
+def stream(frame, count, read):
+    """ส่ง frame เดิม count ครั้งผ่าน socketpair, return messages/s ฝั่งรับ"""
+    sender, receiver = socket.socketpair()
+
+    def send():
+        for _ in range(count):
+            sender.sendall(frame)
+        sender.shutdown(socket.SHUT_WR)
+    thread = threading.Thread(target=send, daemon=True)
+    t0 = time.perf_counter()
+    thread.start()
+    received = read(receiver)
+    elapsed = time.perf_counter() - t0
+    thread.join()
+    sender.close()
+    receiver.close()
+    assert received == count, f"received {received}/{count}"
+    return count / elapsed
+
+
+def read_legacy(sock):
+    # เหมือน BackendListener เดิม: recv 4096 + ต่อ str
+    received, buffer = 0, ""
+    while True:
+        data = sock.recv(4096)
+        if not data:
+            return received
+        buffer += data.decode('utf-8', errors='ignore')
+        while '\n' in buffer:
+            line, buffer = buffer.split('\n', 1)
+            base64.b64decode(json.loads(line)["data"]["image"])
+            received += 1
+
+
+def read_binary(sock):
+    received, reader = 0, FrameReader()
+    while True:
+        data = sock.recv(65536)
+        if not data:
+            return received
+        received += len(reader.feed(data))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark GUI protocol: JSON+base64 vs binary frames")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--quality", type=int, default=90)
+    parser.add_argument("--repeat", type=int, default=500, help="รอบ encode/decode")
+    parser.add_argument("--count", type=int, default=1000, help="จำนวน frame ที่ส่งผ่าน socket")
+    args = parser.parse_args()
+
+    jpeg = make_jpeg(args.width, args.height, args.quality)
+    legacy_frame, binary_frame = legacy_encode(jpeg), binary_encode(jpeg)
+    print(f"JPEG {args.width}x{args.height} q{args.quality}: {len(jpeg) / 1024:.1f} KB, "
+          f"{args.repeat} rounds, {args.count} frames over socketpair")
+
+    rows = [
+        ("json+base64", legacy_frame,
+         timed(lambda: legacy_encode(jpeg), args.repeat),
+         timed(lambda: legacy_decode(legacy_frame), args.repeat),
+         stream(legacy_frame, args.count, read_legacy)),
+        ("binary", binary_frame,
+         timed(lambda: binary_encode(jpeg), args.repeat),
+         timed(lambda: FrameReader().feed(binary_frame), args.repeat),
+         stream(binary_frame, args.count, read_binary)),
+    ]
+    print(f"{'protocol':<14}{'bytes/frame':>13}{'overhead':>10}{'encode ms':>11}{'decode ms':>11}{'msg/s':>10}")
+    for name, frame, encode_ms, decode_ms, rate in rows:
+        overhead = (len(frame) - len(jpeg)) / len(jpeg) * 100
+        print(f"{name:<14}{len(frame):>13,}{overhead:>9.1f}%{encode_ms:>11.3f}{decode_ms:>11.3f}{rate:>10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
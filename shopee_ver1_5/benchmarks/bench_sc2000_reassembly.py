@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: ต่อ packet จาก stream ของ SC2000 แบบเดิม (bytes += chunk, `in` + split ทุก 4 KB) เทียบ PacketAssembler
+
+- packet สร้างแบบเดียวกับ simulator_v2.py (ภาพ base64 ใน JSON + OCR, จบด้วย \\n\\n) ที่ความละเอียดที่เลือก
+- ส่งผ่าน socket จริง (socketpair) เร็วที่สุดเท่าที่ได้ แล้ววัด MB/s ฝั่งรับ
+  (simulator_v2.py เองหน่วง 2.5 วินาทีต่อรอบ จึงใช้แค่ตัวสร้าง packet ของมัน)
+
+ใช้งาน:
+    python benchmarks/bench_sc2000_reassembly.py
+    python benchmarks/bench_sc2000_reassembly.py --width 2448 --height 2048 --count 100
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from simulator_v2 import create_dummy_image
+from sc2000_driver import PacketAssembler, RECV_SIZE
+
+
+def make_stream(width, height):
+    """ภาพ 1 packet + OCR 1 packet แบบเดียวกับ simulator_v2.run_sc2000_sim"""
+    image = {"type": "image", "data": create_dummy_image(width, height)}
+    ocr = {"type": "ocr", "data": "SPX1234567890", "confidence": 0.95}
+    return ((json.dumps(image) + "\n\n") + (json.dumps(ocr) + "\n\n")).encode('utf-8')
+
+
+def read_legacy(sock):
+    """loop เดิมของ SC2000Driver._worker_loop"""
+    packets = 0
+    buffer = b""
+    while True:
+        chunk = sock.recv(4096)
+        if not chunk: break
+        buffer += chunk
+        while b"\n\n" in buffer:
+            packet, buffer = buffer.split(b"\n\n", 1)
+            packets += 1
+    return packets
+
+
+def read_assembler(sock):
+    """loop ใหม่: recv_into buffer ที่จองไว้ + PacketAssembler"""
+    packets = 0
+    assembler = PacketAssembler(b"\n\n")
+    chunk = bytearray(RECV_SIZE)
+    view = memoryview(chunk)
+    while True:
+        n = sock.recv_into(chunk)
+        if not n: break
+        packets += len(assembler.feed(view[:n]))
+    return packets
+
+
+def run(read, data, count):
+    """return (MB/s, packets ที่ได้)"""
+    sender, receiver = socket.socketpair()
+
+    def send():
+        for _ in range(count):
+            sender.sendall(data)
+        sender.shutdown(socket.SHUT_WR)
+    thread = threading.Thread(target=send, daemon=True)
+    t0 = time.perf_counter()
+    thread.start()
+    packets = read(receiver)
+    elapsed = time.perf_counter() - t0
+    thread.join()
+    sender.close()
+    receiver.close()
+    return len(data) * count / elapsed / 1e6, packets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SC2000 packet reassembly")
+    parser.add_argument("--width", type=int, default=4096)
+    parser.add_argument("--height", type=int, default=3000)
+    parser.add_argument("--count", type=int, default=50, help="จำนวนรอบ (ภาพ + OCR)")
+    args = parser.parse_args()
+
+    data = make_stream(args.width, args.height)
+    print(f"{args.width}x{args.height}: {len(data) / 1024:.0f} KB per round, {args.count} rounds")
+    print(f"{'reader':<12}{'MB/s':>10}{'packets':>10}")
+    for name, read in (("legacy", read_legacy), ("assembler", read_assembler)):
+        rate, packets = run(read, data, args.count)
+        assert packets == 2 * args.count, f"{name}: {packets} packets"
+        print(f"{name:<12}{rate:>10.1f}{packets:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,11 @@ import os
 BACKEND_HOST = "0.0.0.0"
 BACKEND_PORT = 5010       # Port สำหรับรับ Trigger จาก OCR ภายนอก (ถ้ามี)
 GUI_BROADCAST_PORT = 5002  # Port สำหรับส่งข้อมูลไปหา GUI
+GUI_HELLO_TIMEOUT = 1.0    # รอ HELLO จาก GUI (วินาที) ไม่ได้ = GUI รุ่นเก่า ส่ง JSON แบบเดิม
+GUI_LIVE_QUEUE = 2         # live_image ค้างใน queue ต่อ GUI ได้สูงสุด (เกิน = ทิ้งภาพเก่าสุด)
+GUI_CONTROL_QUEUE = 1000   # ข้อความควบคุมค้างได้สูงสุด (เกิน = GUI ค้าง ตัดการเชื่อมต่อ)
+GUI_SEND_TIMEOUT = 10.0    # sendall ไปหา GUI นานเกินนี้ (วินาที) = ตัดการเชื่อมต่อ
+GUI_STATS_INTERVAL = 30    # พิมพ์ lag / drop ของแต่ละ GUI ทุกกี่วินาที
 
 # SC2000 Smart Camera
 SC2000_IP = "192.168.1.10"
@@ -3,6 +3,7 @@ import sys
 import json
 import base64
 import cv2
+import time
 import socket
 import threading
 import numpy as np
@@ -10,6 +11,8 @@ from PyQt5.QtWidgets import *
 from PyQt5.QtGui import QImage, QPixmap, QFont, QColor
 from PyQt5.QtCore import Qt, pyqtSignal, QThread, QObject, QTimer
 import config
+import gui_protocol
+from gui_protocol import FrameReader, KIND_HELLO, KIND_JSON, KIND_JPEG
 
 # ================= RTSP WORKER (Integrated) =================
 class RTSPWorker(QThread):
@@ -38,28 +41,63 @@ class RTSPWorker(QThread):
 # ================= BACKEND LISTENER =================
 class BackendListener(QThread):
     data_signal = pyqtSignal(dict)
+    image_signal = pyqtSignal(QImage)  # live_image ที่ decode แล้ว (ทำใน thread นี้ ไม่ใช่ GUI thread)
     
     def run(self):
         while True:
+            sock = None
             try:
                 sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
                 sock.connect(("127.0.0.1", config.GUI_BROADCAST_PORT))
+                sock.sendall(gui_protocol.hello())
                 print("✅ GUI: Connected to Backend")
                 
-                buffer = ""
-                while True:
-                    data = sock.recv(4096)
-                    if not data: break
-                    buffer += data.decode('utf-8', errors='ignore')
-                    
-                    while '\n' in buffer:
-                        line, buffer = buffer.split('\n', 1)
-                        try:
-                            msg = json.loads(line)
-                            self.data_signal.emit(msg)
-                        except: pass
-            except:
-                time.sleep(2) # Retry connect
+                # Backend ใหม่ตอบ HELLO (binary frame), Backend เก่าส่ง JSON ทีละบรรทัด
+                first = gui_protocol.recv_exact(sock, len(gui_protocol.MAGIC))
+                if first == gui_protocol.MAGIC:
+                    self.read_frames(sock, first)
+                else:
+                    self.read_lines(sock, first)
+            except Exception:
+                pass
+            if sock:
+                sock.close()
+            time.sleep(2) # Retry connect
+
+    def read_frames(self, sock, data):
+        reader = FrameReader()
+        while data:
+            for kind, payload in reader.feed(data):
+                if kind == KIND_JPEG:
+                    self.emit_image(payload)
+                elif kind == KIND_JSON:
+                    self.data_signal.emit(json.loads(payload))
+                elif kind == KIND_HELLO:
+                    print(f"🔗 GUI: Protocol v{json.loads(payload)['version']}")
+            data = sock.recv(65536)
+
+    def read_lines(self, sock, data):
+        """JSON ทีละบรรทัดของ Backend รุ่นเก่า (live_image เป็น base64)"""
+        buffer = b""
+        while data:
+            buffer += data
+            lines = buffer.split(b'\n')
+            buffer = lines.pop()
+            for line in lines:
+                try:
+                    msg = json.loads(line)
+                except ValueError:
+                    continue
+                if msg.get("type") == "live_image":
+                    self.emit_image(base64.b64decode(msg["data"]["image"]))
+                else:
+                    self.data_signal.emit(msg)
+            data = sock.recv(65536)
+
+    def emit_image(self, jpeg):
+        qimg = QImage.fromData(jpeg)
+        if not qimg.isNull():
+            self.image_signal.emit(qimg.scaled(640, 360, Qt.KeepAspectRatio))
 
 # ================= MAIN WINDOW =================
 class Dashboard(QMainWindow):
@@ -123,6 +161,7 @@ class Dashboard(QMainWindow):
         # 1. Listen to Backend
         self.backend = BackendListener()
         self.backend.data_signal.connect(self.process_backend_data)
+        self.backend.image_signal.connect(self.update_sc2000_image)
         self.backend.start()
         
         # 2. RTSP Stream (ถ้ามีกล้องจริงให้เปิดบรรทัดล่าง)
@@ -134,9 +173,7 @@ class Dashboard(QMainWindow):
         mtype = msg.get("type")
         data = msg.get("data", {})
         
-        if mtype == "live_image":
-            self.update_sc2000_image(data["image"])
-        elif mtype == "ocr_result":
+        if mtype == "ocr_result":
             text = data["text"]
             conf = data["confidence"]
             color = "#00ff00" if data["is_valid"] else "#ff0000"
@@ -149,12 +186,8 @@ class Dashboard(QMainWindow):
         elif mtype == "job_complete":
             self.lbl_status.setText("✅ COMPLETED")
 
-    def update_sc2000_image(self, b64_str):
-        try:
-            img_data = base64.b64decode(b64_str)
-            qimg = QImage.fromData(img_data)
-            self.lbl_sc2000.setPixmap(QPixmap.fromImage(qimg).scaled(640, 360, Qt.KeepAspectRatio))
-        except: pass
+    def update_sc2000_image(self, qimg):
+        self.lbl_sc2000.setPixmap(QPixmap.fromImage(qimg))
 
     def update_rtsp_image(self, cv_img):
         rgb_img = cv2.cvtColor(cv_img, cv2.COLOR_BGR2RGB)
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+GUI Protocol - frame แบบ length-prefixed ระหว่าง BackendServer -> GUI (BackendListener)
+
+frame = header 8 byte + payload
+    magic (2s) "SX" | version (B) | kind (B) | payload length (I, big-endian)
+kind:
+    KIND_HELLO : JSON {"versions": [...]} (client -> server) / {"version": n} (server -> client)
+    KIND_JSON  : JSON ข้อความควบคุมเล็กๆ {"type", "data", "timestamp"} (เหมือนเดิม)
+    KIND_JPEG  : live_image เป็น JPEG ดิบ (ไม่ต้อง base64 / json)
+
+Version negotiation:
+    client ส่ง HELLO ทันทีหลัง connect -> server ตอบ HELLO พร้อม version ที่ใช้ร่วมกันได้สูงสุด
+    client เก่า (ไม่ส่ง HELLO ภายใน timeout) หรือไม่มี version ที่ตรงกัน -> server ส่ง JSON ทีละบรรทัดแบบเดิม (version 0)
+    client ใหม่ต่อ server เก่า: ได้ '{' แทน magic -> อ่านแบบ JSON ทีละบรรทัด
+"""
+
+import json
+import struct
+
+MAGIC = b"SX"
+PROTOCOL_VERSION = 1
+SUPPORTED_VERSIONS = (1,)
+LEGACY_VERSION = 0  # JSON + "\n" (live_image เป็น base64)
+
+HEADER = struct.Struct("!2sBBI")
+KIND_HELLO = 0
+KIND_JSON = 1
+KIND_JPEG = 2
+MAX_PAYLOAD = 32 * 1024 * 1024  # กัน length เพี้ยนจาก stream เสีย
+
+
+class ProtocolError(ValueError):
+    pass
+
+
+def pack(kind, payload, version=PROTOCOL_VERSION):
+    return HEADER.pack(MAGIC, version, kind, len(payload)) + payload
+
+
+def pack_json(kind, obj, version=PROTOCOL_VERSION):
+    return pack(kind, json.dumps(obj).encode('utf-8'), version)
+
+
+def hello(versions=SUPPORTED_VERSIONS):
+    """HELLO ของ client (บอก version ที่รองรับ)"""
+    return pack_json(KIND_HELLO, {"versions": list(versions)})
+
+
+def negotiate(offered, supported=SUPPORTED_VERSIONS):
+    """version สูงสุดที่ทั้งสองฝั่งรองรับ ไม่มี = LEGACY_VERSION"""
+    common = set(offered or ()) & set(supported)
+    return max(common) if common else LEGACY_VERSION
+
+
+def recv_exact(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("connection closed")
+        data += chunk
+    return bytes(data)
+
+
+class FrameReader:
+    """แยก frame จาก TCP stream: feed(bytes) -> list ของ (kind, payload)"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        self.buffer += data
+        frames = []
+        offset = 0
+        while len(self.buffer) - offset >= HEADER.size:
+            magic, _, kind, length = HEADER.unpack_from(self.buffer, offset)
+            if magic != MAGIC or length > MAX_PAYLOAD:
+                raise ProtocolError(f"bad frame header at byte {offset}")
+            end = offset + HEADER.size + length
+            if end > len(self.buffer):
+                break
+            frames.append((kind, bytes(self.buffer[offset + HEADER.size:end])))
+            offset = end
+        if offset:
+            del self.buffer[:offset]  # ตัดครั้งเดียวต่อ feed
+        return frames
@@ -9,6 +9,36 @@ import cv2
 from typing import Callable, Optional
 import config
 
+RECV_SIZE = 256 * 1024  # ภาพ base64 ความละเอียดสูงมาเป็น MB -> อ่านทีละก้อนใหญ่
+
+class PacketAssembler:
+    """
+    ต่อ stream เป็น packet ที่จบด้วย delimiter ในเวลาเชิงเส้น
+    - buffer เป็น bytearray (ต่อท้าย/ตัดหัวไม่สร้าง bytes ใหม่ทั้งก้อน)
+    - ค้น delimiter เฉพาะ byte ที่เพิ่งมา (scan cursor) ไม่ค้นซ้ำตั้งแต่ต้น buffer ทุก chunk
+    """
+    def __init__(self, delimiter=b"\n\n"):
+        self.delimiter = delimiter
+        self.buffer = bytearray()
+        self.scan = 0 # ตำแหน่งที่ค้นแล้วว่าไม่มี delimiter
+
+    def feed(self, data):
+        """ใส่ข้อมูลใหม่ return list ของ packet (bytes ไม่รวม delimiter) ที่ครบแล้ว"""
+        self.buffer += data
+        packets = []
+        start = 0
+        while True:
+            end = self.buffer.find(self.delimiter, max(self.scan, start))
+            if end < 0:
+                break
+            packets.append(bytes(self.buffer[start:end]))
+            start = end + len(self.delimiter)
+        if start:
+            del self.buffer[:start]
+        # delimiter อาจคร่อม chunk -> ค้นใหม่ย้อนหลัง len(delimiter) - 1 byte
+        self.scan = max(0, len(self.buffer) - len(self.delimiter) + 1)
+        return packets
+
 class SC2000Driver:
     """
     Driver จัดการการเชื่อมต่อกับกล้อง SC2000 ผ่าน TCP
@@ -38,16 +68,15 @@ class SC2000Driver:
                 self.connected = True
                 print(f"✅ SC2000: Connected!")
 
-                buffer = b""
+                # ใช้ \n\n เป็นตัวจบ Packet (ตาม Simulator)
+                assembler = PacketAssembler(b"\n\n")
+                chunk = bytearray(RECV_SIZE)
+                view = memoryview(chunk)
                 while self.running:
                     try:
-                        chunk = self.socket.recv(4096)
-                        if not chunk: break
-                        buffer += chunk
-                        
-                        # ใช้ \n\n เป็นตัวจบ Packet (ตาม Simulator)
-                        while b"\n\n" in buffer:
-                            packet, buffer = buffer.split(b"\n\n", 1)
+                        n = self.socket.recv_into(chunk)
+                        if not n: break
+                        for packet in assembler.feed(view[:n]):
                             self._process_packet(packet)
                             
                     except socket.timeout:
@@ -64,8 +93,7 @@ class SC2000Driver:
 
     def _process_packet(self, raw_bytes):
         try:
-            data_str = raw_bytes.decode('utf-8')
-            json_data = json.loads(data_str)
+            json_data = json.loads(raw_bytes) # json รับ bytes UTF-8 ได้ตรงๆ
             
             # ส่งข้อมูลดิบกลับไปให้ Backend ตัดสินใจ
             self.callback(json_data)
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import socket
+import argparse
 import json
 import time
 import random
@@ -8,19 +9,19 @@ import cv2
 import numpy as np
 import config
 
-def create_dummy_image():
-    img = np.zeros((480, 640, 3), dtype=np.uint8)
+def create_dummy_image(width=640, height=480):
+    img = np.zeros((height, width, 3), dtype=np.uint8)
     cv2.putText(img, f"SIMULATED {time.time()}", (50, 240), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
     _, buf = cv2.imencode('.jpg', img)
     return base64.b64encode(buf).decode('utf-8')
 
-def run_sc2000_sim():
+def run_sc2000_sim(width=640, height=480):
     server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
     server.bind(("0.0.0.0", config.SC2000_PORT))
     server.listen(1)
     
-    print(f"🤖 Simulator listening on {config.SC2000_PORT}")
+    print(f"🤖 Simulator listening on {config.SC2000_PORT} ({width}x{height})")
     
     while True:
         conn, addr = server.accept()
@@ -31,7 +32,7 @@ def run_sc2000_sim():
                 # 1. Send Image
                 msg_img = {
                     "type": "image",
-                    "data": create_dummy_image()
+                    "data": create_dummy_image(width, height)
                 }
                 conn.sendall((json.dumps(msg_img) + "\n\n").encode('utf-8'))
                 
@@ -56,4 +57,8 @@ def run_sc2000_sim():
         conn.close()
 
 if __name__ == "__main__":
-    run_sc2000_sim()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="SC2000 simulator")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    args = parser.parse_args()
+    run_sc2000_sim(args.width, args.height)
\ No newline at end of file